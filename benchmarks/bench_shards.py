@@ -0,0 +1,94 @@
+"""
+Load benchmark for the sharded runtime: request throughput against the number of shards.
+
+For every shard count a pool is started, as many client processes as shards play
+sessions spread over all shards (alternating moves and state reads) for a fixed
+time, and the total requests per second is reported with the speedup over one shard.
+Throughput can only scale while there are free cores for shards and clients.
+
+Run with:
+    python -m benchmarks.bench_shards                    # 1, 2, 4, ... up to the number of cores
+    python -m benchmarks.bench_shards --shards 1 2 8 --duration 5
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from unittest import mock
+
+from game_api.sharding import ShardPool, ShardRouter
+
+DIRECTIONS = ["up", "left", "down", "right"]
+
+
+def use_mongomock():
+    """
+    Worker initializer: keep the shard's database in memory.
+    """
+    import mongomock
+    mock.patch("game_api.database.MongoClient", mongomock.MongoClient).start()
+
+
+def client(addresses, authkey, sessions, duration, start_at, results):
+    """
+    One load generator process: starts its sessions, then sends requests until the time is up.
+    """
+    router = ShardRouter(addresses, authkey)
+    ids = [router.start_new_game(f"load{os.getpid()}-{i}", 25) for i in range(sessions)]
+    while time.time() < start_at:
+        time.sleep(0.001)
+    requests = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        session_id = ids[requests % sessions]
+        if requests % 2:
+            router.get_current_state(session_id)
+        else:
+            router.process_move(session_id, DIRECTIONS[(requests // 2) % 4])
+        requests += 1
+    results.put(requests)
+
+
+def measure(n_shards, sessions_per_client, duration):
+    """
+    Requests per second served by a pool of n_shards driven by n_shards clients.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ShardPool(n_shards, initializer=use_mongomock) as pool:
+        results = context.Queue()
+        start_at = time.time() + 2.0  # lets every client connect and start its sessions first
+        clients = [context.Process(target=client, args=(pool.addresses, pool.authkey, sessions_per_client,
+                                                        duration, start_at, results))
+                   for _ in range(n_shards)]
+        for process in clients:
+            process.start()
+        total = sum(results.get() for _ in clients)
+        for process in clients:
+            process.join()
+    return total / duration
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    default_shards = [1]
+    while default_shards[-1] * 2 <= cores:
+        default_shards.append(default_shards[-1] * 2)
+
+    parser = argparse.ArgumentParser(description="Sharded runtime load benchmark")
+    parser.add_argument("--shards", type=int, nargs="+", default=default_shards, help="Shard counts to measure")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions per client process")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of load per shard count")
+    args = parser.parse_args(argv)
+
+    print(f"{cores} CPU cores")
+    print(f"{'shards':>6} {'requests/s':>12} {'speedup':>8} {'efficiency':>10}")
+    base = None
+    for n_shards in args.shards:
+        throughput = measure(n_shards, args.sessions, args.duration)
+        base = base or throughput / n_shards
+        speedup = throughput / base
+        print(f"{n_shards:>6} {throughput:>12.0f} {speedup:>7.2f}x {speedup / n_shards:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares ways of copying a game for search-based bots:
+copy.deepcopy, snapshot() + from_snapshot(), and clone().
+
+Run with:
+    python -m benchmarks.bench_snapshot
+"""
+import copy
+import timeit
+
+from game_api.engine import Game
+
+
+def serpentine(length, board_size):
+    """
+    Returns a snake of the given length winding row by row across the board.
+    """
+    width, height = board_size
+    cells = []
+    for y in range(height):
+        row = range(width) if y % 2 == 0 else range(width - 1, -1, -1)
+        cells.extend((x, y) for x in row)
+    return list(reversed(cells[:length]))
+
+
+def make_game(length, board_size=(25, 25)):
+    game = Game(board_size=board_size, seed=1)
+    game.snake = serpentine(length, board_size)
+    game.spawn_food()
+    return game
+
+
+def time_per_call(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'length':>8} {'deepcopy us':>12} {'snapshot us':>12} {'restore us':>12} {'clone us':>10} {'bytes':>7}")
+    for length in [1, 10, 100, 300, 600]:
+        game = make_game(length)
+        data = game.snapshot()
+        deep = time_per_call(lambda: copy.deepcopy(game), 200)
+        snap = time_per_call(game.snapshot, 2000)
+        restore = time_per_call(lambda: Game.from_snapshot(data), 2000)
+        clone = time_per_call(game.clone, 20000)
+        print(f"{length:>8} {deep:>12.1f} {snap:>12.1f} {restore:>12.1f} {clone:>10.2f} {len(data):>7}")
+
+
+if __name__ == "__main__":
+    main()
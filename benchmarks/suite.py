@@ -0,0 +1,383 @@
+"""
+Benchmark suite for the engine and the API, with regression tracking.
+
+Every benchmark reports microseconds per operation. Results are written to a
+JSON file and compared with a stored baseline; any case slower than the
+baseline by more than the tolerance (and by more than the noise floor) is
+run again, and if it is slower every time it is reported and the run exits with 1.
+
+Run with:
+    python -m benchmarks.suite                      # run and compare with the baseline
+    python -m benchmarks.suite --only engine        # run only benchmarks whose name starts with "engine"
+    python -m benchmarks.suite --update-baseline    # store this run as the new baseline
+
+The baseline is machine specific; refresh it on the machine you compare on.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from unittest import mock
+
+from game_api.engine import Arena, Game
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_TOLERANCE = 0.30
+# Slowdowns smaller than this many microseconds are timer and scheduler noise, whatever their ratio
+DEFAULT_NOISE_FLOOR = 0.5
+# Times the benchmarks of suspected regressions are run again; a case keeps its best time
+DEFAULT_CONFIRM_RUNS = 3
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The function returns {case: microseconds per operation}.
+    """
+    def register(function):
+        BENCHMARKS.append((name, function))
+        return function
+    return register
+
+
+def time_per_call(function, number=None, repeat=7, min_run=0.02):
+    """
+    Best time of one call in microseconds, over a few repeats.
+    Unless number is given, calls are batched until one run takes at least min_run seconds.
+    """
+    timer = timeit.Timer(function)
+    if number is None:
+        number = 1
+        while timer.timeit(number) < min_run:
+            number *= 2
+    return min(timer.repeat(number=number, repeat=repeat)) / number * 1e6
+
+
+def board_cycle(width, height):
+    """
+    Returns a closed path through every cell of the board (height must be even):
+    row 0 left to right, the other rows back and forth from x=1, then down column 0.
+    """
+    cycle = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 == 1 else range(1, width)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(height - 1, 0, -1))
+    return cycle
+
+
+def looping_game(board_size, length):
+    """
+    Builds a game whose snake of the given length can follow the board cycle forever,
+    and the direction to take from every cell to stay on it.
+    """
+    width, height = board_size
+    cycle = board_cycle(width, height)
+    plan = {}
+    for i, (x, y) in enumerate(cycle):
+        nx, ny = cycle[(i + 1) % len(cycle)]
+        plan[(x, y)] = {(1, 0): "right", (-1, 0): "left", (0, 1): "up", (0, -1): "down"}[(nx - x, ny - y)]
+    game = Game(board_size=board_size, seed=1)
+    game.snake = list(reversed(cycle[:length]))
+    game.direction = plan[cycle[length - 1]]
+    return game, plan
+
+
+# Engine benchmarks
+@benchmark("engine.update")
+def bench_update():
+    results = {}
+    for size in [10, 24, 50]:
+        for length in [1, 10, 100, 1000]:
+            if length >= size * size:
+                continue
+            game, plan = looping_game((size, size), length)
+            game.food = None
+            game.update()
+
+            def tick():
+                game.change_direction(plan[game.snake[0]])
+                game.update()
+            results[f"{size}x{size}/len{length}"] = time_per_call(tick)
+            assert not game.game_over
+    return results
+
+
+@benchmark("engine.spawn_food")
+def bench_spawn_food():
+    results = {}
+    cells = 24 * 24
+    for fill in [0.0, 0.5, 0.9, 0.99]:
+        game, _ = looping_game((24, 24), max(1, int(cells * fill)))
+        results[f"24x24/fill{int(fill * 100)}"] = time_per_call(game.spawn_food)
+    return results
+
+
+@benchmark("engine.arena")
+def bench_arena():
+    # Every snake circles its own 2x2 block forever, so no one dies while timing
+    turn = {(0, 0): "right", (1, 0): "up", (1, 1): "left", (0, 1): "down"}
+    results = {}
+    for n_snakes in [100, 1000]:
+        blocks = int(n_snakes ** 0.5) + 1
+        arena = Arena(board_size=(blocks * 2, blocks * 2), food_count=0, seed=1)
+        for i in range(n_snakes):
+            arena.add_snake((i % blocks * 2, i // blocks * 2))
+
+        def tick():
+            for snake in arena.snakes:
+                x, y = arena.to_position(snake.cells[0])
+                arena.change_direction(snake.id, turn[(x % 2, y % 2)])
+            arena.update()
+        results[f"snakes{n_snakes}"] = time_per_call(tick)
+        assert not arena.game_over and all(snake.alive for snake in arena.snakes)
+    return results
+
+
+# API benchmarks
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snake_project.settings")
+    import django
+    from django.test.utils import setup_test_environment
+    django.setup()
+    with contextlib.suppress(RuntimeError):
+        setup_test_environment()
+
+
+@contextlib.contextmanager
+def quiet():
+    # The views and the game manager print a lot of debug lines
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def mock_mongo():
+    import mongomock
+    from game_api.database import db
+    with mock.patch("game_api.database.MongoClient", mongomock.MongoClient):
+        db.is_connected = False
+        try:
+            yield db
+        finally:
+            db.disconnect()
+
+
+@benchmark("api.serializer")
+def bench_serializer():
+    setup_django()
+    from game_api.game_manager import GameState
+    from game_api.serializers import GameStateSerializer
+    results = {}
+    for length in [1, 100, 500]:
+        game, _ = looping_game((24, 24), length)
+        state = GameState.of(game).as_dict()
+        results[f"24x24/len{length}"] = time_per_call(lambda: GameStateSerializer(state).data)
+    return results
+
+
+@benchmark("api.state_encoding")
+def bench_state_encoding():
+    # The whole body of a state response: serializer + JsonResponse encoding, against the fast
+    # JSON encoder, a cache hit, the binary format and the changes over one tick.
+    # Body sizes are printed, not tracked.
+    setup_django()
+    from django.core.serializers.json import DjangoJSONEncoder
+    from game_api.encoding import EncodedStates, encode_changes, encode_state, encode_state_binary
+    from game_api.game_manager import GameState, SessionRegistry, session_changes
+    from game_api.serializers import GameStateSerializer
+    results = {}
+    for length in [1, 100, 500]:
+        game, _ = looping_game((24, 24), length)
+        state = GameState.of(game).as_dict()
+        cache = EncodedStates()
+        results[f"drf/len{length}"] = time_per_call(
+            lambda: json.dumps(GameStateSerializer(state).data, cls=DjangoJSONEncoder).encode())
+        results[f"fast/len{length}"] = time_per_call(lambda: encode_state(state))
+        results[f"cached/len{length}"] = time_per_call(lambda: cache.body("bench", state))
+        results[f"binary/len{length}"] = time_per_call(lambda: encode_state_binary(state))
+        # The changes over the last tick, as a long-poll with ?since= gets them
+        session = SessionRegistry().create("bench", 24)
+        session.game, session.state = game, GameState.of(game)
+        session_changes(session, game.tick)
+        session.publish(game.update())
+        changes = session_changes(session, game.tick - 1)
+        results[f"changes/len{length}"] = time_per_call(lambda: encode_changes(session_changes(session, game.tick - 1)))
+        json_size, binary_size = len(encode_state(state)), len(encode_state_binary(state))
+        print(f"{'api.state_encoding/size/len' + str(length):<45} json {json_size:>6} B, "
+              f"binary {binary_size:>6} B ({binary_size / json_size:.0%}), changes {len(encode_changes(changes)):>4} B")
+    return results
+
+
+@benchmark("api.http")
+def bench_http():
+    setup_django()
+    from django.test import Client
+    from game_api import game_manager
+    client = Client()
+    results = {}
+    with quiet(), mock_mongo():
+        response = client.post("/api/game/start", {"username": "bench", "map_size": 25}, content_type="application/json")
+        assert response.status_code == 200, response.content
+        session_id = response.json()["session_id"]
+        results["state"] = time_per_call(lambda: client.get("/api/game/state", {"session_id": session_id}))
+        directions = iter(["up", "left", "down", "right"] * 10000)
+        results["move"] = time_per_call(
+            lambda: client.post("/api/game/move", {"session_id": session_id, "direction": next(directions)},
+                                content_type="application/json"))
+        game_manager.end_session(session_id)
+    return results
+
+
+@benchmark("db.add_game_result")
+def bench_add_game_result():
+    results = {}
+    with quiet(), mock_mongo() as db:
+        assert db.connect()
+        counter = iter(range(10 ** 9))
+        results["mongomock"] = time_per_call(
+            lambda: db.add_game_result(f"player{next(counter) % 50}", 10, 5, 12.5))
+    return results
+
+
+@benchmark("sessions.checkpoint")
+def bench_checkpoint():
+    from game_api import game_manager
+    from game_api.checkpoint import CheckpointStore, Checkpointer
+    # Games record their inputs, so each is saved as its replay and restored by playing it back:
+    # restore10k, the whole restore of 10k short games, should stay around a second
+    count = 10000
+    results = {}
+    with quiet(), tempfile.TemporaryDirectory() as directory:
+        store = CheckpointStore(os.path.join(directory, "sessions.sqlite3"))
+        registry = game_manager.SessionRegistry(record_inputs=True)
+        for i in range(count):
+            game = registry.create(f"player{i}", 25).game
+            for tick in range(10):
+                if tick == 5:
+                    game.change_direction("up")
+                game.update()
+        checkpointer = Checkpointer(store, registry)
+        start = time.perf_counter()
+        checkpointer.checkpoint()
+        results["save"] = (time.perf_counter() - start) / count * 1e6
+        # Restored sessions start lazily, so this is the cost of rebuilding them alone
+        with mock.patch.object(game_manager, "sessions", game_manager.SessionRegistry()), \
+                mock.patch.object(game_manager, "lazy_ticking", True):
+            start = time.perf_counter()
+            assert game_manager.restore_sessions(store) == count
+            elapsed = time.perf_counter() - start
+            results["restore"] = elapsed / count * 1e6
+            results["restore10k"] = elapsed * 1e6
+        store.close()
+    return results
+
+
+# Running and comparing
+def run(only=None, names=None):
+    """
+    Runs the benchmarks whose name starts with `only`, or those named in `names`, or all of them.
+    """
+    results = {}
+    for name, function in BENCHMARKS:
+        if only and not name.startswith(only) or names is not None and name not in names:
+            continue
+        for case, value in function().items():
+            results[f"{name}/{case}"] = round(value, 3)
+            print(f"{name + '/' + case:<45} {value:>12.2f} us")
+    return results
+
+
+def compare(results, baseline, tolerance, noise_floor=DEFAULT_NOISE_FLOOR):
+    """
+    Returns the list of regressions: (case, baseline us, current us) for every
+    case that got slower than the baseline by more than the tolerance and by
+    more than noise_floor microseconds.
+    """
+    regressions = []
+    for case, value in results.items():
+        reference = baseline.get(case)
+        if reference is not None and value > reference * (1 + tolerance) and value - reference > noise_floor:
+            regressions.append((case, reference, value))
+    return regressions
+
+
+def confirm(results, baseline, tolerance, noise_floor=DEFAULT_NOISE_FLOOR, runs=DEFAULT_CONFIRM_RUNS):
+    """
+    Runs the benchmarks of the suspected regressions again, up to `runs` times, keeping
+    the best time of every case, and returns the regressions that are left: the cases
+    that were slower in every run. Noise rarely hits the same case each time.
+    """
+    regressions = compare(results, baseline, tolerance, noise_floor)
+    for _ in range(runs):
+        if not regressions:
+            break
+        names = sorted({case.split("/", 1)[0] for case, _, _ in regressions})
+        print(f"\nRunning {', '.join(names)} again to rule out noise:")
+        for case, value in run(names=names).items():
+            results[case] = min(results[case], value)
+        regressions = compare(results, baseline, tolerance, noise_floor)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebSnake benchmark suite")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a case counts as a regression (0.3 = 30%%)")
+    parser.add_argument("--noise-floor", type=float, default=DEFAULT_NOISE_FLOOR,
+                        help="Slowdowns under this many microseconds never count as regressions")
+    parser.add_argument("--confirm-runs", type=int, default=DEFAULT_CONFIRM_RUNS,
+                        help="Times suspected regressions are run again before failing")
+    parser.add_argument("--only", help="Run only benchmarks whose name starts with this prefix")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    regressions = []
+    if baseline is not None and not args.update_baseline:
+        regressions = confirm(results, baseline, args.tolerance, args.noise_floor, args.confirm_runs)
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        baseline = {**(baseline or {}), **results}
+        with open(args.baseline, "w") as f:
+            json.dump({**report, "results": baseline}, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("No baseline found, nothing to compare with (use --update-baseline).")
+        return 0
+
+    missing = sorted(set(results) - set(baseline))
+    if missing:
+        print(f"Not in baseline yet: {', '.join(missing)}")
+    if regressions:
+        print(f"\nREGRESSIONS (more than {args.tolerance:.0%} and {args.noise_floor} us slower than baseline):")
+        for case, reference, value in regressions:
+            print(f"  {case}: {reference:.2f} us -> {value:.2f} us ({value / reference - 1:+.0%})")
+        return 1
+    print(f"No regressions (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,17 +14,25 @@ const setupErrorElement = document.getElementById('setup-error');
 
 // --- Configuration ---
 const API_BASE_URL = 'http://127.0.0.1:8000/api';
-const POLLING_RATE_HZ = 5;
-const POLLING_INTERVAL_MS = 1000 / POLLING_RATE_HZ; // How often to fetch game state
+const LONG_POLL_WAIT_MS = 5000; // How long the server may hold a state request until the next tick
+// Under ASGI the state is pushed over a WebSocket instead; polling is the fallback
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
+const WS_CLOSE_GAME_OVER = 1000;
 
 // --- Game State ---
 let cellSize = 20; // Default, will be updated based on map size
 let boardSize = [10, 10]; // Default, will be updated from backend
-let pollingIntervalId = null;   // To manage the polling timer
+let pollingActive = false;      // Whether the long-poll loop is running
+let pollGeneration = 0;         // Bumped on every start/stop, so a stale poll drops its answer
+let lastState = null;           // Last state shown by polling, the base of ?since= changes
+let gameSocket = null;          // Open game WebSocket, if any
 let currentUsername = '';       // Store username for restart
 let currentMapSize = 10;      // Store map size for restart
+let sessionId = null;           // Game session issued by the backend on start
 let gameActive = false;         // Track if game loop should be running
 let isKeyListenerActive = false; // Track if the key listener is attached
+let minMapSize = 5;             // Map size limits, updated from backend
+let maxMapSize = 25;
 
 // --- API Functions ---
 async function postData(url = '', data = {}) {
@@ -77,6 +85,67 @@ async function getData(url = '') {
     }
 }
 
+// Binary game state (Accept: application/octet-stream), see game_api/encoding.py:
+// a 30-byte little-endian header (version u8, flags u8, width u16, height u16, food x u16,
+// food y u16, tick u32, score u32, speed f64, snake length u32), then the snake's cells
+// (y * width + x, head first) as u16 on boards of up to 65535 cells, u32 above.
+// Changes since a tick set FLAG_CHANGES: the length counts the new head cells, and
+// since (u32) and the removed tail cell count (u32) come before the cells
+const BINARY_STATE_VERSION = 1;
+const BINARY_HEADER_SIZE = 30;
+const FLAG_GAME_OVER = 1;
+const FLAG_FOOD = 2;
+const FLAG_CHANGES = 4;
+
+function decodeState(buffer) {
+    const view = new DataView(buffer);
+    if (view.getUint8(0) !== BINARY_STATE_VERSION) {
+        throw new Error(`Unknown binary state version ${view.getUint8(0)}`);
+    }
+    const flags = view.getUint8(1);
+    const width = view.getUint16(2, true);
+    const height = view.getUint16(4, true);
+    const length = view.getUint32(26, true);
+    const isChanges = (flags & FLAG_CHANGES) !== 0;
+    const wide = width * height > 0xFFFF;
+    const cells = new Array(length);
+    let offset = BINARY_HEADER_SIZE + (isChanges ? 8 : 0);
+    for (let i = 0; i < length; i++) {
+        const cell = wide ? view.getUint32(offset, true) : view.getUint16(offset, true);
+        offset += wide ? 4 : 2;
+        cells[i] = [cell % width, Math.floor(cell / width)];
+    }
+    const cellsField = isChanges
+        ? { since: view.getUint32(BINARY_HEADER_SIZE, true), head: cells,
+            removed: view.getUint32(BINARY_HEADER_SIZE + 4, true) }
+        : { snake: cells };
+    return {
+        ...cellsField,
+        food: (flags & FLAG_FOOD) ? [view.getUint16(6, true), view.getUint16(8, true)] : null,
+        tick: view.getUint32(10, true),
+        score: view.getUint32(14, true),
+        speed: view.getFloat64(18, true),
+        game_over: (flags & FLAG_GAME_OVER) !== 0,
+        board_size: [width, height],
+    };
+}
+
+// Fetches a game state in the binary format; errors still come back as JSON
+async function getState(url = '') {
+    const response = await fetch(url, { headers: { 'Accept': 'application/octet-stream' } });
+    if (!response.ok) {
+        let detail = `HTTP error ${response.status}`;
+        try {
+            const errorData = await response.json();
+            detail = errorData.detail || errorData.error || detail;
+        } catch (e) {
+            console.error(`HTTP error ${response.status}: Non-JSON response or missing detail.`);
+        }
+        throw new Error(detail);
+    }
+    return decodeState(await response.arrayBuffer());
+}
+
 
 // --- Game Logic ---
 function drawBoard(state) {
@@ -86,7 +155,7 @@ function drawBoard(state) {
 
     const maxCanvasWidth = 500;
     const maxCanvasHeight = 500;
-    cellSize = Math.min(Math.floor(maxCanvasWidth / gridWidth), Math.floor(maxCanvasHeight / gridHeight));
+    cellSize = Math.max(1, Math.min(Math.floor(maxCanvasWidth / gridWidth), Math.floor(maxCanvasHeight / gridHeight)));
 
     canvas.width = gridWidth * cellSize;
     canvas.height = gridHeight * cellSize;
@@ -95,11 +164,13 @@ function drawBoard(state) {
     ctx.fillStyle = '#000';
     ctx.fillRect(0, 0, canvas.width, canvas.height);
 
-    // Draw grid
-    ctx.strokeStyle = '#333';
-    for (let x = 0; x < gridWidth; x++) {
-        for (let y = 0; y < gridHeight; y++) {
-            ctx.strokeRect(x * cellSize, y * cellSize, cellSize, cellSize);
+    // Draw grid (skipped on huge maps, where cells are only a few pixels wide)
+    if (cellSize >= 4) {
+        ctx.strokeStyle = '#333';
+        for (let x = 0; x < gridWidth; x++) {
+            for (let y = 0; y < gridHeight; y++) {
+                ctx.strokeRect(x * cellSize, y * cellSize, cellSize, cellSize);
+            }
         }
     }
 
@@ -126,83 +197,127 @@ function drawBoard(state) {
 }
 
 
-// Function to fetch and update game state
-async function pollGameState() {
-    if (!gameActive) {
-        if (pollingIntervalId) {
-            clearInterval(pollingIntervalId);
-            pollingIntervalId = null;
-            console.log("Polling interval stopped because game became inactive.");
-        }
-        return;
-    }
-
-    try {
-        const currentState = await getData(`${API_BASE_URL}/game/state`);
+// Applies the changes since a tick to the last state shown: the new heads go in front,
+// newest first, then the cells that left the tail are dropped
+function applyChanges(state, changes) {
+    const snake = changes.head.slice().reverse().concat(state.snake);
+    snake.length = Math.max(snake.length - changes.removed, 0);
+    return { ...changes, snake };
+}
 
-        if (!gameActive) return;
+// Long-poll: each request waits on the server for the tick after the last one shown and
+// answers with only what changed since (or the full state to resync), so every answer is
+// fresh and small, and the next request goes out right away
+async function pollGameState(generation) {
+    while (gameActive && generation === pollGeneration) {
+        try {
+            const since = lastState ? `&since=${lastState.tick}&wait=${LONG_POLL_WAIT_MS}` : '';
+            const answer = await getState(`${API_BASE_URL}/game/state?session_id=${encodeURIComponent(sessionId)}${since}`);
 
-        drawBoard(currentState);
-        scoreElement.textContent = currentState.score;
+            if (!gameActive || generation !== pollGeneration) return;
 
-        if (currentState.game_over) {
-            console.log("Game Over! Score:", currentState.score);
+            const currentState = answer.snake ? answer : applyChanges(lastState, answer);
+            lastState = currentState;
+            showState(currentState);
+        } catch (error) {
+            if (generation !== pollGeneration) return;
+            console.error('Error polling game state:', error);
             gameActive = false;
-            if (pollingIntervalId) {
-                 clearInterval(pollingIntervalId);
-                 pollingIntervalId = null;
-                 console.log("Polling interval stopped due to game over.");
-            }
-
-            finalScoreDisplay.textContent = currentState.score;
-            gameOverMessage.querySelector('p:last-child').textContent = 'Press R to Restart'; // Ensure message includes 'R' instruction
+            stopPollingTimer();
+            // Display error message
+            setupErrorElement.textContent = `Error updating game: ${error.message}. Try restarting (R).`;
+            gameOverMessage.querySelector('h2').textContent = 'Connection Error!';
+            finalScoreDisplay.textContent = scoreElement.textContent; // Show last known score
+            gameOverMessage.querySelector('p:last-child').textContent = `Error: ${error.message}. Press R to try restarting.`;
             gameOverMessage.style.display = 'block';
-
-        } else {
         }
-    } catch (error) {
-        console.error('Error polling game state:', error);
+    }
+}
+
+// Draws a state from a poll or the socket, and shows the game over message when it ends
+function showState(state) {
+    drawBoard(state);
+    scoreElement.textContent = state.score;
+
+    if (state.game_over) {
+        console.log("Game Over! Score:", state.score);
         gameActive = false;
-        if (pollingIntervalId) {
-             clearInterval(pollingIntervalId);
-             pollingIntervalId = null;
-             console.log("Polling interval stopped due to error.");
-        }
-        // Display error message
-        setupErrorElement.textContent = `Error updating game: ${error.message}. Try restarting (R).`;
-        gameOverMessage.querySelector('h2').textContent = 'Connection Error!';
-        finalScoreDisplay.textContent = scoreElement.textContent; // Show last known score
-        gameOverMessage.querySelector('p:last-child').textContent = `Error: ${error.message}. Press R to try restarting.`;
+        stopPollingTimer();
+
+        finalScoreDisplay.textContent = state.score;
+        gameOverMessage.querySelector('p:last-child').textContent = 'Press R to Restart'; // Ensure message includes 'R' instruction
         gameOverMessage.style.display = 'block';
     }
 }
 
-// Function to start polling
-function startPolling() {
-    if (pollingIntervalId) {
-        clearInterval(pollingIntervalId);
-        pollingIntervalId = null;
+// Function to start receiving the game: over the WebSocket, falling back to polling
+function startUpdates() {
+    if (!('WebSocket' in window)) {
+        startPolling();
+        return;
     }
-    console.log("Starting game state polling...");
-    gameActive = true; // Mark game as active
-    gameOverMessage.style.display = 'none'; // Hide game over message
-    setupErrorElement.textContent = ''; // Clear any previous errors
+    closeSocket();
+    const socket = new WebSocket(`${WS_BASE_URL}/game/ws?session_id=${encodeURIComponent(sessionId)}`);
+    gameSocket = socket;
+    gameActive = true;
+    gameOverMessage.style.display = 'none';
+    setupErrorElement.textContent = '';
+    attachKeyListener();
+
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.error) {
+            console.error('Game socket error:', message);
+            return;
+        }
+        if (gameActive) showState(message);
+    };
+    socket.onclose = (event) => {
+        if (gameSocket !== socket) return; // Replaced by a newer game
+        gameSocket = null;
+        // Anything but a finished game (socket refused, server gone, network drop) falls back to polling
+        if (gameActive && event.code !== WS_CLOSE_GAME_OVER) {
+            console.log(`Game socket closed (${event.code}), falling back to polling.`);
+            startPolling();
+        }
+    };
+}
 
+function closeSocket() {
+    if (gameSocket) {
+        const socket = gameSocket;
+        gameSocket = null; // Its close event is ignored
+        socket.close();
+    }
+}
+
+function attachKeyListener() {
     if (!isKeyListenerActive) {
         document.addEventListener('keydown', handleKeydown);
         isKeyListenerActive = true;
         console.log("Keydown listener attached.");
     }
+}
 
-    pollGameState(); // Run immediately once
-    pollingIntervalId = setInterval(pollGameState, POLLING_INTERVAL_MS); // Poll repeatedly
+// Function to start polling
+function startPolling() {
+    stopPollingTimer();
+    console.log("Starting game state polling...");
+    gameActive = true; // Mark game as active
+    gameOverMessage.style.display = 'none'; // Hide game over message
+    setupErrorElement.textContent = ''; // Clear any previous errors
+    attachKeyListener();
+
+    pollingActive = true;
+    lastState = null; // The first poll gets the full state at once
+    pollGameState(pollGeneration);
 }
 
 function stopPollingTimer() {
-    if (pollingIntervalId) {
-        clearInterval(pollingIntervalId);
-        pollingIntervalId = null;
-        console.log("Polling interval stopped.");
+    pollGeneration++;
+    if (pollingActive) {
+        pollingActive = false;
+        console.log("Polling stopped.");
     }
 }
 
@@ -221,6 +336,7 @@ async function handleKeydown(event) {
 
         console.log('R key pressed. Attempting to restart game...');
         stopPollingTimer();
+        closeSocket();
         gameActive = false; // Ensure game is marked inactive before restart attempt
 
         try {
@@ -229,6 +345,7 @@ async function handleKeydown(event) {
                 map_size: currentMapSize,
             });
             console.log('Game restarted successfully. Initial state:', initialState);
+            sessionId = initialState.session_id;
 
             // Reset UI for new game
             setupScreen.style.display = 'none';
@@ -237,8 +354,8 @@ async function handleKeydown(event) {
             scoreElement.textContent = initialState.score;
             drawBoard(initialState);
 
-            // Start polling for the new game session
-            startPolling(); // This will set gameActive = true and start the timer
+            // Start receiving the new game session
+            startUpdates(); // This will set gameActive = true
 
         } catch (error) {
             console.error('Failed to restart game:', error);
@@ -264,9 +381,13 @@ async function handleKeydown(event) {
 
     if (direction) {
         event.preventDefault(); // Prevent arrow keys from scrolling
+        if (gameSocket && gameSocket.readyState === WebSocket.OPEN) {
+            gameSocket.send(JSON.stringify({ direction }));
+            return;
+        }
         try {
             // Send move command (fire and forget)
-            postData(`${API_BASE_URL}/game/move`, { direction });
+            postData(`${API_BASE_URL}/game/move`, { session_id: sessionId, direction });
         } catch (error) {
             // Log error, but polling should eventually correct state
             console.error('Failed to send move:', error);
@@ -286,12 +407,13 @@ startButton.addEventListener('click', async () => {
     if (!username) {
         setupErrorElement.textContent = 'Please enter a username.'; return;
     }
-    if (isNaN(mapSize) || mapSize < 5 || mapSize > 25) {
-        setupErrorElement.textContent = 'Map size must be between 5 and 25.'; return;
+    if (isNaN(mapSize) || mapSize < minMapSize || mapSize > maxMapSize) {
+        setupErrorElement.textContent = `Map size must be between ${minMapSize} and ${maxMapSize}.`; return;
     }
 
     console.log(`Attempting to start game for ${username} with size ${mapSize}`);
     stopPollingTimer();
+    closeSocket();
     gameActive = false;
 
     try {
@@ -303,6 +425,7 @@ startButton.addEventListener('click', async () => {
 
         currentUsername = username;
         currentMapSize = mapSize;
+        sessionId = initialState.session_id;
 
         playerNameDisplay.textContent = currentUsername;
         setupScreen.style.display = 'none';
@@ -311,7 +434,7 @@ startButton.addEventListener('click', async () => {
         scoreElement.textContent = initialState.score;
 
         drawBoard(initialState);
-        startPolling();
+        startUpdates();
 
     } catch (error) {
         console.error("Failed to start game:", error);
@@ -321,6 +444,19 @@ startButton.addEventListener('click', async () => {
 });
 
 // --- Initial Setup ---
+async function loadLimits() {
+    try {
+        const limits = await getData(`${API_BASE_URL}/game/limits`);
+        minMapSize = limits.min_map_size;
+        maxMapSize = limits.max_map_size;
+        mapSizeInput.min = minMapSize;
+        mapSizeInput.max = maxMapSize;
+        document.querySelector('label[for="map-size"]').textContent = `Map Size (${minMapSize}-${maxMapSize}):`;
+    } catch (error) {
+        console.error('Could not load map size limits, using defaults:', error);
+    }
+}
+
 function initializeUI() {
     setupScreen.style.display = 'block';
     gameScreen.style.display = 'none';
@@ -335,4 +471,5 @@ function initializeUI() {
 }
 
 // Run initial setup when the script loads
-initializeUI();
\ No newline at end of file
+initializeUI();
+loadLimits();
\ No newline at end of file
@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class GameApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'game_api'
+
+
+def start_checkpoints():
+    """
+    Restores the checkpointed sessions and starts checkpointing the live ones, when
+    SNAKE_CHECKPOINT_PATH is set and the threaded runtime serves the games.
+    Called by the WSGI and ASGI entry points (snake_project/wsgi.py, asgi.py), so only a
+    process that serves requests owns the file: not migrate, shell, check or the tests,
+    and not runserver's autoreloader, which never loads the WSGI app itself.
+    The async and sharded runtimes keep no checkpoints.
+    """
+    if not settings.SNAKE_CHECKPOINT_PATH:
+        return
+    if settings.SNAKE_RUNTIME != 'threads':
+        print(f"WARN: SNAKE_CHECKPOINT_PATH is ignored by the {settings.SNAKE_RUNTIME} runtime; "
+              f"sessions will not survive a restart.")
+        return
+    from . import game_manager
+    game_manager.start_checkpoints(settings.SNAKE_CHECKPOINT_PATH, settings.SNAKE_CHECKPOINT_INTERVAL)
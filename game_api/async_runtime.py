@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import time
+import traceback
+
+from . import game_manager
+from .game_manager import (MAX_SESSIONS, SESSION_IDLE_TTL, SESSION_MEMORY_BUDGET, GameRecord, SessionRegistry,
+                           session_changes, session_state, tick_interval)
+from .scheduler import LATE_TICK_THRESHOLD
+
+
+class AsyncGameRuntime:
+    """
+    Game runtime for ASGI servers: every session is advanced by one asyncio task
+    on the server's event loop, so there is no thread per game and no lock. State
+    and moves run on the same loop between ticks. Player registration goes to the
+    default thread pool and results to the game manager's background writer.
+    Ticks follow absolute monotonic deadlines and late ticks are counted, like
+    the threaded TickScheduler.
+    """
+
+    def __init__(self, late_threshold=LATE_TICK_THRESHOLD):
+        """
+        Args:
+            late_threshold (float): how late (seconds) a tick may run before it counts as late.
+        """
+        self.sessions = SessionRegistry(SESSION_IDLE_TTL, MAX_SESSIONS, SESSION_MEMORY_BUDGET, on_evict=self._evicted)
+        self.late_threshold = late_threshold
+        self._heap = []
+        self._counter = itertools.count()
+        self._sleeper = None
+        self._task = None
+        self._waiters = {}
+        self.ticks = 0
+        self.late_ticks = 0
+        self.max_lateness = 0.0
+
+    async def start_game(self, username, map_size):
+        """
+        Registers the player and starts a new session on the running loop.
+        Returns the session id, or None if the game could not be started.
+        """
+        if not await asyncio.to_thread(game_manager.register_player, username, map_size):
+            return None
+        session = self.sessions.create(username, map_size)
+        self._ensure_running()
+        self._push(time.monotonic() + tick_interval(session.game), session)
+        return session.session_id
+
+    def get_state(self, session_id):
+        """
+        Returns the state published by a session's last tick, or None for an unknown session.
+        """
+        session = self.sessions.use(session_id)
+        return session_state(session) if session else None
+
+    def move(self, session_id, direction):
+        """
+        Changes the direction of a session's snake and returns the state, or None for an unknown session.
+        """
+        session = self.sessions.use(session_id)
+        if not session:
+            return None
+        if not session.game.game_over:
+            session.game.change_direction(direction)
+        return session_state(session)
+
+    async def next_state(self, session_id, since, timeout=None):
+        """
+        Waits until a session publishes a state newer than tick `since` and returns it.
+        The state is returned at once if it is already newer or the game is over, and
+        unchanged after `timeout` seconds. Returns None for an unknown or ended session.
+        All waiters of a session share one future, woken by its next tick.
+        """
+        session = self.sessions.use(session_id)
+        if session is None:
+            return None
+        if session.state.tick <= since and not session.state.game_over:
+            waiter = self._waiters.get(session_id)
+            if waiter is None:
+                waiter = self._waiters[session_id] = asyncio.get_running_loop().create_future()
+            try:
+                # shield: a waiter timing out must not cancel the future the others wait on
+                await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                pass
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+        return session_state(session)
+
+    async def changes(self, session_id, since, timeout=None):
+        """
+        The changes in a session's state after tick `since` (see game_manager.session_changes()),
+        waiting up to `timeout` seconds for a newer tick first when given.
+        Returns None for an unknown or ended session.
+        """
+        if timeout:
+            state = await self.next_state(session_id, since, timeout)
+        else:
+            state = self.get_state(session_id)
+        session = self.sessions.get(session_id)
+        if state is None or session is None:
+            return None
+        return session_changes(session, since)
+
+    def end_session(self, session_id):
+        """
+        Forgets a session; its pending tick is dropped when it comes up.
+        """
+        self._notify(session_id)
+        return self.sessions.remove(session_id) is not None
+
+    def stats(self):
+        """
+        Returns the same counters as game_manager.get_scheduler_stats().
+        """
+        return {
+            "sessions": len(self.sessions),
+            **self.sessions.stats(),
+            "tasks": len(self._heap),
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "max_lateness_ms": round(self.max_lateness * 1000, 3),
+            **game_manager.result_writer.stats(),
+        }
+
+    async def stop(self):
+        """
+        Cancels the tick loop. Queued results are written by the game manager's writer.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _ensure_running(self):
+        # The loop task lives on whichever event loop serves the first start request
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _evicted(self, session):
+        # Like game_manager.session_evicted(): a running game's result is saved, its waiters see it gone
+        if not isinstance(session.game, GameRecord):
+            game_manager.save_result(session)
+        self._notify(session.session_id)
+
+    def _notify(self, session_id):
+        waiter = self._waiters.pop(session_id, None)
+        if waiter is not None:
+            _wake(waiter)
+
+    def _push(self, deadline, session):
+        heapq.heappush(self._heap, (deadline, next(self._counter), session))
+        # A new earliest deadline wakes the loop so it can sleep for the right time
+        if self._heap[0][2] is session and self._sleeper is not None:
+            _wake(self._sleeper)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        heap = self._heap
+        while True:
+            wait = heap[0][0] - time.monotonic() if heap else None
+            if wait is None or wait > 0:
+                # A plain future woken by a timer or _push (asyncio.wait_for can swallow cancellation)
+                self._sleeper = loop.create_future()
+                timer = loop.call_later(wait, _wake, self._sleeper) if wait is not None else None
+                try:
+                    await self._sleeper
+                finally:
+                    self._sleeper = None
+                    if timer:
+                        timer.cancel()
+                continue
+
+            # Everything due now runs back to back, with no await in between;
+            # a late session pushed back at `now` waits for the next pass
+            now = time.monotonic()
+            due = []
+            while heap and heap[0][0] <= now:
+                due.append(heapq.heappop(heap))
+            for deadline, _, session in due:
+                self._tick(session, deadline, now)
+
+    def _tick(self, session, deadline, now):
+        game = session.game
+        if self.sessions.get(session.session_id) is not session or game.game_over:
+            self._notify(session.session_id)  # ended or evicted: let its waiters see it is gone
+            return
+        lateness = now - deadline
+        self.ticks += 1
+        if lateness > self.late_threshold:
+            self.late_ticks += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+
+        try:
+            session.publish(game.update())
+        except Exception as e:
+            print(f"ERROR during game.update(): {e}")
+            traceback.print_exc()
+            game.game_over = True
+            session.publish()
+        self._notify(session.session_id)
+
+        if game.game_over:
+            if self.sessions.finish(session):
+                game_manager.save_result(session)
+        else:
+            self._push(max(deadline + tick_interval(game), now), session)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+runtime = AsyncGameRuntime()
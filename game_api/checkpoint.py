@@ -0,0 +1,183 @@
+import sqlite3
+import threading
+import time
+import traceback
+
+from .engine import Game, Replay, ReplayPlayer
+
+# Seconds between two checkpoints of the live sessions
+CHECKPOINT_INTERVAL = 5.0
+
+
+def encode_game(game):
+    """
+    The checkpoint form of a game: its replay (seed and inputs, a few dozen bytes) when it
+    has a recorder, else its snapshot (about 5 KB on a 25x25 board, mostly the RNG state).
+    """
+    if game.recorder is not None:
+        return game.recorder.to_bytes()
+    return game.snapshot()
+
+
+def decode_game(data):
+    """
+    Rebuilds a game from encode_game() output. A replay is played back to its last tick
+    (a few microseconds per tick) and goes on recording.
+    """
+    try:
+        replay = Replay.from_bytes(data)
+    except ValueError:
+        return Game.from_snapshot(data)
+    return ReplayPlayer(replay).resume()
+
+
+class CheckpointStore:
+    """
+    Local SQLite file holding the live sessions, one row per session with its game
+    encoded by encode_game(). Rows are replaced and deleted, never appended, so the
+    file stays as large as the set of live sessions.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): the SQLite file, created when missing.
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            # WAL: a checkpoint appends to the log instead of rewriting pages in place
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, player_name TEXT, map_size INTEGER, "
+                "start_time REAL, snapshot BLOB)")
+
+    def save(self, rows, removed=()):
+        """
+        Writes changed sessions and deletes removed ones in one transaction.
+        Args:
+            rows (list): (session_id, player_name, map_size, start_time, snapshot) tuples.
+            removed (iterable): ids of sessions to delete.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.executemany("DELETE FROM sessions WHERE session_id = ?",
+                                         [(session_id,) for session_id in removed])
+
+    def load(self):
+        """
+        Returns every stored session as a (session_id, player_name, map_size, start_time, snapshot) tuple.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT * FROM sessions").fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class Checkpointer:
+    """
+    Saves the live sessions of a registry to a CheckpointStore from a background thread.
+    Checkpoints are incremental: only sessions whose game moved on (tick or direction)
+    since they were last saved are encoded and written, and sessions that ended,
+    finished or were evicted are deleted. Encoding a game holds its session's lock
+    for a few microseconds; the disk writes hold no game lock at all.
+    """
+
+    def __init__(self, store, registry, interval=CHECKPOINT_INTERVAL):
+        """
+        Args:
+            store (CheckpointStore): where the sessions go.
+            registry (SessionRegistry): the sessions to save.
+            interval (float): seconds between two checkpoints.
+        """
+        self.store = store
+        self.registry = registry
+        self.interval = interval
+        self._stored = set()
+        self._saved = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.checkpoints = 0
+        self.sessions_written = 0
+        self.max_checkpoint_seconds = 0.0
+
+    def mark_saved(self, session):
+        """
+        Records a session as already stored as it is, e.g. right after it was restored.
+        """
+        self._stored.add(session.session_id)
+        self._saved[session.session_id] = (session.game.tick, session.game.direction)
+
+    def checkpoint(self):
+        """
+        Saves the sessions changed since the last checkpoint. Returns the number written.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            rows, live = [], set()
+            for session in self.registry:
+                game = session.game
+                if game.game_over:
+                    continue  # Finished games are in the result store, not restored
+                session_id = session.session_id
+                live.add(session_id)
+                key = (game.tick, game.direction)
+                if self._saved.get(session_id) == key:
+                    continue
+                with session.lock:
+                    key = (game.tick, game.direction)
+                    snapshot = encode_game(game)
+                rows.append((session_id, session.player_name, session.map_size, session.start_time, snapshot))
+                self._saved[session_id] = key
+            removed = self._stored - live
+            self.store.save(rows, removed)
+            for session_id in removed:
+                self._saved.pop(session_id, None)
+            self._stored = live
+            self.checkpoints += 1
+            self.sessions_written += len(rows)
+            self.max_checkpoint_seconds = max(self.max_checkpoint_seconds, time.perf_counter() - start)
+            return len(rows)
+
+    def start(self):
+        """
+        Starts checkpointing every interval seconds.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-checkpointer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the thread after one last checkpoint.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.checkpoint()
+
+    def stats(self):
+        """
+        Returns the checkpoint counters: checkpoints taken, sessions written and the longest checkpoint in ms.
+        """
+        return {
+            "checkpoints": self.checkpoints,
+            "checkpoint_writes": self.sessions_written,
+            "max_checkpoint_ms": round(self.max_checkpoint_seconds * 1000, 3),
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                print(f"ERROR during session checkpoint: {e}")
+                traceback.print_exc()
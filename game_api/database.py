@@ -1,6 +1,6 @@
 import pymongo
-from pymongo import MongoClient
-from typing import List, Optional
+from pymongo import MongoClient, UpdateOne
+from typing import Any, Dict, List, Optional
 import datetime
 from zoneinfo import ZoneInfo
 from bson.objectid import ObjectId
@@ -246,6 +246,121 @@ class Database:
             print(f"Error adding game result for '{player_name}': {e}")
             return None
 
+    def add_game_results(self, results: List[Dict[str, Any]]) -> List[Optional[ObjectId]]:
+        """
+        Add a batch of game results and update the players' high scores in three round trips:
+        one unordered bulk_write of $max upserts (one per player and map size), one find for
+        the players' ids, and one unordered insert_many of the results.
+
+        Args:
+            results (List[Dict[str, Any]]): results with player_name, map_size, score and duration keys,
+                and optionally the _id to insert them with, so a retried result is the same document.
+
+        Returns:
+            List[Optional[ObjectId]]: the ObjectId of every added result in input order, None where it failed.
+                A result whose _id is already stored counts as added, so only the failed ones need a retry.
+        """
+        ids = [None] * len(results)
+        if not results:
+            return ids
+        if not self.is_connected and not self.connect():
+            print("Error: Cannot add game results, DB not connected.")
+            return ids
+
+        now = self._get_warsaw_time()
+        # Results of the same player and map size share one upsert with their best score
+        best_scores = {}
+        for result in results:
+            key = (result["player_name"], result["map_size"])
+            best_scores[key] = max(best_scores.get(key, result["score"]), result["score"])
+        keys = list(best_scores)
+
+        try:
+            self.players.bulk_write([
+                UpdateOne(
+                    {"name": name, "map_size": map_size},
+                    {
+                        "$setOnInsert": {
+                            "name": name,
+                            "map_size": map_size,
+                            "created_by": self.metadata["user"],
+                            "created_at": now
+                        },
+                        "$max": {"score": score},
+                        "$set": {"updated_at": now}
+                    },
+                    upsert=True
+                )
+                for (name, map_size), score in best_scores.items()
+            ], ordered=False)
+            failed = set()
+        except pymongo.errors.BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            print(f"Warning: {len(failed)} player updates failed in a batch of {len(keys)}.")
+        except Exception as e:
+            print(f"Error updating players for a batch of game results: {e}")
+            return ids
+
+        player_ids = {}
+        updated = [key for index, key in enumerate(keys) if index not in failed]
+        if updated:
+            try:
+                query = {"$or": [{"name": name, "map_size": map_size} for name, map_size in updated]}
+                for player in self.players.find(query, {"name": 1, "map_size": 1}):
+                    player_ids[(player["name"], player["map_size"])] = player["_id"]
+            except Exception as e:
+                print(f"Error getting players for a batch of game results: {e}")
+                return ids
+
+        documents, positions = [], []
+        for position, result in enumerate(results):
+            player_id = player_ids.get((result["player_name"], result["map_size"]))
+            if not player_id:
+                continue
+            document = GameResult(
+                player_name=result["player_name"],
+                map_size=result["map_size"],
+                score=result["score"],
+                duration=result["duration"],
+                player_id=player_id,
+                created_by=self.metadata["user"],
+                date=now
+            ).to_dict()
+            if result.get("_id") is not None:
+                document["_id"] = result["_id"]
+            documents.append(document)
+            positions.append(position)
+        if not documents:
+            return ids
+
+        try:
+            self.game_results.insert_many(documents, ordered=False)
+            failed = set()
+        except pymongo.errors.BulkWriteError as e:
+            # Error code 11000: DuplicateKey. game_results has no other unique index, so the
+            # _id is taken: an earlier attempt at this result was written after all
+            failed = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") != 11000}
+            if failed:
+                print(f"Warning: {len(failed)} game results failed in a batch of {len(documents)}.")
+        except Exception as e:
+            # The batch may have been written in part or in full (e.g. a timeout after the
+            # server wrote it), so ask which documents are there
+            print(f"Error adding a batch of game results: {e}")
+            try:
+                query = {"_id": {"$in": [document["_id"] for document in documents]}}
+                written = {document["_id"] for document in self.game_results.find(query, {"_id": 1})}
+            except Exception as e:
+                print(f"Error checking a batch of game results: {e}")
+                return ids
+            failed = {index for index, document in enumerate(documents) if document["_id"] not in written}
+
+        # insert_many gives every document its _id before sending it
+        for index, (position, document) in enumerate(zip(positions, documents)):
+            if index not in failed:
+                ids[position] = document["_id"]
+        print(f"Added {len(documents) - len(failed)} game results in one batch.")
+        return ids
+
     def get_player_results(self, player_name: str, map_size: Optional[int] = None) -> List[GameResult]:
         """
         Get all game results for a player, optionally filtered by map size.
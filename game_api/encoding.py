@@ -0,0 +1,235 @@
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from .engine.engine_core import cell_typecode
+
+# Media types of the two state encodings; clients pick one with the Accept header
+JSON_CONTENT_TYPE = "application/json"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
+# Sessions whose last encoded state is kept; beyond this the least recently encoded are dropped
+MAX_CACHED_SESSIONS = 10000
+# Board cells whose "[x,y]" text is kept, enough for every cell of a 256x256 board
+MAX_CACHED_CELLS = 256 * 256
+
+_cell_json = {}
+
+# Binary state header: format version, flags, width, height, food x, food y, tick, score,
+# speed, snake length; followed by the snake's cells (y * width + x), head first, as
+# little-endian uint16 on boards of up to 65535 cells and uint32 above
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<BBHHHHIIdI")
+FLAG_GAME_OVER = 1
+FLAG_FOOD = 2
+# Changes since a tick (game_manager.session_changes()) set FLAG_CHANGES, count the new head
+# cells as the snake length and put since and the removed tail cell count before the cells
+FLAG_CHANGES = 4
+_CHANGES_HEADER = struct.Struct("<II")
+
+
+def encode_state(state):
+    """
+    Encodes a game state to the same JSON as GameStateSerializer, written straight from
+    the state: no serializer fields, and every snake cell is a lookup of its cached text.
+    Args:
+        state (dict): the state as returned by the runtimes (GameState.as_dict()).
+    Returns:
+        bytes: the JSON body.
+    """
+    food = state["food"]
+    width, height = state["board_size"]
+    return (f'{{"snake":[{_cells_json(state["snake"])}],'
+            f'"food":{"null" if food is None else f"[{food[0]},{food[1]}]"},'
+            f'"score":{state["score"]},"game_over":{"true" if state["game_over"] else "false"},'
+            f'"board_size":[{width},{height}],"speed":{float(state["speed"])!r},'
+            f'"tick":{state["tick"]}}}').encode()
+
+
+def encode_changes(changes):
+    """
+    Encodes the changes since a tick (game_manager.session_changes()) to JSON, like encode_state().
+    """
+    food = changes["food"]
+    width, height = changes["board_size"]
+    return (f'{{"since":{changes["since"]},"tick":{changes["tick"]},'
+            f'"head":[{_cells_json(changes["head"])}],"removed":{changes["removed"]},'
+            f'"food":{"null" if food is None else f"[{food[0]},{food[1]}]"},'
+            f'"score":{changes["score"]},"game_over":{"true" if changes["game_over"] else "false"},'
+            f'"board_size":[{width},{height}],"speed":{float(changes["speed"])!r}}}').encode()
+
+
+def _cells_json(cells):
+    try:
+        return ",".join(map(_cell_json.__getitem__, cells))
+    except (KeyError, TypeError):
+        pass
+    texts = [f"[{x},{y}]" for x, y in cells]
+    if len(_cell_json) < MAX_CACHED_CELLS:
+        for cell, text in zip(cells, texts):
+            if isinstance(cell, tuple):
+                _cell_json[cell] = text
+    return ",".join(texts)
+
+
+def encode_state_binary(state):
+    """
+    Encodes a game state to the compact binary format: a fixed 30-byte header and
+    2 (or 4) bytes per snake cell, against about 7 bytes per cell in JSON.
+    Args:
+        state (dict): the state as returned by the runtimes (GameState.as_dict()).
+    Returns:
+        bytes: the body.
+    """
+    food = state["food"]
+    width, height = state["board_size"]
+    snake = state["snake"]
+    flags = (FLAG_GAME_OVER if state["game_over"] else 0) | (FLAG_FOOD if food is not None else 0)
+    food_x, food_y = food if food is not None else (0, 0)
+    header = _BINARY_HEADER.pack(BINARY_VERSION, flags, width, height, food_x, food_y,
+                                 state["tick"], state["score"], state["speed"], len(snake))
+    return header + _cells_binary(snake, width, height)
+
+
+def encode_changes_binary(changes):
+    """
+    Encodes the changes since a tick to the binary format: the state header with FLAG_CHANGES,
+    then since and the removed count, then the new head cells.
+    """
+    food = changes["food"]
+    width, height = changes["board_size"]
+    head = changes["head"]
+    flags = (FLAG_CHANGES | (FLAG_GAME_OVER if changes["game_over"] else 0)
+             | (FLAG_FOOD if food is not None else 0))
+    food_x, food_y = food if food is not None else (0, 0)
+    header = _BINARY_HEADER.pack(BINARY_VERSION, flags, width, height, food_x, food_y,
+                                 changes["tick"], changes["score"], changes["speed"], len(head))
+    return (header + _CHANGES_HEADER.pack(changes["since"], changes["removed"])
+            + _cells_binary(head, width, height))
+
+
+def _cells_binary(cells, width, height):
+    # Packed straight from y * width + x: as fast as a table of per-cell bytes, and keeps nothing per board
+    packed = array(cell_typecode(width * height), [y * width + x for x, y in cells])
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def decode_state_binary(body):
+    """
+    Decodes the output of encode_state_binary() or encode_changes_binary() back to a
+    state or changes dict (cells as tuples).
+    """
+    (version, flags, width, height, food_x, food_y,
+     tick, score, speed, length) = _BINARY_HEADER.unpack_from(body)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unknown binary state version {version}")
+    offset = _BINARY_HEADER.size
+    if flags & FLAG_CHANGES:
+        since, removed = _CHANGES_HEADER.unpack_from(body, offset)
+        offset += _CHANGES_HEADER.size
+    cells = array(cell_typecode(width * height))
+    cells.frombytes(body[offset:offset + length * cells.itemsize])
+    if sys.byteorder == "big":
+        cells.byteswap()
+    cells = tuple((cell % width, cell // width) for cell in cells)
+    decoded = {
+        "food": (food_x, food_y) if flags & FLAG_FOOD else None,
+        "score": score,
+        "game_over": bool(flags & FLAG_GAME_OVER),
+        "board_size": [width, height],
+        "speed": speed,
+        "tick": tick,
+    }
+    if flags & FLAG_CHANGES:
+        return {"since": since, "head": cells, "removed": removed, **decoded}
+    return {"snake": cells, **decoded}
+
+
+_ENCODERS = {JSON_CONTENT_TYPE: encode_state, BINARY_CONTENT_TYPE: encode_state_binary}
+_CHANGES_ENCODERS = {JSON_CONTENT_TYPE: encode_changes, BINARY_CONTENT_TYPE: encode_changes_binary}
+
+
+def encode_changes_as(changes, content_type):
+    """
+    Encodes changes since a tick in the given content type. Not cached: the body depends on `since`.
+    """
+    return _CHANGES_ENCODERS[content_type](changes)
+
+
+def preferred_content_type(accept):
+    """
+    The state encoding asked for by an Accept header: BINARY_CONTENT_TYPE only when it
+    is named with a higher quality than JSON (or before it, at the same quality), JSON otherwise.
+    """
+    if not accept or BINARY_CONTENT_TYPE not in accept:
+        return JSON_CONTENT_TYPE
+    best, best_quality = JSON_CONTENT_TYPE, 0.0
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type not in (JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE):
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+class EncodedStates:
+    """
+    The encoded bodies of the latest state of each session, so every reader of one tick
+    (polls, long-polls, moves, sockets) shares a single encoding per content type. A
+    published state never changes, so its tick and game_over flag identify it within a session.
+    """
+
+    def __init__(self, max_sessions=MAX_CACHED_SESSIONS):
+        """
+        Args:
+            max_sessions (int): sessions kept; the least recently encoded are dropped beyond this.
+        """
+        self.max_sessions = max_sessions
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def body(self, session_id, state, content_type=JSON_CONTENT_TYPE):
+        """
+        Returns the encoded body of a session's state, encoding it only on the first request
+        for its tick and content type.
+        Args:
+            session_id (str): the session the state belongs to.
+            state (dict): the state as returned by the runtimes.
+            content_type (str): JSON_CONTENT_TYPE or BINARY_CONTENT_TYPE.
+        """
+        key = (state["tick"], state["game_over"])
+        cached = self._bodies.get(session_id)
+        if cached is not None and cached[0] == key:
+            body = cached[1].get(content_type)
+            if body is not None:
+                self.hits += 1
+                return body
+        body = _ENCODERS[content_type](state)
+        with self._lock:
+            self.misses += 1
+            cached = self._bodies.get(session_id)
+            if cached is None or cached[0] != key:
+                cached = self._bodies[session_id] = (key, {})
+            cached[1][content_type] = body
+            self._bodies.move_to_end(session_id)
+            while len(self._bodies) > self.max_sessions:
+                self._bodies.popitem(last=False)
+        return body
+
+
+encoded_states = EncodedStates()
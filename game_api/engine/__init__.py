@@ -1 +1,3 @@
-from .engine_core import move_snake, check_collision, is_within_bounds, increase_speed, Game
\ No newline at end of file
+from .engine_core import move_snake, check_collision, is_within_bounds, increase_speed, Game, SnakeBody, neighbor_table, TickDelta
+from .arena import Arena, ArenaSnake
+from .replay import Replay, ReplayRecorder, ReplayPlayer
\ No newline at end of file
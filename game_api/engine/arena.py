@@ -0,0 +1,291 @@
+import random
+from array import array
+from collections import deque
+
+from .engine_core import (increase_speed, neighbor_table, cell_typecode, DIRECTIONS, DIRECTION_CODES,
+                          DIRECTION_STEPS, OPPOSITE, SPARSE_BOARD_CELLS, WALL)
+
+
+class ArenaSnake:
+    """
+    One snake of an arena. Its body is a deque of int cells, head first.
+    """
+
+    __slots__ = ("id", "cells", "_direction", "score", "speed", "alive")
+
+    def __init__(self, snake_id, cell, direction):
+        self.id = snake_id
+        self.cells = deque([cell])
+        self._direction = direction
+        self.score = 0
+        self.speed = 1
+        self.alive = True
+
+    @property
+    def direction(self):
+        """
+        The direction of the snake as a name ("up", "down", "left", "right").
+        """
+        return DIRECTIONS[self._direction]
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class Arena:
+    """
+    Many snakes on one board, all moving at the same time and sharing the food.
+    Every board cell keeps a count of the segments on it, and the free cells sit
+    in a dense list with a position lookup like in SnakeBody. A tick moves every
+    head first, then checks each new head against the shared grid and a small
+    hash of the cells heads moved to, so resolving it costs time linear in the
+    number of moving snakes (plus the bodies of the snakes that die) instead of
+    comparing snakes pairwise.
+
+    Rules, per tick:
+        - a head that leaves the board dies,
+        - tails move away before heads arrive, unless the snake eats this tick,
+        - a head on a cell held by any body (its own included) dies,
+        - when heads meet, or two snakes swap cells, the strictly longest one survives,
+          otherwise all die,
+        - only snakes that survive the tick eat,
+        - dead snakes are removed from the board, eaten food grows back elsewhere.
+    With a single snake and one food this is exactly engine_core.Game, down to the
+    random sequence used to place the food.
+    """
+
+    def __init__(self, board_size=(50, 50), food_count=1, seed=None):
+        """
+        Initialize an empty arena.
+        Args:
+            board_size (tuple): the size of the board.
+            food_count (int): how many food items are kept on the board.
+            seed (int): seed of the arena's random generator, a random 64-bit seed when None.
+        """
+        width, height = board_size
+        cells = width * height
+        self.board_size = board_size
+        self.width = width
+        self.height = height
+        self.food_count = food_count
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.snakes = []
+        self._living = []
+        self._food = {}
+        self._neighbors = neighbor_table(width, height) if cells <= SPARSE_BOARD_CELLS else None
+
+        typecode = cell_typecode(cells)
+        self._occupied = bytearray(cells)
+        self._free = array(typecode, range(cells))
+        self._free_pos = array(typecode, range(cells))
+        self._free_count = cells
+
+    def add_snake(self, position=None, direction="right"):
+        """
+        Puts a new snake of length one on the board and returns its id.
+        Args:
+            position (tuple): where the snake starts, a random free cell when None.
+            direction (str): the initial direction of the snake.
+        """
+        if direction not in DIRECTION_CODES:
+            raise ValueError(f"Invalid direction: {direction}")
+        if position is None:
+            cell = self._random_free_cell()
+            if cell == WALL:
+                raise ValueError("No free cell left for a new snake.")
+        else:
+            x, y = position
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError(f"Position outside of the board: {position}")
+            cell = y * self.width + x
+            if self._occupied[cell] or cell in self._food:
+                raise ValueError(f"Position already taken: {position}")
+
+        snake = ArenaSnake(len(self.snakes), cell, DIRECTION_CODES[direction])
+        self.snakes.append(snake)
+        self._living.append(snake)
+        self._occupy(cell)
+        self._grow_food()
+        return snake.id
+
+    def change_direction(self, snake_id, new_direction):
+        """
+        Changes the direction of one snake, with the same rule as Game.change_direction.
+        Args:
+            snake_id (int): the id returned by add_snake().
+            new_direction (str): the new direction.
+        """
+        if new_direction not in DIRECTION_CODES:
+            raise ValueError(f"Invalid direction: {new_direction}")
+        snake = self.snakes[snake_id]
+        code = DIRECTION_CODES[new_direction]
+        if len(snake.cells) <= 1 or code != OPPOSITE[snake._direction]:
+            snake._direction = code
+
+    def update(self):
+        """
+        Moves every living snake by one cell and resolves the collisions.
+        Returns the ids of the snakes that died on this tick.
+        """
+        self.tick += 1
+        occupied, food = self._occupied, self._food
+        dead = []
+
+        def kill(snake):
+            if snake.alive:
+                snake.alive = False
+                dead.append(snake)
+
+        # New head of every snake; leaving the board kills the snake where it stands
+        moves = []
+        for snake in self._living:
+            head = snake.cells[0]
+            new_head = self._neighbor(head, snake._direction)
+            if new_head == WALL:
+                kill(snake)
+            else:
+                moves.append((snake, head, new_head, new_head in food))
+
+        # Tails leave first, so a head may take a cell vacated on the same tick
+        for snake, head, new_head, eats in moves:
+            if not eats:
+                self._release(snake.cells.pop())
+
+        # Heads arrive; they are hashed by cell to find the meetings, and by the cell they
+        # left to find the snakes that swap cells
+        heads = {}
+        left = {}
+        for snake, head, new_head, eats in moves:
+            snake.cells.appendleft(new_head)
+            self._occupy(new_head)
+            heads.setdefault(new_head, []).append(snake)
+            left[head] = (snake, new_head)
+        swaps = []
+        necks = {}
+        for snake, head, new_head, eats in moves:
+            partner, partner_head = left.get(new_head, (None, None))
+            if partner_head == head and partner is not snake:
+                swaps.append((snake, partner))
+                # The partner's old head is still one of its segments unless that was its tail
+                if len(partner.cells) > 1:
+                    necks[new_head] = 1
+
+        for cell, arrived in heads.items():
+            if occupied[cell] - necks.get(cell, 0) > len(arrived):
+                # Some body was already there
+                for snake in arrived:
+                    kill(snake)
+            elif len(arrived) > 1:
+                arrived.sort(key=len, reverse=True)
+                survivor = len(arrived[0]) > len(arrived[1])
+                for snake in arrived[1:] if survivor else arrived:
+                    kill(snake)
+        # Snakes that swap cells meet head to head too (each pair is listed from both sides)
+        for snake, partner in swaps:
+            if len(snake) <= len(partner):
+                kill(snake)
+
+        # Only the snakes that survive the tick eat; the food of the others stays
+        for snake, head, new_head, eats in moves:
+            if eats and snake.alive:
+                food.pop(new_head, None)
+                snake.score += 1
+                snake.speed = increase_speed(snake.score)
+
+        for snake in dead:
+            for cell in snake.cells:
+                self._release(cell)
+        if dead:
+            self._living = [snake for snake in self._living if snake.alive]
+        self._grow_food()
+        return [snake.id for snake in dead]
+
+    @property
+    def game_over(self):
+        """
+        True once every snake has died.
+        """
+        return not self._living
+
+    @property
+    def food(self):
+        """
+        The food positions as (x, y), in the order they appeared.
+        """
+        return [self.to_position(cell) for cell in self._food]
+
+    def snake(self, snake_id):
+        """
+        The body of one snake as (x, y) positions, head first.
+        """
+        return [self.to_position(cell) for cell in self.snakes[snake_id].cells]
+
+    def get_state(self):
+        """
+        Returns the state of the arena as plain data.
+        """
+        return {
+            "snakes": [{
+                "id": snake.id,
+                "snake": self.snake(snake.id),
+                "direction": snake.direction,
+                "score": snake.score,
+                "speed": snake.speed,
+                "alive": snake.alive,
+            } for snake in self.snakes],
+            "food": self.food,
+            "board_size": list(self.board_size),
+            "tick": self.tick,
+            "game_over": self.game_over,
+        }
+
+    def to_position(self, cell):
+        return (cell % self.width, cell // self.width)
+
+    def _neighbor(self, cell, direction):
+        if self._neighbors is not None:
+            return self._neighbors[cell * 4 + direction]
+        x, y = cell % self.width, cell // self.width
+        dx, dy = DIRECTION_STEPS[direction]
+        x += dx
+        y += dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return WALL
+
+    def _occupy(self, cell):
+        self._occupied[cell] += 1
+        if self._occupied[cell] > 1:
+            return
+        # Swap-remove the cell from the dense free list
+        index = self._free_pos[cell]
+        last = self._free[self._free_count - 1]
+        self._free[index] = last
+        self._free_pos[last] = index
+        self._free_count -= 1
+
+    def _release(self, cell):
+        self._occupied[cell] -= 1
+        if self._occupied[cell]:
+            return
+        self._free[self._free_count] = cell
+        self._free_pos[cell] = self._free_count
+        self._free_count += 1
+
+    def _random_free_cell(self):
+        # Free cells holding food are skipped; with a single food there is never one to skip
+        if self._free_count <= len(self._food):
+            return WALL
+        while True:
+            cell = self._free[self.rng.randrange(self._free_count)]
+            if cell not in self._food:
+                return cell
+
+    def _grow_food(self):
+        while len(self._food) < self.food_count:
+            cell = self._random_free_cell()
+            if cell == WALL:
+                return
+            self._food[cell] = None
@@ -0,0 +1,233 @@
+import random
+
+import numpy as np
+
+from .engine_core import increase_speed, DIRECTION_CODES, DIRECTION_STEPS, OPPOSITE, NO_FOOD
+
+# Direction steps and opposites by direction code, as arrays
+_DX = np.array([dx for dx, _ in DIRECTION_STEPS], dtype=np.int64)
+_DY = np.array([dy for _, dy in DIRECTION_STEPS], dtype=np.int64)
+_OPPOSITE = np.array(OPPOSITE, dtype=np.int64)
+
+
+class BatchGame:
+    """
+    Vectorized engine stepping N snake games on the same board size in lockstep.
+    Cells are stored as ints (y * width + x). Every game keeps a ring buffer for
+    its body, an occupancy grid and a dense free-cell list, all held in arrays,
+    so one call to update() moves, checks and feeds every game at once.
+    It follows engine_core.Game rule for rule, including the order in which free
+    cells are taken and given back, so with the same random sequence each game
+    ends up in exactly the same state as a Game built with the same seed.
+    """
+
+    def __init__(self, n_games, board_size=(10, 10), initial_positions=None, directions="right", seeds=None):
+        """
+        Initialize N games.
+        Args:
+            n_games (int): number of games in the batch.
+            board_size (tuple): the size of every game board.
+            initial_positions (list): (x, y) start of each snake, defaults to the board centre.
+            directions (str or list): initial direction for all games or for each game.
+            seeds (list): seed per game for its own random.Random, random 64-bit seeds when None.
+        """
+        self.n_games = n_games
+        self.board_size = board_size
+        width, height = board_size
+        cells = width * height
+        self.width = width
+        self.height = height
+
+        if seeds is None:
+            seeds = [random.getrandbits(64) for _ in range(n_games)]
+        if len(seeds) != n_games:
+            raise ValueError("One seed per game is required.")
+        self.seeds = list(seeds)
+        self.rngs = [random.Random(seed) for seed in seeds]
+
+        if initial_positions is None:
+            initial_positions = [(width // 2, height // 2)] * n_games
+        positions = np.array(initial_positions, dtype=np.int64).reshape(n_games, 2)
+        init_x = np.clip(positions[:, 0], 0, width - 1)
+        init_y = np.clip(positions[:, 1], 0, height - 1)
+        heads = init_y * width + init_x
+
+        if isinstance(directions, str):
+            directions = [directions] * n_games
+        self.directions = np.array([self._direction_code(d) for d in directions], dtype=np.int64)
+
+        games = np.arange(n_games)
+        self._games = games
+
+        # Body ring buffer: head at body[g, head_ptr[g]], following segments wrap around
+        self.body = np.zeros((n_games, cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n_games, dtype=np.int64)
+        self.length = np.ones(n_games, dtype=np.int64)
+        self.body[:, 0] = heads
+
+        self.grid = np.zeros((n_games, cells), dtype=bool)
+        self.grid[games, heads] = True
+
+        # Dense free-cell list per game, in the same row-major order Game starts with
+        self.free = np.tile(np.arange(cells, dtype=np.int32), (n_games, 1))
+        self.free_pos = np.tile(np.arange(cells, dtype=np.int64), (n_games, 1))
+        self.free_count = np.full(n_games, cells, dtype=np.int64)
+        self._take_free(games, heads)
+
+        self.scores = np.zeros(n_games, dtype=np.int64)
+        self.speeds = np.ones(n_games, dtype=np.float64)
+        self.game_over = np.zeros(n_games, dtype=bool)
+        self.food = np.full(n_games, NO_FOOD, dtype=np.int64)
+        self._spawn_food(games)
+
+    @staticmethod
+    def _direction_code(direction):
+        if isinstance(direction, str):
+            if direction not in DIRECTION_CODES:
+                raise ValueError(f"Invalid direction: {direction}")
+            return DIRECTION_CODES[direction]
+        return int(direction)
+
+    @property
+    def heads(self):
+        """
+        Head cell of every game.
+        """
+        return self.body[self._games, self.head_ptr].astype(np.int64)
+
+    @property
+    def tails(self):
+        """
+        Tail cell of every game.
+        """
+        cells = self.body.shape[1]
+        return self.body[self._games, (self.head_ptr + self.length - 1) % cells].astype(np.int64)
+
+    def change_directions(self, new_directions):
+        """
+        Changes direction of every game, refusing to turn a snake back into itself.
+        Args:
+            new_directions (list): direction name or code per game, None or -1 keeps the current one.
+        """
+        codes = np.array([-1 if d is None else self._direction_code(d) for d in new_directions], dtype=np.int64)
+        requested = codes >= 0
+        allowed = requested & ((self.length <= 1) | (codes != _OPPOSITE[self.directions]))
+        self.directions[allowed] = codes[allowed]
+
+    def change_direction(self, game, new_direction):
+        """
+        Changes direction of a single game, same rule as Game.change_direction.
+        """
+        code = self._direction_code(new_direction)
+        if self.length[game] <= 1 or code != _OPPOSITE[self.directions[game]]:
+            self.directions[game] = code
+
+    def update(self):
+        """
+        Advances every running game by one tick.
+        """
+        width, height = self.width, self.height
+        cells = width * height
+
+        games = np.flatnonzero(~self.game_over)
+        if games.size == 0:
+            return
+
+        heads = self.body[games, self.head_ptr[games]].astype(np.int64)
+        directions = self.directions[games]
+        new_x = heads % width + _DX[directions]
+        new_y = heads // width + _DY[directions]
+
+        # Checking if snake isn't within bounds
+        inside = (new_x >= 0) & (new_x < width) & (new_y >= 0) & (new_y < height)
+        self.game_over[games[~inside]] = True
+        games = games[inside]
+        new_heads = (new_y * width + new_x)[inside]
+
+        # Checking if snake isn't inside itself (the tail cell is about to be vacated)
+        tails = self.body[games, (self.head_ptr[games] + self.length[games] - 1) % cells].astype(np.int64)
+        hit = self.grid[games, new_heads] & (new_heads != tails)
+        self.game_over[games[hit]] = True
+        games, new_heads, tails = games[~hit], new_heads[~hit], tails[~hit]
+
+        # Tail leaves first for every game that doesn't eat, like Game.update
+        eats = self.food[games] == new_heads
+        movers, mover_tails = games[~eats], tails[~eats]
+        self.grid[movers, mover_tails] = False
+        self._give_free(movers, mover_tails)
+        self.length[movers] -= 1
+
+        self.head_ptr[games] = (self.head_ptr[games] - 1) % cells
+        self.body[games, self.head_ptr[games]] = new_heads
+        self.length[games] += 1
+        self.grid[games, new_heads] = True
+        self._take_free(games, new_heads)
+
+        eaters = games[eats]
+        if eaters.size:
+            self.scores[eaters] += 1
+            self.speeds[eaters] = [increase_speed(int(score)) for score in self.scores[eaters]]
+            self._spawn_food(eaters)
+
+    def _take_free(self, games, positions):
+        # Swap-remove positions from the dense free lists, one position per game
+        index = self.free_pos[games, positions]
+        last = self.free[games, self.free_count[games] - 1]
+        self.free[games, index] = last
+        self.free_pos[games, last] = index
+        self.free_pos[games, positions] = -1
+        self.free_count[games] -= 1
+
+    def _give_free(self, games, positions):
+        # Append positions to the end of the dense free lists
+        index = self.free_count[games]
+        self.free[games, index] = positions
+        self.free_pos[games, positions] = index
+        self.free_count[games] += 1
+
+    def _spawn_food(self, games):
+        # Food draws stay per game so every game uses its own random sequence
+        for game in games:
+            count = self.free_count[game]
+            if count:
+                self.food[game] = self.free[game, self.rngs[game].randrange(count)]
+            else:
+                # No available positions, game won
+                self.food[game] = NO_FOOD
+                self.game_over[game] = True
+
+    def cell_to_position(self, cell):
+        """
+        Converts a cell number to an (x, y) tuple.
+        """
+        cell = int(cell)
+        return (cell % self.width, cell // self.width)
+
+    def snake(self, game):
+        """
+        Returns the snake of one game as a list of (x, y) tuples, head first.
+        """
+        cells = self.body.shape[1]
+        order = (self.head_ptr[game] + np.arange(self.length[game])) % cells
+        return [self.cell_to_position(cell) for cell in self.body[game, order]]
+
+    def food_position(self, game):
+        """
+        Returns the food of one game as (x, y), or None when there is no food.
+        """
+        if self.food[game] == NO_FOOD:
+            return None
+        return self.cell_to_position(self.food[game])
+
+    def get_state(self, game):
+        """
+        Returns the state of one game in the same shape as game_manager.get_current_state.
+        """
+        return {
+            "snake": self.snake(game),
+            "food": self.food_position(game),
+            "score": int(self.scores[game]),
+            "game_over": bool(self.game_over[game]),
+            "board_size": list(self.board_size),
+            "speed": float(self.speeds[game]),
+        }
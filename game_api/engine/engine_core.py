@@ -1,14 +1,486 @@
+import random
+import struct
+from array import array
+from collections import deque, namedtuple
+from functools import lru_cache
+
+# Directions are small int codes internally, names stay the public API
+DIRECTIONS = ("up", "down", "left", "right")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+UP, DOWN, LEFT, RIGHT = range(4)
+OPPOSITE = (DOWN, UP, RIGHT, LEFT)
+DIRECTION_STEPS = ((0, 1), (0, -1), (-1, 0), (1, 0))
+
+# Sentinel cell for "outside of the board" in neighbor tables and for "no food"
+WALL = -1
+NO_FOOD = -1
+
+
+# What one call to Game.update changed: the tick number, the new head and the removed
+# tail as (x, y) (None when nothing was added or removed), the food after the tick,
+# the score and the game_over flag
+TickDelta = namedtuple("TickDelta", ["tick", "head", "tail", "food", "score", "game_over"])
+# Builds a TickDelta from a plain tuple, skipping the Python-level namedtuple __new__ on the hot path
+_new_delta = tuple.__new__
+
+# Boards with more cells than this use the sparse body by default
+SPARSE_BOARD_CELLS = 1 << 16
+
+# Snapshot header: width, height, tick, score, direction, game_over, sparse, speed, food,
+# snake length, packed cells after the body, seed size; followed by the seed, the packed
+# body cells (SnakeBody.packed_cells()), the RNG state
+_SNAPSHOT_HEADER = struct.Struct("<IIIIB??dqIIB")
+
+
+def cell_typecode(cells):
+    """
+    Smallest array typecode able to hold every cell number of a board.
+    """
+    if cells <= 0xFFFF:
+        return 'H'
+    return 'I' if cells <= 0xFFFFFFFF else 'Q'
+
+
+@lru_cache(maxsize=32)
+def _identity_cells(typecode, cells):
+    # 0..cells-1 once per board size; bodies copy it instead of building it from range() each time
+    return array(typecode, range(cells))
+
+
+@lru_cache(maxsize=32)
+def neighbor_table(width, height):
+    """
+    Builds (once per board size) the table of neighbors of every cell.
+    Cells are ints (y * width + x), the neighbor of cell c in direction d
+    is at index c * 4 + d, and moves that leave the board hold WALL.
+    Args:
+        width (int): the width of the board.
+        height (int): the height of the board.
+    """
+    table = array('i', [WALL]) * (width * height * 4)
+    for y in range(height):
+        for x in range(width):
+            base = (y * width + x) * 4
+            for code, (dx, dy) in enumerate(DIRECTION_STEPS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    table[base + code] = ny * width + nx
+    return table
+
+
+class SnakeBody:
+    """
+    Compact snake body for one board. Segments are int cells in an array ring
+    buffer (head first), occupancy is a bytearray of per-cell counts, and the
+    free board cells sit in a dense array with a position lookup, so taking or
+    freeing a cell is a swap-remove or an append. Moving, growing, membership
+    checks and picking a free cell are all O(1) and allocate nothing.
+    The (x, y) tuple API of the old list body is kept as a view on top.
+    """
+
+    __slots__ = ("width", "height", "_ring", "_start", "_length",
+                 "_occupied", "_free", "_free_pos", "_free_count")
+
+    def __init__(self, segments, board_size):
+        """
+        Initialize the body from segments ordered from head to tail.
+        Args:
+            segments (iterable): (x, y) positions of the snake, head first.
+            board_size (tuple): the size of the board the snake lives on.
+        """
+        width, height = board_size
+        cells = width * height
+        self.width = width
+        self.height = height
+        typecode = cell_typecode(cells)
+        self._ring = array(typecode, [0]) * cells
+        self._start = 0
+        self._length = 0
+        self._occupied = bytearray(cells)
+
+        # Free cells start in row-major order, then the body takes its cells out
+        identity = _identity_cells(typecode, cells)
+        self._free = identity[:]
+        self._free_pos = identity[:]
+        self._free_count = cells
+        for position in segments:
+            self.append(position)
+
+    def copy(self):
+        """
+        Returns an independent copy of the body (flat array copies, no per-segment work).
+        """
+        other = SnakeBody.__new__(SnakeBody)
+        other.width = self.width
+        other.height = self.height
+        other._ring = self._ring[:]
+        other._start = self._start
+        other._length = self._length
+        other._occupied = self._occupied[:]
+        other._free = self._free[:]
+        other._free_pos = self._free_pos[:]
+        other._free_count = self._free_count
+        return other
+
+    def packed_cells(self):
+        """
+        Returns the body cells (head first), the free cells in free-list order and the
+        free-list position of every board cell. That is the whole body as flat arrays,
+        so from_packed_cells() rebuilds it without a pass over the board.
+        """
+        end = self._start + self._length
+        if end <= len(self._ring):
+            cells = self._ring[self._start:end]
+        else:
+            cells = self._ring[self._start:] + self._ring[:end - len(self._ring)]
+        cells.extend(self._free[:self._free_count])
+        cells.extend(self._free_pos)
+        return cells
+
+    @classmethod
+    def from_packed_cells(cls, board_size, cells, length):
+        """
+        Rebuilds a body from packed_cells() output.
+        Args:
+            board_size (tuple): the size of the board.
+            cells (array): body cells, then free cells, then the free-list positions.
+            length (int): number of body cells at the front.
+        """
+        width, height = board_size
+        total = width * height
+        free_count = len(cells) - length - total
+        zeros = array(cells.typecode, [0])
+        body = cls.__new__(cls)
+        body.width = width
+        body.height = height
+        body._ring = cells[:length]
+        body._ring.extend(zeros * (total - length))
+        body._start = 0
+        body._length = length
+        body._occupied = occupied = bytearray(total)
+        for cell in cells[:length]:
+            occupied[cell] += 1
+        body._free = cells[length:length + free_count]
+        body._free.extend(zeros * (total - free_count))
+        body._free_pos = cells[length + free_count:]
+        body._free_count = free_count
+        return body
+
+    # Conversions between the tuple API and int cells
+    def to_cell(self, position):
+        """
+        Converts an (x, y) position to a cell number.
+        """
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"Position {position} is outside of the board.")
+        return y * self.width + x
+
+    def to_position(self, cell):
+        """
+        Converts a cell number to an (x, y) position.
+        """
+        y, x = divmod(cell, self.width)
+        return (x, y)
+
+    def neighbor(self, cell, direction):
+        """
+        Returns the cell next to the given one in a direction (code), or WALL.
+        Works on any board size without a neighbor table.
+        """
+        y, x = divmod(cell, self.width)
+        dx, dy = DIRECTION_STEPS[direction]
+        x += dx
+        y += dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return WALL
+
+    # Int cell API used by the engine
+    @property
+    def head_cell(self):
+        return self._ring[self._start]
+
+    @property
+    def tail_cell(self):
+        return self._ring[(self._start + self._length - 1) % len(self._ring)]
+
+    def cells(self):
+        """
+        Yields the cells of the snake, head first.
+        """
+        ring, start, size = self._ring, self._start, len(self._ring)
+        for i in range(self._length):
+            yield ring[(start + i) % size]
+
+    def is_occupied(self, cell):
+        return self._occupied[cell] != 0
+
+    def push_head(self, cell):
+        """
+        Adds a new head segment.
+        Args:
+            cell (int): the cell of the new head.
+        """
+        self._start = (self._start - 1) % len(self._ring)
+        self._ring[self._start] = cell
+        self._length += 1
+        self._occupy(cell)
+
+    def pop_tail(self):
+        """
+        Removes the tail segment and returns its cell.
+        """
+        self._length -= 1
+        tail = self._ring[(self._start + self._length) % len(self._ring)]
+        self._vacate(tail)
+        return tail
+
+    @property
+    def free_count(self):
+        """
+        Number of board cells not covered by the snake.
+        """
+        return self._free_count
+
+    def random_free_cell(self, rng):
+        """
+        Picks a random free cell, or returns NO_FOOD when the board is full.
+        Args:
+            rng: random number generator providing randrange().
+        """
+        if not self._free_count:
+            return NO_FOOD
+        return self._free[rng.randrange(self._free_count)]
+
+    def _occupy(self, cell):
+        self._occupied[cell] += 1
+        if self._occupied[cell] > 1:
+            return
+        # Swap-remove the cell from the dense free list
+        index = self._free_pos[cell]
+        last = self._free[self._free_count - 1]
+        self._free[index] = last
+        self._free_pos[last] = index
+        self._free_count -= 1
+
+    def _vacate(self, cell):
+        self._occupied[cell] -= 1
+        if self._occupied[cell]:
+            return
+        self._free[self._free_count] = cell
+        self._free_pos[cell] = self._free_count
+        self._free_count += 1
+
+    def _replace(self, positions):
+        # Rebuild the body from a list of positions, used by the list-style edits
+        cells = [self.to_cell(position) for position in positions]
+        while self._length:
+            self.pop_tail()
+        self._start = 0
+        for cell in cells:
+            self._ring[self._length] = cell
+            self._length += 1
+            self._occupy(cell)
+
+    # List compatibility, used by code and tests that treat the snake as a list
+    def append(self, position):
+        if self._length == len(self._ring):
+            raise ValueError("Snake is already covering the whole board.")
+        cell = self.to_cell(position)
+        self._ring[(self._start + self._length) % len(self._ring)] = cell
+        self._length += 1
+        self._occupy(cell)
+
+    def insert(self, index, position):
+        positions = list(self)
+        positions.insert(index, position)
+        self._replace(positions)
+
+    def remove(self, position):
+        positions = list(self)
+        positions.remove(position)
+        self._replace(positions)
+
+    def __contains__(self, position):
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return self._occupied[y * self.width + x] != 0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        to_position = self.to_position
+        for cell in self.cells():
+            yield to_position(cell)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("snake index out of range")
+        return self.to_position(self._ring[(self._start + index) % len(self._ring)])
+
+    def __eq__(self, other):
+        if isinstance(other, (SnakeBody, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SparseSnakeBody(SnakeBody):
+    """
+    Snake body for huge boards, where nothing may grow with the board area.
+    Segments are int cells in a deque and occupancy is a set, so memory and
+    per-tick cost depend only on the snake's length. Food is placed by
+    rejection sampling while at least half of the board is free, and by an
+    exact pick of the k-th free cell over the sorted body once it is not.
+    """
+
+    __slots__ = ("_segments", "_cells")
+
+    # Tries before rejection sampling gives up and falls back to the exact pick
+    REJECTION_TRIES = 16
+
+    def __init__(self, segments, board_size):
+        """
+        Initialize the body from segments ordered from head to tail.
+        Args:
+            segments (iterable): (x, y) positions of the snake, head first.
+            board_size (tuple): the size of the board the snake lives on.
+        """
+        width, height = board_size
+        self.width = width
+        self.height = height
+        self._cells = width * height
+        self._segments = deque()
+        self._occupied = set()
+        for position in segments:
+            self.append(position)
+
+    def copy(self):
+        other = SparseSnakeBody.__new__(SparseSnakeBody)
+        other.width = self.width
+        other.height = self.height
+        other._cells = self._cells
+        other._segments = self._segments.copy()
+        other._occupied = self._occupied.copy()
+        return other
+
+    def packed_cells(self):
+        """
+        Returns the body cells, head first. The free cells are not stored for huge boards.
+        """
+        return array(cell_typecode(self._cells), self._segments)
+
+    @classmethod
+    def from_packed_cells(cls, board_size, cells, length):
+        return cls([divmod(cell, board_size[0])[::-1] for cell in cells[:length]], board_size)
+
+    @property
+    def head_cell(self):
+        return self._segments[0]
+
+    @property
+    def tail_cell(self):
+        return self._segments[-1]
+
+    def cells(self):
+        return iter(self._segments)
+
+    def is_occupied(self, cell):
+        return cell in self._occupied
+
+    def push_head(self, cell):
+        self._segments.appendleft(cell)
+        self._occupied.add(cell)
+
+    def pop_tail(self):
+        tail = self._segments.pop()
+        self._occupied.discard(tail)
+        return tail
+
+    @property
+    def free_count(self):
+        return self._cells - len(self._occupied)
+
+    def random_free_cell(self, rng):
+        """
+        Picks a random free cell, or returns NO_FOOD when the board is full.
+        Args:
+            rng: random number generator providing randrange().
+        """
+        free = self.free_count
+        if free <= 0:
+            return NO_FOOD
+        if free * 2 >= self._cells:
+            for _ in range(self.REJECTION_TRIES):
+                cell = rng.randrange(self._cells)
+                if cell not in self._occupied:
+                    return cell
+        # Exact pick: walk the sorted body to find the k-th free cell
+        cell = rng.randrange(free)
+        for occupied in sorted(self._occupied):
+            if occupied > cell:
+                break
+            cell += 1
+        return cell
+
+    def _replace(self, positions):
+        cells = [self.to_cell(position) for position in positions]
+        self._segments = deque(cells)
+        self._occupied = set(cells)
+
+    def append(self, position):
+        cell = self.to_cell(position)
+        self._segments.append(cell)
+        self._occupied.add(cell)
+
+    def __contains__(self, position):
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return y * self.width + x in self._occupied
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self.to_position(self._segments[index])
+
+
 class Game:
-    def __init__(self, board_size=(10, 10), initial_position=None, direction="right"):
+    __slots__ = ("board_size", "sparse", "_neighbors", "_snake", "_direction", "_food",
+                 "score", "game_over", "speed", "seed", "_rng", "_rng_state", "tick", "recorder")
+
+    def __init__(self, board_size=(10, 10), initial_position=None, direction="right", seed=None, sparse=None):
         """
         Initialize the game with a board size and initial position.
         Args:
             board_size (tuple): the size of the game board.
             initial_position (tuple): the initial position of the snake.
             direction: the initial direction of the snake.
+            seed (int): seed of the game's own random generator, a random 64-bit seed when None.
+            sparse (bool): keep only structures sized by the snake, not by the board
+                (huge boards); by default used above SPARSE_BOARD_CELLS cells.
         """
         self.board_size = board_size
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self._rng = random.Random(self.seed)
+        self._rng_state = None
+        self.tick = 0
+        self.recorder = None
         width, height = board_size
+        self.sparse = width * height > SPARSE_BOARD_CELLS if sparse is None else sparse
+        self._neighbors = None if self.sparse else neighbor_table(width, height)
 
         if initial_position is None:
             initial_position = (width // 2, height // 2)
@@ -22,65 +494,221 @@ class Game:
         self.game_over = False
         self.speed = 1
 
-        self.food = None
+        self._food = NO_FOOD
         self.spawn_food()
 
+    @property
+    def snake(self):
+        """
+        The snake body, head first. Assigning a list replaces the whole body.
+        """
+        return self._snake
+
+    @snake.setter
+    def snake(self, segments):
+        if not isinstance(segments, SnakeBody):
+            body_class = SparseSnakeBody if self.sparse else SnakeBody
+            segments = body_class(segments, self.board_size)
+        self._snake = segments
+
+    @property
+    def rng(self):
+        """
+        The game's own random generator.
+        Clones share one cached generator state and only build their own on first use.
+        """
+        if self._rng is None:
+            version, mt_state, gauss_next = self._rng_state
+            self._rng = random.Random()
+            # A restored state keeps the snapshot's array until a generator is needed
+            self._rng.setstate((version, tuple(mt_state), gauss_next))
+        # The caller may draw from it, so a cached state is no longer trusted
+        self._rng_state = None
+        return self._rng
+
+    def _shared_rng_state(self):
+        # Immutable RNG state shared with clones and snapshots until the next draw
+        if self._rng_state is None:
+            self._rng_state = self._rng.getstate()
+        return self._rng_state
+
+    @property
+    def direction(self):
+        """
+        The direction of the snake as a name ("up", "down", "left", "right").
+        """
+        return DIRECTIONS[self._direction]
+
+    @direction.setter
+    def direction(self, direction):
+        if direction not in DIRECTION_CODES:
+            raise ValueError(f"Invalid direction: {direction}")
+        self._direction = DIRECTION_CODES[direction]
+
+    @property
+    def food(self):
+        """
+        The food position as (x, y), or None when there is no food.
+        """
+        if self._food == NO_FOOD:
+            return None
+        return self._snake.to_position(self._food)
+
+    @food.setter
+    def food(self, position):
+        self._food = NO_FOOD if position is None else self._snake.to_cell(position)
+
     def update(self):
         """
         Update the snake, used in the game loop.
+        Returns a TickDelta with what changed on this tick, or None if the game was already over.
         """
         if self.game_over:
-            return
+            return None
+        self.tick += 1
 
-        new_head = move_snake(self.snake[0], self.direction)
+        snake = self._snake
+        if self._neighbors is not None:
+            new_head = self._neighbors[snake.head_cell * 4 + self._direction]
+        else:
+            new_head = snake.neighbor(snake.head_cell, self._direction)
 
         # Checking if snake isn't within bounds
-        if not is_within_bounds(new_head, self.board_size):
+        if new_head == WALL:
             self.game_over = True
-            return
-
-        # Checking if snake isn't inside itself
-        for segment in self.snake[:-1]:
-            if check_collision(new_head, segment):
-                self.game_over = True
-                return
+            return TickDelta(self.tick, None, None, self.food, self.score, True)
 
-        # Add "tail" to snake (more like adding new head and old head becomes tail)
-        self.snake.insert(0, new_head)
+        # Checking if snake isn't inside itself (the tail cell is about to be vacated)
+        if snake.is_occupied(new_head) and new_head != snake.tail_cell:
+            self.game_over = True
+            return TickDelta(self.tick, None, None, self.food, self.score, True)
 
         # Check if we've eaten food
-        if self.food and check_collision(new_head, self.food):
+        width = snake.width
+        if new_head == self._food:
+            # Add new head, old head becomes part of the body
+            snake.push_head(new_head)
             self.score += 1
             self.speed = increase_speed(self.score)
             self.spawn_food()
+            tail = None
         else:
-            self.snake.pop()  # Pop if we don't eat anything
+            # Tail leaves first, so the head can take its cell
+            tail = snake.pop_tail()
+            snake.push_head(new_head)
+            tail = (tail % width, tail // width)
+        food = self._food
+        return _new_delta(TickDelta, (self.tick, (new_head % width, new_head // width), tail,
+                                      None if food == NO_FOOD else (food % width, food // width),
+                                      self.score, self.game_over))
 
     def spawn_food(self):
         """
         Provides spawning of the food in the random location.
         """
-        width, height = self.board_size
-
-        # Create a set of all possible positions
-        all_positions = set((x, y) for x in range(width) for y in range(height))
-        snake_positions = set(self.snake)
-        available_positions = list(all_positions - snake_positions)
-
-        # If there are available positions, choose one randomly
-        if available_positions:
-            import random
-            self.food = random.choice(available_positions)
-        else:
+        # Pick straight from the free-cell index kept by the snake body
+        self._food = self._snake.random_free_cell(self.rng)
+        if self._food == NO_FOOD:
             # No available positions, game won
-            self.food = None
             self.game_over = True
 
+    def clone(self):
+        """
+        Returns an independent copy of the game, much cheaper than copy.deepcopy.
+        Made for search bots that try many one-tick futures of the same game:
+        the body is copied as flat arrays and the RNG state is shared until a
+        clone actually needs to spawn food. The recorder is not copied.
+        """
+        other = Game.__new__(Game)
+        other.board_size = self.board_size
+        other.sparse = self.sparse
+        other._neighbors = self._neighbors
+        other._snake = self._snake.copy()
+        other._direction = self._direction
+        other._food = self._food
+        other.score = self.score
+        other.game_over = self.game_over
+        other.speed = self.speed
+        other.seed = self.seed
+        other._rng_state = self._shared_rng_state()
+        other._rng = None
+        other.tick = self.tick
+        other.recorder = None
+        return other
+
+    def snapshot(self):
+        """
+        Returns the complete game state as immutable bytes.
+        Includes the order of the free-cell index and the RNG state, so a restored
+        game goes on exactly like the original would have.
+        """
+        snake = self._snake
+        cells = snake.packed_cells()
+        seed_bytes = self.seed.to_bytes(self.seed.bit_length() // 8 + 1, "little", signed=True)
+        header = _SNAPSHOT_HEADER.pack(
+            self.board_size[0], self.board_size[1], self.tick, self.score, self._direction,
+            self.game_over, self.sparse, self.speed, self._food, len(snake), len(cells) - len(snake),
+            len(seed_bytes))
+        version, mt_state, gauss_next = self._shared_rng_state()
+        rng_bytes = array('I', mt_state).tobytes()
+        gauss = struct.pack("<?d", gauss_next is not None, gauss_next or 0.0)
+        return b"".join((header, seed_bytes, cells.tobytes(), rng_bytes, bytes([version]), gauss))
+
+    def restore(self, snapshot):
+        """
+        Puts the game back into the state saved by snapshot(). Drops any recorder.
+        Args:
+            snapshot (bytes): the output of snapshot().
+        """
+        (width, height, tick, score, direction, game_over, sparse, speed, food,
+         length, packed_count, seed_size) = _SNAPSHOT_HEADER.unpack_from(snapshot)
+        offset = _SNAPSHOT_HEADER.size
+        seed = int.from_bytes(snapshot[offset:offset + seed_size], "little", signed=True)
+        offset += seed_size
+
+        cells = array(cell_typecode(width * height))
+        end = offset + (length + packed_count) * cells.itemsize
+        cells.frombytes(snapshot[offset:end])
+        mt_state = array('I')
+        mt_state.frombytes(snapshot[end:end + 625 * mt_state.itemsize])
+        end += 625 * mt_state.itemsize
+        version = snapshot[end]
+        has_gauss, gauss_next = struct.unpack_from("<?d", snapshot, end + 1)
+
+        self.board_size = (width, height)
+        self.sparse = sparse
+        self._neighbors = None if sparse else neighbor_table(width, height)
+        body_class = SparseSnakeBody if sparse else SnakeBody
+        self._snake = body_class.from_packed_cells(self.board_size, cells, length)
+        self._direction = direction
+        self._food = food
+        self.score = score
+        self.game_over = game_over
+        self.speed = speed
+        self.seed = seed
+        self._rng_state = (version, mt_state, gauss_next if has_gauss else None)
+        self._rng = None
+        self.tick = tick
+        self.recorder = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Creates a new game from the output of snapshot().
+        """
+        game = cls.__new__(cls)
+        game.restore(snapshot)
+        return game
+
     # Checking if we don't change direction into snake body
     def change_direction(self, new_direction):
-        opposites = {"up": "down", "down": "up", "left": "right", "right": "left"}
-        if len(self.snake) <= 1 or new_direction != opposites.get(self.direction):
-            self.direction = new_direction
+        if new_direction not in DIRECTION_CODES:
+            raise ValueError(f"Invalid direction: {new_direction}")
+        code = DIRECTION_CODES[new_direction]
+        if code != self._direction and (len(self._snake) <= 1 or code != OPPOSITE[self._direction]):
+            self._direction = code
+            if self.recorder is not None:
+                self.recorder.record(self.tick, code)
 
 
 def move_snake(position, direction):
@@ -90,17 +718,12 @@ def move_snake(position, direction):
         position (tuple): the position of the snake.
         direction (str): the initial direction of the snake.
     """
-    x, y = position
-    if direction == "up":
-        return (x, y + 1)
-    elif direction == "down":
-        return (x, y - 1)
-    elif direction == "left":
-        return (x - 1, y)
-    elif direction == "right":
-        return (x + 1, y)
-    else:
+    code = DIRECTION_CODES.get(direction)
+    if code is None:
         raise ValueError(f"Invalid direction: {direction}")
+    x, y = position
+    dx, dy = DIRECTION_STEPS[code]
+    return (x + dx, y + dy)
 
 
 def check_collision(position1, position2):
@@ -131,4 +754,4 @@ def increase_speed(score):
     starting_speed = 1
     max_speed = 2
     current_speed = starting_speed + (score // 3) * 0.1
-    return min(current_speed, max_speed)
\ No newline at end of file
+    return min(current_speed, max_speed)
@@ -0,0 +1,170 @@
+import struct
+
+from .engine_core import Game, DIRECTIONS, DIRECTION_CODES
+
+# Header: magic, version, width, height, start x, start y, start direction, seed, end tick, event count
+_MAGIC = b"SNKR"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBHHHHBQII")
+
+
+class Replay:
+    """
+    Everything needed to re-simulate a game: how it started, its seed and the
+    direction changes it received, each stamped with the tick it arrived on.
+    """
+
+    def __init__(self, board_size, initial_position, direction, seed, events=None, end_tick=0):
+        """
+        Args:
+            board_size (tuple): the size of the game board.
+            initial_position (tuple): the position of the snake at tick 0.
+            direction (str): the direction of the snake at tick 0.
+            seed (int): seed of the game's random generator.
+            events (list): (tick, direction) pairs in the order they happened.
+            end_tick (int): the last tick of the recorded game.
+        """
+        self.board_size = tuple(board_size)
+        self.initial_position = tuple(initial_position)
+        self.direction = direction
+        self.seed = seed
+        self.events = events if events is not None else []
+        self.end_tick = end_tick
+
+    def to_bytes(self):
+        """
+        Encodes the replay. Every event is one varint of (tick delta << 2 | direction),
+        so a typical input costs a single byte.
+        """
+        if not 0 <= self.seed < 2 ** 64:
+            raise ValueError("Only 64-bit unsigned seeds can be stored in a replay.")
+        width, height = self.board_size
+        x, y = self.initial_position
+        header = _HEADER.pack(_MAGIC, _VERSION, width, height, x, y, DIRECTION_CODES[self.direction],
+                              self.seed, self.end_tick, len(self.events))
+        body = bytearray()
+        last_tick = 0
+        for tick, direction in self.events:
+            _write_varint(body, ((tick - last_tick) << 2) | DIRECTION_CODES[direction])
+            last_tick = tick
+        return header + bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes a replay produced by to_bytes().
+        """
+        magic, version, width, height, x, y, direction, seed, end_tick, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a replay or unsupported replay version.")
+        events = []
+        offset = _HEADER.size
+        tick = 0
+        for _ in range(count):
+            value, offset = _read_varint(data, offset)
+            tick += value >> 2
+            events.append((tick, DIRECTIONS[value & 3]))
+        return cls((width, height), (x, y), DIRECTIONS[direction], seed, events, end_tick)
+
+
+class ReplayRecorder:
+    """
+    Records the inputs of a game as it is played. Attach it before the first tick;
+    the game reports every accepted direction change to it.
+    """
+
+    def __init__(self, game):
+        """
+        Args:
+            game (Game): the game to record, still at tick 0.
+        """
+        if game.tick != 0:
+            raise ValueError("A replay must be recorded from the first tick.")
+        self.game = game
+        self.replay = Replay(game.board_size, game.snake[0], game.direction, game.seed)
+        game.recorder = self
+
+    def record(self, tick, code):
+        """
+        Stores one direction change. Called by Game.change_direction.
+        """
+        self.replay.events.append((tick, DIRECTIONS[code]))
+
+    def to_bytes(self):
+        """
+        Encodes the recording made so far.
+        """
+        self.replay.end_tick = self.game.tick
+        return self.replay.to_bytes()
+
+
+class ReplayPlayer:
+    """
+    Re-simulates a recorded game as fast as the engine can go, without timers.
+    """
+
+    def __init__(self, replay):
+        """
+        Args:
+            replay (Replay or bytes): the recording to play.
+        """
+        if isinstance(replay, (bytes, bytearray, memoryview)):
+            replay = Replay.from_bytes(bytes(replay))
+        self.replay = replay
+        self.game = Game(board_size=replay.board_size, initial_position=replay.initial_position,
+                         direction=replay.direction, seed=replay.seed)
+        self._next_event = 0
+
+    def advance_to(self, tick):
+        """
+        Runs the game up to the given tick (or until it ends) and returns it.
+        Args:
+            tick (int): the tick to stop at.
+        """
+        game, events = self.game, self.replay.events
+        while game.tick < tick and not game.game_over:
+            # Inputs that arrived on this tick land before it is simulated
+            while self._next_event < len(events) and events[self._next_event][0] <= game.tick:
+                game.change_direction(events[self._next_event][1])
+                self._next_event += 1
+            game.update()
+        return game
+
+    def run(self):
+        """
+        Runs the game to the last recorded tick and returns it.
+        """
+        return self.advance_to(self.replay.end_tick)
+
+    def resume(self):
+        """
+        Runs the game to the last recorded tick like run(), then applies the inputs that
+        arrived on that tick, so the game is exactly as it was when recorded. The returned
+        game records on into a replay holding the same inputs.
+        """
+        if self.game.tick != 0:
+            raise ValueError("A replay can only be resumed from the first tick.")
+        ReplayRecorder(self.game)
+        game, events = self.run(), self.replay.events
+        while self._next_event < len(events) and events[self._next_event][0] <= game.tick:
+            game.change_direction(events[self._next_event][1])
+            self._next_event += 1
+        return game
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
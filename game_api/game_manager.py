@@ -1,194 +1,771 @@
+import atexit
+import os
+import secrets
 import threading
 import time
+from collections import OrderedDict, deque, namedtuple
 from .engine.engine_core import Game
+from .engine.replay import ReplayRecorder
+from .checkpoint import CheckpointStore, Checkpointer, decode_game
 from .database import db as database
+from .persistence import ResultWriter
+from .scheduler import TickScheduler
 import traceback
 
+
 # --- Game State Management ---
-game_instance = None
-game_timer = None
-game_lock = threading.Lock() # Lock for thread-safe access to shared resources
-player_name_global = None
-map_size_global = None
-game_start_time = None
-is_result_saved = False
+class GameState(namedtuple("GameState", ["tick", "snake", "food", "score", "game_over", "board_size", "speed"])):
+    """
+    Immutable state of a game after one tick, as published for readers.
+    The snake is a tuple of (x, y) positions, head first.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, game):
+        """
+        The full state of a game, copied out of it.
+        """
+        return cls(game.tick, tuple(game.snake), game.food, game.score, game.game_over,
+                   tuple(game.board_size), game.speed)
+
+    def after(self, delta, speed):
+        """
+        The state after a tick, built from this one and the tick's TickDelta.
+        Args:
+            delta (TickDelta): what the tick changed.
+            speed (float): the game's speed after the tick.
+        """
+        snake = self.snake
+        if delta.head is not None:
+            snake = (delta.head,) + (snake[:-1] if delta.tail is not None else snake)
+        return GameState(delta.tick, snake, delta.food, delta.score, delta.game_over, self.board_size, speed)
+
+    def as_dict(self):
+        """
+        The state as plain data for the serializer.
+        """
+        return {
+            "snake": self.snake,
+            "food": self.food,
+            "score": self.score,
+            "game_over": self.game_over,
+            "board_size": list(self.board_size),
+            "speed": self.speed,
+            "tick": self.tick,
+        }
+
 
-def start_new_game(username, map_size):
+class GameSession:
     """
-    Initializes a new game, creates player record, creates Game instance,
-    and starts the game loop timer.
+    One player's game and the bookkeeping around it.
+    Slotted, so a session costs little more than its Game: about 8 KB on a 25x25 board,
+    mostly the body arrays and the 2.5 KB state of the random generator.
+    The game itself is only touched under the session's lock; readers use `state`,
+    the GameState published after the last tick, and need no lock at all.
+    Once a client asks for changes since a tick, `deltas` keeps the TickDeltas of the
+    last DELTA_HISTORY ticks (see session_changes()).
     """
-    global game_instance, game_timer, player_name_global, map_size_global, game_start_time, is_result_saved
-    print(f"Attempting to start new game for {username} size {map_size}")
-    with game_lock:
-        if game_timer:
-            print("DEBUG: Cancelling existing game timer.")
-            game_timer.cancel()
-            game_timer = None
-
-        player_name_global = username
-        map_size_global = map_size
-        game_start_time = time.time()
-        is_result_saved = False
-
-        print("Connecting DB...")
-        if not database.connect():
-            print("ERROR: Could not connect to database.")
-            return False
 
-        print(f"Ensuring player record for {username}...")
-        try:
-            player_id = database.add_player(name=username, map_size=map_size, score=0)
-            if not player_id:
-                print(f"WARN: Failed to ensure player record for {username}.")
-        except Exception as e:
-            print(f"ERROR during database.add_player: {e}")
-            return False
+    __slots__ = ("session_id", "game", "player_name", "map_size", "start_time", "is_result_saved", "task",
+                 "lock", "state", "advanced_at", "last_used", "footprint", "deltas")
+
+    def __init__(self, session_id, game, player_name, map_size):
+        """
+        Args:
+            session_id (str): the id the client uses to reach this session.
+            game (Game): the game being played.
+            player_name (str): name of the player.
+            map_size (int): size of the square board.
+        """
+        self.session_id = session_id
+        self.game = game
+        self.player_name = player_name
+        self.map_size = map_size
+        self.start_time = time.time()
+        self.is_result_saved = False
+        self.task = None
+        self.lock = threading.Lock()
+        self.state = GameState.of(game)
+        self.advanced_at = 0.0 # Lazy ticking: monotonic time of the last tick the game has run
+        self.last_used = 0.0 # Monotonic time of the last client request
+        self.footprint = 0 # Estimated bytes, kept by the registry
+        self.deltas = None # Ring buffer of recent TickDeltas, created on the first request for changes
+
+    def publish(self, delta=None):
+        """
+        Publishes the state after a tick. A single reference assignment, so readers
+        see either the previous state or this one, never a mix.
+        Args:
+            delta (TickDelta): what the tick changed; None rebuilds the state from the game.
+        """
+        if delta is None:
+            self.state = GameState.of(self.game)
+            if self.deltas is not None:
+                self.deltas.clear() # The ticks in between are unknown, so clients resync
+        else:
+            self.state = self.state.after(delta, self.game.speed)
+            if self.deltas is not None:
+                self.deltas.append(delta)
+        if _state_waiters:
+            notify_state_waiters(self.session_id)
+
+
+def new_session_id():
+    """
+    A random, URL-safe session id.
+    """
+    return secrets.token_urlsafe(12)
+
+
+class GameRecord:
+    """
+    What a session keeps of a finished game: its final score, tick and speed.
+    Stands in for the Game, so code that checks game_over needs no special case.
+    """
+
+    __slots__ = ("score", "tick", "speed")
+    game_over = True
+
+    def __init__(self, game):
+        self.score = game.score
+        self.tick = game.tick
+        self.speed = game.speed
+
+
+# Estimated memory of a session: a live one is dominated by its body arrays (a few bytes per
+# board cell) and the random generator, a sparse one (huge boards) by the generator and the
+# snake's deque and set, a finished one by the snake of its final state
+SESSION_BYTES = 3 * 1024
+BYTES_PER_CELL = 8
+RECORD_BYTES = 512
+BYTES_PER_SEGMENT = 64
+
+
+def estimate_footprint(session):
+    """
+    Estimated bytes held by a session.
+    """
+    game = session.game
+    if isinstance(game, GameRecord):
+        return RECORD_BYTES + BYTES_PER_SEGMENT * len(session.state.snake)
+    if game.sparse:
+        return SESSION_BYTES + BYTES_PER_SEGMENT * len(game.snake)
+    return SESSION_BYTES + BYTES_PER_CELL * session.map_size ** 2
+
+
+class SessionRegistry:
+    """
+    All sessions of the process, keyed by session id, least recently used first.
+    Stays bounded without any periodic scan: every client request evicts the least
+    recently used sessions while they have been idle longer than idle_ttl, and
+    creating a session evicts them while there are more than max_sessions or
+    their estimated memory is over memory_budget. Each eviction is O(1) and
+    happens at most once per session. Finished games are demoted to a GameRecord.
+    Evicted sessions are handed to on_evict once the registry's lock is released.
+    """
+
+    def __init__(self, idle_ttl=None, max_sessions=None, memory_budget=None, clock=time.monotonic, on_evict=None,
+                 record_inputs=False):
+        """
+        Args:
+            idle_ttl (float): seconds without a request after which a session is evicted; None keeps them.
+            max_sessions (int): most sessions kept; None for no limit.
+            memory_budget (int): most estimated bytes kept over all sessions; None for no limit.
+            clock (callable): monotonic clock returning seconds.
+            on_evict (callable): called with each evicted session, e.g. to save its result; may use the registry.
+            record_inputs (bool): attach a ReplayRecorder to every new game, so checkpoints store its
+                replay instead of a full snapshot.
+        """
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.memory_budget = memory_budget
+        self.clock = clock
+        self.on_evict = on_evict
+        self.record_inputs = record_inputs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.footprint = 0
+        self.finished = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.evicted_memory = 0
+
+    def create(self, player_name, map_size, session_id=None):
+        """
+        Creates a session with a new game and returns it.
+        Args:
+            player_name (str): name of the player.
+            map_size (int): size of the square board.
+            session_id (str): id chosen by the caller (e.g. a shard router), a random one when None.
+        """
+        with self._lock:
+            if session_id is None:
+                session_id = new_session_id()
+                while session_id in self._sessions:
+                    session_id = new_session_id()
+            elif session_id in self._sessions:
+                raise ValueError(f"Session {session_id} already exists.")
+            game = Game(board_size=(map_size, map_size))
+            if self.record_inputs:
+                ReplayRecorder(game)
+            session = GameSession(session_id, game, player_name, map_size)
+            evicted = self._add(session)
+        self._evicted(evicted)
+        return session
+
+    def adopt(self, session):
+        """
+        Registers an existing session, e.g. one restored from a checkpoint, and returns it.
+        """
+        with self._lock:
+            if session.session_id in self._sessions:
+                raise ValueError(f"Session {session.session_id} already exists.")
+            evicted = self._add(session)
+        self._evicted(evicted)
+        return session
+
+    def _add(self, session):
+        # Called with the lock held
+        session.last_used = self.clock()
+        session.footprint = estimate_footprint(session)
+        self._sessions[session.session_id] = session
+        self.footprint += session.footprint
+        return self._evict(session.last_used)
+
+    def get(self, session_id):
+        """
+        Returns the session with this id, or None. Does not count as a use.
+        """
+        return self._sessions.get(session_id)
+
+    def use(self, session_id):
+        """
+        Returns the session with this id for a client request, or None, and marks it as just used.
+        Sessions idle for too long are evicted first.
+        """
+        now = self.clock()
+        with self._lock:
+            evicted = self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+                if getattr(session.game, "sparse", False):
+                    # A sparse session grows with its snake, so its estimate follows it
+                    self.footprint -= session.footprint
+                    session.footprint = estimate_footprint(session)
+                    self.footprint += session.footprint
+        self._evicted(evicted)
+        return session
+
+    def finish(self, session):
+        """
+        Demotes a session whose game is over to a GameRecord, freeing the game.
+        Returns False if it was already finished or is no longer registered.
+        """
+        with self._lock:
+            if isinstance(session.game, GameRecord) or self._sessions.get(session.session_id) is not session:
+                return False
+            session.game = GameRecord(session.game)
+            self.footprint -= session.footprint
+            session.footprint = estimate_footprint(session)
+            self.footprint += session.footprint
+            self.finished += 1
+            return True
+
+    def remove(self, session_id):
+        """
+        Drops a session and returns it, or None if there was no such session.
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self.footprint -= session.footprint
+            return session
+
+    def stats(self):
+        """
+        Returns the registry counters: estimated bytes, finished games and evictions by cause.
+        """
+        return {
+            "session_bytes": self.footprint,
+            "finished_sessions": self.finished,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+            "evicted_memory": self.evicted_memory,
+        }
+
+    def _evict(self, now):
+        # Called with the lock held; only ever looks at the least recently used session.
+        # Returns the evicted sessions, for _evicted() once the lock is released
+        sessions = self._sessions
+        evicted = []
+        while sessions:
+            session = next(iter(sessions.values()))
+            if self.max_sessions is not None and len(sessions) > self.max_sessions:
+                self.evicted_lru += 1
+            elif self.memory_budget is not None and self.footprint > self.memory_budget and len(sessions) > 1:
+                self.evicted_memory += 1
+            elif self.idle_ttl is not None and now - session.last_used > self.idle_ttl:
+                self.evicted_idle += 1
+            else:
+                break
+            del sessions[session.session_id]
+            self.footprint -= session.footprint
+            # Its game loop stops on its next tick, when it no longer finds the session
+            evicted.append(session)
+        return evicted
+
+    def _evicted(self, evicted):
+        if self.on_evict is not None:
+            for session in evicted:
+                self.on_evict(session)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._sessions.values()))
+
+
+def session_evicted(session):
+    """
+    Wraps up a session evicted from the registry: a game still running gets its result queued
+    like a finished one, so its score is not lost, and its long-polls wake up to find it gone.
+    """
+    if not isinstance(session.game, GameRecord):
+        save_result(session)
+    notify_state_waiters(session.session_id)
+
+
+# Session limits, from the environment: idle seconds before eviction, most sessions and memory budget in MB
+SESSION_IDLE_TTL = float(os.environ.get("SNAKE_SESSION_TTL", 600))
+MAX_SESSIONS = int(os.environ.get("SNAKE_MAX_SESSIONS", 100000))
+SESSION_MEMORY_BUDGET = int(os.environ.get("SNAKE_SESSION_MEMORY_MB", 1024)) * 1024 * 1024
+# Seconds the process waits at exit for queued results to be written before giving up on them
+RESULT_FLUSH_TIMEOUT = float(os.environ.get("SNAKE_RESULT_FLUSH_TIMEOUT", 10))
+
 
-        print("Creating Game instance...")
+sessions = SessionRegistry(SESSION_IDLE_TTL, MAX_SESSIONS, SESSION_MEMORY_BUDGET, on_evict=session_evicted)
+scheduler = TickScheduler() # One thread ticks every session
+game_lock = threading.Lock() # Serializes starting and ending sessions; games have their own locks
+result_writer = ResultWriter(database) # Writes finished games in the background
+atexit.register(result_writer.stop, RESULT_FLUSH_TIMEOUT)
+
+# SNAKE_TICKING=lazy runs no timers: a game only advances when its state is read or a move
+# arrives, catching up on the ticks it owes, so games nobody watches cost no CPU
+lazy_ticking = os.environ.get("SNAKE_TICKING", "scheduled") == "lazy"
+clock = time.monotonic
+checkpointer = None # Saves the live sessions to local disk, see start_checkpoints()
+# Ticks of changes kept per session for ?since= polls; a client further behind gets the full state
+DELTA_HISTORY = 32
+_state_waiters = {} # session id -> [Event, count] of the long-polls waiting on it, see wait_for_state()
+_state_waiters_lock = threading.Lock()
+
+
+def start_new_game(username, map_size, session_id=None):
+    """
+    Creates player record, creates a new game session
+    and schedules its game loop (with lazy ticking, starts its clock instead).
+    Returns the session id, or None if the game could not be started.
+    A shard worker passes the session id its router picked.
+    """
+    print(f"Attempting to start new game for {username} size {map_size}")
+    if not register_player(username, map_size):
+        return None
+
+    print("Creating Game instance...")
+    with game_lock:
         try:
-            game_instance = Game(board_size=(map_size, map_size))
-            print(f"Game instance created. Speed: {game_instance.speed:.2f}")
+            session = sessions.create(username, map_size, session_id)
+            print(f"Game session {session.session_id} created. Speed: {session.game.speed:.2f}")
         except Exception as e:
             print(f"ERROR creating Game instance: {e}")
-            game_instance = None
-            return False
+            return None
+
+        print("Starting game loop...")
+        start_game_loop(session)
+
+        print("start_new_game completed successfully.")
+        return session.session_id
+
+def start_game_loop(session):
+    """
+    Starts advancing a registered session: schedules its ticks, or starts its clock with lazy ticking.
+    This function should only be called when holding the game_lock.
+    """
+    if lazy_ticking:
+        session.advanced_at = clock()
+    else:
+        schedule_game_update(session)
 
-        print(f"New game started log message for {username}...")
+def start_checkpoints(path, interval=None):
+    """
+    Restores the sessions checkpointed at `path`, restarts their game loops and
+    starts checkpointing the live sessions there in the background. New games record
+    their inputs from then on, so each is checkpointed as its replay.
+    Returns the number of restored sessions.
+    Args:
+        path (str): the SQLite checkpoint file.
+        interval (float): seconds between two checkpoints; the checkpoint module's default when None.
+    """
+    global checkpointer
+    sessions.record_inputs = True
+    store = CheckpointStore(path)
+    new_checkpointer = Checkpointer(store, sessions) if interval is None else Checkpointer(store, sessions, interval)
+    restored = restore_sessions(store, new_checkpointer)
+    print(f"Restored {restored} sessions from {path}.")
+    checkpointer = new_checkpointer
+    checkpointer.start()
+    atexit.register(checkpointer.stop)
+    return restored
 
+def restore_sessions(store, restored_by=None):
+    """
+    Registers every session of a checkpoint store that is not running yet and restarts its game loop.
+    Returns the number of restored sessions.
+    Args:
+        store (CheckpointStore): where the sessions were checkpointed.
+        restored_by (Checkpointer): told which sessions are already stored as they are.
+    """
+    restored = 0
+    with game_lock:
+        for session_id, player_name, map_size, start_time, snapshot in store.load():
+            if sessions.get(session_id):
+                continue
+            session = GameSession(session_id, decode_game(snapshot), player_name, map_size)
+            session.start_time = start_time
+            sessions.adopt(session)
+            if restored_by is not None:
+                restored_by.mark_saved(session)
+            start_game_loop(session)
+            restored += 1
+    return restored
 
-        print("Scheduling initial game update...")
-        schedule_game_update()
+def register_player(username, map_size):
+    """
+    Connects the database and makes sure the player has a record.
+    Returns False if the game cannot go on.
+    """
+    print("Connecting DB...")
+    if not database.connect():
+        print("ERROR: Could not connect to database.")
+        return False
 
-        print("start_new_game completed successfully.")
-        return True
+    print(f"Ensuring player record for {username}...")
+    try:
+        player_id = database.add_player(name=username, map_size=map_size, score=0)
+        if not player_id:
+            print(f"WARN: Failed to ensure player record for {username}.")
+    except Exception as e:
+        print(f"ERROR during database.add_player: {e}")
+        return False
+    return True
+
+def end_session(session_id):
+    """
+    Stops the game loop of a session and forgets it.
+    Returns True if the session existed.
+    """
+    with game_lock:
+        session = sessions.remove(session_id)
+        if not session:
+            return False
+        if session.task:
+            session.task.cancel()
+            session.task = None
+    notify_state_waiters(session_id)
+    return True
+
+def tick_interval(game):
+    """
+    Seconds between two ticks of a game at its current speed.
+    """
+    return 1.0 / game.speed if game.speed > 0 else 1.0
 
-def schedule_game_update():
+def schedule_game_update(session):
     """
-    Schedules the next call to update_game_state using threading.Timer.
+    Starts the game loop of a session on the shared tick scheduler.
     This function should only be called when holding the game_lock.
     """
-    global game_timer, game_instance
-    if game_timer:
-        game_timer.cancel()
-        game_timer = None
+    if session.task:
+        session.task.cancel()
+        session.task = None
 
-    if game_instance and not game_instance.game_over:
-        interval = 1.0 / game_instance.speed if game_instance.speed > 0 else 1.0
-        game_timer = threading.Timer(interval, update_game_state_wrapper)
-        game_timer.daemon = True
-        game_timer.start()
+    if not session.game.game_over and sessions.get(session.session_id) is session:
+        session.task = scheduler.schedule(update_game_state_wrapper, tick_interval(session.game), session)
     else:
-        print("DEBUG: Not scheduling update (game over or no instance).")
+        print(f"DEBUG: Not scheduling update for {session.session_id} (game over or session ended).")
 
 
-def update_game_state_wrapper():
+def update_game_state_wrapper(session):
     """
-    Wrapper function to acquire the lock before calling the main update logic.
-    This is the function the Timer will actually call.
+    Wrapper function to acquire the session's lock before calling the main update logic.
+    This is the function the scheduler will actually call; returns its next delay.
+    A finished game is wrapped up after the lock is released.
     """
-    with game_lock:
-        update_game_state()
+    with session.lock:
+        delay = update_game_state(session)
+    if delay is None and session.game.game_over:
+        finish_game(session)
+    return delay
 
-def update_game_state():
+def update_game_state(session):
     """
-    Updates the game state by calling the engine's update method.
-    Handles game over logic and result saving.
-    Schedules the next update if the game is still running.
-    Assumes game_lock is already held by the caller (update_game_state_wrapper).
+    Updates the game state of a session by calling the engine's update method
+    and publishes the new state for readers.
+    Returns the delay until the next update while the game is still running, else None.
+    Assumes session.lock is already held by the caller (update_game_state_wrapper).
     """
-    global game_instance, is_result_saved, game_start_time, player_name_global, map_size_global
+    game = session.game
+    if sessions.get(session.session_id) is not session:
+        print(f"Warning: update_game_state called for ended session {session.session_id}.")
+        return None
+
+    if not game.game_over:
+        try:
+            session.publish(game.update())
+        except Exception as e:
+             print(f"ERROR during game.update(): {e}")
+             game.game_over = True
+             session.publish()
+
+        if not game.game_over:
 
-    if not game_instance:
-        print("Warning: update_game_state called without active game instance.")
+             # If game is still running, the next tick follows the current speed
+             return tick_interval(game)
+    return None
+
+def advance_session(session):
+    """
+    Lazy ticking: runs the ticks a session's game owes since it was last advanced.
+    Returns at once, without the lock, when no tick is due.
+    """
+    game = session.game
+    if game.game_over or clock() < session.advanced_at + tick_interval(game):
         return
+    with session.lock:
+        ended = catch_up(session, clock())
+    if ended:
+        finish_game(session)
 
-    if not game_instance.game_over:
+def catch_up(session, now):
+    """
+    Runs every tick of a session's game due by `now`, each at the speed of its own tick,
+    exactly as the scheduler would have, and publishes the state once at the end
+    (after every tick when the session keeps a ring buffer of changes).
+    Returns True if these ticks ended the game.
+    Assumes session.lock is already held by the caller.
+    """
+    game = session.game
+    ticks = 0
+    per_tick = session.deltas is not None
+    # A game left alone runs into a wall within a board's width, so this loop is short
+    while not game.game_over and session.advanced_at + tick_interval(game) <= now:
+        session.advanced_at += tick_interval(game)
+        ticks += 1
         try:
-            game_instance.update()
+            delta = game.update()
         except Exception as e:
-             print(f"ERROR during game_instance.update(): {e}")
-             game_instance.game_over = True
-
-        if game_instance.game_over and not is_result_saved:
-            print(f"Game over detected for {player_name_global}. Final score: {game_instance.score}")
-            if database.is_connected and player_name_global and game_start_time:
-                duration = time.time() - game_start_time
-                try:
-                    result_id = database.add_game_result(
-                        player_name=player_name_global,
-                        map_size=map_size_global,
-                        score=game_instance.score,
-                        duration=duration
-                    )
-                    if result_id:
-                        print(f"Game result saved successfully (ID: {result_id}).")
-                        is_result_saved = True
-                    else:
-                         print("Error: Failed to save game result to database (add_game_result returned None/False).")
-                except Exception as e:
-                     print(f"ERROR during database.add_game_result: {e}")
-            else:
-                print("Warning: Cannot save result - DB not connected or player info missing.")
+            print(f"ERROR during game.update(): {e}")
+            game.game_over = True
+            delta = None
+        if per_tick:
+            session.publish(delta)
+    if ticks and not per_tick:
+        session.publish()
+    return ticks > 0 and game.game_over
+
+def finish_game(session):
+    """
+    Wraps up a game that just ended: demotes its session to a compact record and queues its result.
+    Does nothing for a session already finished or no longer registered.
+    """
+    if sessions.finish(session):
+        save_result(session)
+
+def save_result(session):
+    """
+    Queues the result of a finished game for the background writer; never waits on the database.
+    session.is_result_saved is set once the writer has stored it.
+    """
+    print(f"Game over detected for {session.player_name}. Final score: {session.game.score}")
+    if database.is_connected and session.player_name and session.start_time:
+        duration = time.time() - session.start_time
+        if not result_writer.submit(session.player_name, session.map_size, session.game.score, duration,
+                                    callback=lambda result_id: _result_saved(session, result_id)):
+            print("Error: Result queue is full, game result dropped.")
+    else:
+        print("Warning: Cannot save result - DB not connected or player info missing.")
+
+def _result_saved(session, result_id):
+    # Runs on the writer thread
+    if result_id:
+        print(f"Game result saved successfully (ID: {result_id}).")
+        session.is_result_saved = True
+    else:
+        print("Error: Failed to save game result to database.")
 
-        elif not game_instance.game_over:
-             # If game is still running, schedule the next update
-             schedule_game_update()
 
+def get_scheduler_stats():
+    """
+    Returns the tick scheduler, registry and result writer counters together with the number of sessions.
+    """
+    stats = {"sessions": len(sessions), **sessions.stats(), **scheduler.stats(), **result_writer.stats()}
+    if checkpointer is not None:
+        stats.update(checkpointer.stats())
+    return stats
 
-def get_current_state():
+
+def get_current_state(session_id):
     """
-    Retrieves the current state of the game instance.
+    Retrieves the state published by a session's last tick, or None for an unknown session.
+    Takes no lock, so polling never holds up a tick (with lazy ticking, only while no tick is due).
     """
-    global game_instance
-    with game_lock:
-        if game_instance:
-            try:
-                state = {
-                    "snake": game_instance.snake,
-                    "food": game_instance.food,
-                    "score": game_instance.score,
-                    "game_over": game_instance.game_over,
-                    "board_size": list(game_instance.board_size),
-                    "speed": game_instance.speed
-                }
-                return state
-            except Exception as e:
-                 print(f"ERROR in get_current_state: {e}")
-        return {
-            "snake": [], "food": None, "score": 0, "game_over": True,
-            "board_size": [10, 10], "speed": 0
-        }
+    session = sessions.use(session_id)
+    if not session:
+        return None
+    if lazy_ticking:
+        advance_session(session)
+    return session_state(session)
+
+
+def wait_for_state(session_id, since, timeout):
+    """
+    Long-poll: waits up to `timeout` seconds for a session to publish a state newer than
+    tick `since`, and returns it. Returns at once if the state is already newer or the game
+    is over, the unchanged state on timeout, and None for an unknown or ended session.
+    With lazy ticking the waiter sleeps until the next tick is due and runs it itself.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        state = get_current_state(session_id)
+        remaining = deadline - time.monotonic()
+        if state is None or state["tick"] > since or state["game_over"] or remaining <= 0:
+            return state
+        session = sessions.get(session_id)
+        if session is None:
+            return None
+        if lazy_ticking:
+            time.sleep(min(remaining, max(session.advanced_at + tick_interval(session.game) - clock(), 0.001)))
+        else:
+            _wait_published(session, since, remaining)
+
+def _wait_published(session, since, timeout):
+    # All waiters of a session share one [Event, waiter count], set by its next publish()
+    with _state_waiters_lock:
+        waiter = _state_waiters.get(session.session_id)
+        if waiter is None:
+            waiter = _state_waiters[session.session_id] = [threading.Event(), 0]
+        waiter[1] += 1
+    try:
+        # Checked again once registered, so a tick published in between is not missed
+        if session.state.tick <= since and not session.state.game_over:
+            waiter[0].wait(timeout)
+    finally:
+        with _state_waiters_lock:
+            waiter[1] -= 1
+            if not waiter[1] and _state_waiters.get(session.session_id) is waiter:
+                del _state_waiters[session.session_id]
+
+def notify_state_waiters(session_id):
+    """
+    Wakes the long-polls waiting on a session (see wait_for_state()).
+    """
+    with _state_waiters_lock:
+        waiter = _state_waiters.pop(session_id, None)
+    if waiter is not None:
+        waiter[0].set()
+
+
+def session_state(session):
+    """
+    The published state of a session's game as plain data for the serializer.
+    """
+    return session.state.as_dict()
+
+
+def session_changes(session, since):
+    """
+    What changed in a session's published state after tick `since`, from its ring buffer of
+    recent ticks: the new head cells (oldest first), the number of cells that left the tail,
+    and the food, score, game over flag, board size and speed now. Its size does not grow
+    with the snake. A client applies it by putting the new heads in front of its snake,
+    newest first, and then dropping `removed` cells from the tail end.
+    Falls back to the full state (session_state()) when the client is too far behind, ahead,
+    or the first time changes are asked for, which starts the ring buffer.
+    """
+    state = session.state
+    deltas = session.deltas
+    if deltas is None:
+        session.deltas = deque(maxlen=DELTA_HISTORY)
+        return state.as_dict()
+    if since == state.tick:
+        changes = ()
+    else:
+        # Ticks published after `state` was read may already be in the buffer
+        changes = [delta for delta in list(deltas) if since < delta.tick <= state.tick]
+        if not changes or changes[0].tick != since + 1 or changes[-1].tick != state.tick:
+            return state.as_dict()
+    return {
+        "since": since,
+        "tick": state.tick,
+        "head": [delta.head for delta in changes if delta.head is not None],
+        "removed": sum(1 for delta in changes if delta.tail is not None),
+        "food": state.food,
+        "score": state.score,
+        "game_over": state.game_over,
+        "board_size": list(state.board_size),
+        "speed": state.speed,
+    }
 
 
-def process_move(direction):
+def get_changes(session_id, since, timeout=0):
+    """
+    Delta poll: the changes in a session's state after tick `since` (see session_changes()),
+    waiting up to `timeout` seconds for a newer tick first like wait_for_state().
+    Returns None for an unknown or ended session.
+    """
+    if timeout:
+        state = wait_for_state(session_id, since, timeout)
+    else:
+        state = get_current_state(session_id)
+    session = sessions.get(session_id)
+    if state is None or session is None:
+        return None
+    return session_changes(session, since)
+
+
+def process_move(session_id, direction):
     """
     Processes a player's move request by changing the snake's direction.
-    Acquires lock only for the direction change, then releases it before getting state.
+    Acquires the session's lock only for the direction change, then releases it before getting state.
+    Returns the state after the move, or None for an unknown session.
     """
-    global game_instance, player_name_global
-    print(f"DEBUG [game_manager]: Entered process_move with direction '{direction}'") # Log entry
+    print(f"DEBUG [game_manager]: Entered process_move for {session_id} with direction '{direction}'") # Log entry
 
-    processed_successfully = False
-    with game_lock: # Acquire lock ONLY for accessing/modifying game_instance directly
-        if game_instance and not game_instance.game_over:
+    session = sessions.use(session_id)
+    if not session:
+        print("DEBUG [game_manager]: Move ignored: Unknown session.")
+        return None
+    ended = False
+    with session.lock: # Acquire lock ONLY for accessing/modifying the game directly
+        if lazy_ticking:
+            # Ticks due before the move still run in the old direction
+            ended = catch_up(session, clock())
+        if not session.game.game_over:
             try:
-                game_instance.change_direction(direction)
-                print(f"DEBUG [game_manager]: game_instance.change_direction('{direction}') called.")
-                processed_successfully = True
+                session.game.change_direction(direction)
+                print(f"DEBUG [game_manager]: game.change_direction('{direction}') called.")
             except Exception as e:
-                 print(f"ERROR [game_manager]: Exception during game_instance.change_direction: {e}")
+                 print(f"ERROR [game_manager]: Exception during game.change_direction: {e}")
                  traceback.print_exc() # Print traceback on error
-        elif game_instance and game_instance.game_over:
-             print("DEBUG [game_manager]: Move ignored: Game is already over.")
         else:
-             print("DEBUG [game_manager]: Move ignored: No active game instance.")
-
-
-    if processed_successfully:
-        print(f"DEBUG [game_manager]: process_move finished processing '{direction}'. Now getting current state...")
-    else:
-        print(f"DEBUG [game_manager]: process_move did not change direction. Getting current state...")
-
-    return get_current_state()
+             print("DEBUG [game_manager]: Move ignored: Game is already over.")
+    if ended:
+        finish_game(session)
 
+    return session_state(session)
@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+from bson.objectid import ObjectId
+
+# Results waiting beyond this many are dropped instead of blocking the game loop
+RESULT_QUEUE_SIZE = 10000
+# Results are written in batches of up to BATCH_SIZE, waiting at most BATCH_WINDOW seconds for a batch to fill
+BATCH_SIZE = 100
+BATCH_WINDOW = 0.05
+# Attempts after the first failed write, with the delay doubling from RETRY_DELAY seconds
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.5
+
+# A finished game waiting to be written; callback(result_id) runs after the write, with None on failure.
+# result_id is the _id it is written with, picked once so every retry writes the same document
+PendingResult = namedtuple("PendingResult", ["player_name", "map_size", "score", "duration", "result_id", "callback"])
+
+_STOP = object()
+
+
+class ResultWriter:
+    """
+    Write-behind stage for game results. Game loops only put results on a bounded
+    queue; one background thread writes them to the database, retrying failed
+    writes, so a slow database never holds up a tick, a move or a state request.
+    Results arriving together are coalesced into one batched write: the writer
+    takes what is queued, waiting up to batch_window for more, until batch_size.
+    """
+
+    def __init__(self, database, max_queue=RESULT_QUEUE_SIZE, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW,
+                 retries=WRITE_RETRIES, retry_delay=RETRY_DELAY, clock=time.perf_counter):
+        """
+        Args:
+            database (Database): where results are written, through add_game_results().
+            max_queue (int): results that may wait for the writer before new ones are dropped.
+            batch_size (int): most results written in one batch.
+            batch_window (float): seconds the writer waits for a batch to fill once it has a result.
+            retries (int): attempts after the first failed write of a result; only failed results of a batch are retried.
+            retry_delay (float): seconds before the first retry, doubled on every further one.
+            clock (callable): clock returning seconds, for the write latency.
+        """
+        self.database = database
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.clock = clock
+        self._queue = queue.Queue(max_queue)
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._thread = None
+        self.writes = 0
+        self.write_batches = 0
+        self.write_retries = 0
+        self.write_failures = 0
+        self.writes_dropped = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+
+    def submit(self, player_name, map_size, score, duration, callback=None):
+        """
+        Queues a game result for writing without waiting. Returns False if the queue is full and the result was dropped.
+        Args:
+            player_name (str): name of the player.
+            map_size (int): size of the square board.
+            score (int): final score.
+            duration (float): length of the game in seconds.
+            callback (callable): called from the writer thread with the result id, or None if the write failed.
+        """
+        with self._condition:
+            try:
+                self._queue.put_nowait(PendingResult(player_name, map_size, score, duration, ObjectId(), callback))
+            except queue.Full:
+                self.writes_dropped += 1
+                return False
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+                self._thread.start()
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued result has been written or given up on. Returns False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout=None):
+        """
+        Flushes the queue and stops the writer thread; a later submit() starts it again.
+        Returns False if results were still unwritten after `timeout` seconds; they are given up on.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        flushed = self.flush(timeout)
+        with self._condition:
+            thread, self._thread = self._thread, None
+            abandoned = self._pending
+        if thread is not None:
+            try:
+                self._queue.put(_STOP, timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                pass # The thread is daemonic: it dies with the process
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        if not flushed:
+            print(f"Result writer stopped after {timeout}s with {abandoned} results unwritten.")
+        return flushed
+
+    def stats(self):
+        """
+        Returns the writer counters: queue depth, results written, batches, retries, failures, drops
+        and the latency of a batch write in ms.
+        """
+        return {
+            "write_queue": self._queue.qsize(),
+            "writes": self.writes,
+            "write_batches": self.write_batches,
+            "write_retries": self.write_retries,
+            "write_failures": self.write_failures,
+            "writes_dropped": self.writes_dropped,
+            "avg_write_ms": round(self.write_seconds / self.write_batches * 1000, 3) if self.write_batches else 0.0,
+            "max_write_ms": round(self.max_write_seconds * 1000, 3),
+        }
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            try:
+                if batch:
+                    self._write(batch)
+            finally:
+                with self._condition:
+                    self._pending -= len(batch)
+                    self._condition.notify_all()
+            if stop:
+                return
+
+    def _next_batch(self):
+        # Blocks for the first result, then takes more until the batch is full or the window closes
+        batch = []
+        result = self._queue.get()
+        deadline = time.monotonic() + self.batch_window
+        while result is not _STOP:
+            batch.append(result)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                result = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _write(self, batch):
+        pending = batch
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.write_retries += len(pending)
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            start = self.clock()
+            try:
+                ids = self.database.add_game_results([
+                    {"_id": result.result_id, "player_name": result.player_name, "map_size": result.map_size,
+                     "score": result.score, "duration": result.duration}
+                    for result in pending
+                ])
+            except Exception as e:
+                print(f"ERROR writing a batch of {len(pending)} game results: {e}")
+                ids = [None] * len(pending)
+            elapsed = self.clock() - start
+            self.write_batches += 1
+            self.write_seconds += elapsed
+            self.max_write_seconds = max(self.max_write_seconds, elapsed)
+
+            failed = []
+            for result, result_id in zip(pending, ids):
+                if result_id:
+                    self.writes += 1
+                    self._done(result, result_id)
+                else:
+                    failed.append(result)
+            if not failed:
+                return
+            pending = failed
+        self.write_failures += len(pending)
+        print(f"Error: Giving up on {len(pending)} game results after {self.retries + 1} attempts.")
+        for result in pending:
+            self._done(result, None)
+
+    def _done(self, result, result_id):
+        if result.callback is not None:
+            try:
+                result.callback(result_id)
+            except Exception:
+                traceback.print_exc()
@@ -1,3 +1,4 @@
+import os
 import pygame
 import sys
 import time
@@ -48,6 +49,11 @@ class UI:
         self.grid_size = 10
         self.cell_size = 50
 
+        # Grid size limits, the maximum follows SNAKE_MAX_MAP_SIZE like the web API
+        # (capped so a cell is still at least 5px wide in the 500px window)
+        self.min_grid_size = 5
+        self.max_grid_size = max(self.min_grid_size, min(int(os.environ.get("SNAKE_MAX_MAP_SIZE", 25)), 100))
+
         # Update timing
         self.last_update_time = 0
         self.update_interval = 1000  # milliseconds (will be adjusted by game speed)
@@ -73,7 +79,7 @@ class UI:
         self.grid_size = 10
         input_rect = pygame.Rect(150, 250, 200, 32)
         slider_rect = pygame.Rect(150, 350, 200, 10)
-        slider_button_rect = pygame.Rect(150 + (self.grid_size - 5) * 10, 345, 20, 20)
+        slider_button_rect = pygame.Rect(self._slider_x(slider_rect), 345, 20, 20)
 
         start_button = pygame.Rect(150, 450, 200, 50)
 
@@ -120,8 +126,9 @@ class UI:
                     # Update grid size based on slider position
                     x_pos = max(slider_rect.left, min(slider_rect.right, mouse_pos[0]))
                     rel_pos = (x_pos - slider_rect.left) / slider_rect.width
-                    self.grid_size = max(5, min(25, int(5 + rel_pos * 20)))
-                    slider_button_rect.x = slider_rect.left + (self.grid_size - 5) * 10
+                    size_range = self.max_grid_size - self.min_grid_size
+                    self.grid_size = max(self.min_grid_size, min(self.max_grid_size, int(self.min_grid_size + rel_pos * size_range)))
+                    slider_button_rect.x = self._slider_x(slider_rect)
 
                 # Keyboard input for name
                 if event.type == pygame.KEYDOWN:
@@ -172,10 +179,10 @@ class UI:
             pygame.draw.rect(screen, slider_button_color, slider_button_rect)
 
             # Draw min/max labels
-            min_label = self.small_font.render('5x5', True, self.WHITE)
+            min_label = self.small_font.render(f'{self.min_grid_size}x{self.min_grid_size}', True, self.WHITE)
             screen.blit(min_label, (slider_rect.left - 30, slider_rect.y - 5))
 
-            max_label = self.small_font.render('25x25', True, self.WHITE)
+            max_label = self.small_font.render(f'{self.max_grid_size}x{self.max_grid_size}', True, self.WHITE)
             screen.blit(max_label, (slider_rect.right + 5, slider_rect.y - 5))
 
             # Draw start button
@@ -200,6 +207,13 @@ class UI:
             pygame.display.flip()
             clock.tick(60)
 
+    def _slider_x(self, slider_rect):
+        """
+        Position of the slider button for the current grid size.
+        """
+        size_range = max(1, self.max_grid_size - self.min_grid_size)
+        return slider_rect.left + (self.grid_size - self.min_grid_size) * (slider_rect.width - 20) // size_range
+
     def setup_game(self):
         """
         Set up the game based on user selections
@@ -0,0 +1,153 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+# A tick that runs this much (seconds) after its deadline counts as late
+LATE_TICK_THRESHOLD = 0.005
+
+
+class ScheduledTask:
+    """
+    A repeating job of the scheduler. Its callback returns the delay until
+    the next run in seconds, or None to stop.
+    """
+
+    __slots__ = ("callback", "args", "deadline", "cancelled", "ticks", "late_ticks")
+
+    def __init__(self, callback, args, deadline):
+        self.callback = callback
+        self.args = args
+        self.deadline = deadline
+        self.cancelled = False
+        self.ticks = 0
+        self.late_ticks = 0
+
+    def cancel(self):
+        """
+        Stops the task; a run already in progress still finishes.
+        """
+        self.cancelled = True
+
+
+class TickScheduler:
+    """
+    Drives every game loop of the process from one thread.
+    Tasks sit in a heap keyed on monotonic deadlines. The next deadline of a task
+    is its previous deadline plus the delay its callback returned, not the time
+    the callback finished, so slow updates do not make the loop drift. A task
+    that fell behind runs right away instead of bursting to catch up.
+    """
+
+    def __init__(self, clock=time.monotonic, late_threshold=LATE_TICK_THRESHOLD):
+        """
+        Args:
+            clock (callable): monotonic clock returning seconds.
+            late_threshold (float): how late (seconds) a tick may run before it counts as late.
+        """
+        self.clock = clock
+        self.late_threshold = late_threshold
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.ticks = 0
+        self.late_ticks = 0
+        self.max_lateness = 0.0
+
+    def schedule(self, callback, delay, *args):
+        """
+        Runs callback(*args) after delay seconds, then again after every delay it returns.
+        Returns the ScheduledTask, which can be cancelled.
+        Args:
+            callback (callable): the job, returning the next delay or None.
+            delay (float): seconds until the first run.
+        """
+        task = ScheduledTask(callback, args, self.clock() + delay)
+        with self._condition:
+            self._push(task)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="tick-scheduler", daemon=True)
+                self._thread.start()
+        return task
+
+    def stop(self):
+        """
+        Stops the scheduler thread. Pending tasks stay in the heap and resume on the next schedule().
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        """
+        Returns the scheduler counters: pending tasks, ticks run, late ticks and the worst lateness in ms.
+        """
+        with self._condition:
+            pending = sum(1 for _, _, task in self._heap if not task.cancelled)
+        return {
+            "tasks": pending,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "max_lateness_ms": round(self.max_lateness * 1000, 3),
+        }
+
+    def _push(self, task):
+        # Called with the condition held; wake the thread if this is the new earliest deadline
+        heapq.heappush(self._heap, (task.deadline, next(self._counter), task))
+        if self._heap[0][2] is task:
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                task = self._next_due()
+                if task is None:
+                    return
+            self._run_task(task)
+
+    def _next_due(self):
+        # Waits for the earliest live task to be due and pops it; None once stopped
+        heap = self._heap
+        while self._running:
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap)
+            if not heap:
+                self._condition.wait()
+                continue
+            wait = heap[0][0] - self.clock()
+            if wait > 0:
+                self._condition.wait(wait)
+                continue
+            return heapq.heappop(heap)[2]
+        return None
+
+    def _run_task(self, task):
+        now = self.clock()
+        lateness = now - task.deadline
+        task.ticks += 1
+        self.ticks += 1
+        if lateness > self.late_threshold:
+            task.late_ticks += 1
+            self.late_ticks += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+
+        try:
+            delay = task.callback(*task.args)
+        except Exception as e:
+            print(f"ERROR in scheduled task {task.callback.__name__}: {e}")
+            traceback.print_exc()
+            delay = None
+
+        if delay is None or task.cancelled:
+            return
+        # Absolute deadlines: no drift, and no burst of catch-up ticks after a stall
+        task.deadline = max(task.deadline + delay, now)
+        with self._condition:
+            self._push(task)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 
 class GameStateSerializer(serializers.Serializer):
@@ -7,10 +8,12 @@ class GameStateSerializer(serializers.Serializer):
     game_over = serializers.BooleanField()
     board_size = serializers.ListField(child=serializers.IntegerField(), min_length=2, max_length=2)
     speed = serializers.FloatField()
+    tick = serializers.IntegerField(required=False) # Tick the state was published at
 
 class MoveSerializer(serializers.Serializer):
+    session_id = serializers.CharField(max_length=64)
     direction = serializers.ChoiceField(choices=["up", "down", "left", "right"])
 
 class StartGameSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=100, trim_whitespace=True) # Trim whitespace
-    map_size = serializers.IntegerField(min_value=5, max_value=25)
\ No newline at end of file
+    map_size = serializers.IntegerField(min_value=settings.SNAKE_MIN_MAP_SIZE, max_value=settings.SNAKE_MAX_MAP_SIZE)
\ No newline at end of file
@@ -0,0 +1,216 @@
+import atexit
+import multiprocessing
+import os
+import secrets
+import sys
+import threading
+import traceback
+import zlib
+from multiprocessing.connection import Client, Listener
+
+from . import game_manager
+
+
+def shard_for(session_id, n_shards):
+    """
+    The shard owning a session. A stable hash, so every front process agrees.
+    """
+    return zlib.crc32(session_id.encode()) % n_shards
+
+
+# --- Shard worker (runs in its own process) ---
+# Every shard is the plain threaded runtime (game_manager) in a process of its own,
+# answering (command, args) requests from routers over multiprocessing connections.
+_COMMANDS = {
+    "start": game_manager.start_new_game,
+    "state": game_manager.get_current_state,
+    "wait": game_manager.wait_for_state,
+    "changes": game_manager.get_changes,
+    "move": game_manager.process_move,
+    "end": game_manager.end_session,
+    "stats": game_manager.get_scheduler_stats,
+}
+
+
+def _serve_connection(connection):
+    with connection:
+        while True:
+            try:
+                command, args = connection.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = (True, _COMMANDS[command](*args))
+            except Exception as e:
+                traceback.print_exc()
+                reply = (False, f"{type(e).__name__}: {e}")
+            connection.send(reply)
+
+
+def _worker_main(index, authkey, ready, initializer, quiet):
+    if quiet:
+        # The game manager logs every request; a busy shard would spend its time printing
+        sys.stdout = open(os.devnull, "w")
+    if initializer is not None:
+        initializer()
+    listener = Listener(("127.0.0.1", 0), authkey=authkey)
+    ready.send((index, listener.address))
+    ready.close()
+    while True:
+        connection = listener.accept()
+        threading.Thread(target=_serve_connection, args=(connection,), daemon=True).start()
+
+
+class ShardPool:
+    """
+    Starts N shard worker processes on this machine, each hosting its own part of the sessions
+    with its own interpreter, GIL and tick scheduler.
+    """
+
+    def __init__(self, n_shards=None, initializer=None, quiet=True):
+        """
+        Args:
+            n_shards (int): number of worker processes, one per CPU core when None.
+            initializer (callable): picklable function run in each worker before it serves requests.
+            quiet (bool): silence the game manager's logging inside the workers.
+        """
+        self.n_shards = n_shards or os.cpu_count() or 1
+        self.initializer = initializer
+        self.quiet = quiet
+        self.authkey = secrets.token_bytes(16)
+        self.addresses = []
+        self._processes = []
+
+    def start(self):
+        """
+        Spawns the workers and waits until every one of them listens. Returns the pool.
+        """
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        for index in range(self.n_shards):
+            process = context.Process(target=_worker_main, name=f"snake-shard-{index}", daemon=True,
+                                      args=(index, self.authkey, sender, self.initializer, self.quiet))
+            process.start()
+            self._processes.append(process)
+        sender.close()
+        addresses = dict(receiver.recv() for _ in range(self.n_shards))
+        receiver.close()
+        self.addresses = [addresses[index] for index in range(self.n_shards)]
+        return self
+
+    def router(self):
+        """
+        Returns a router to this pool's shards.
+        """
+        return ShardRouter(self.addresses, self.authkey)
+
+    def stop(self):
+        """
+        Terminates the workers; their sessions are lost.
+        """
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class ShardRouter:
+    """
+    Front side of the sharded runtime: picks the shard of every session from its id and
+    forwards the call. Same functions and return values as game_manager, so views can
+    use either. Each thread keeps its own connection per shard, so concurrent requests
+    to different shards (or to one shard) do not queue behind each other.
+    """
+
+    def __init__(self, addresses, authkey):
+        """
+        Args:
+            addresses (list): listener address of every shard, in shard order.
+            authkey (bytes): the pool's authentication key.
+        """
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _call(self, shard, command, *args):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        connection = connections.get(shard)
+        if connection is None:
+            connection = connections[shard] = Client(self.addresses[shard], authkey=self.authkey)
+        try:
+            connection.send((command, args))
+            ok, value = connection.recv()
+        except (EOFError, OSError):
+            connections.pop(shard, None)
+            raise
+        if not ok:
+            raise RuntimeError(f"Shard {shard} failed on {command}: {value}")
+        return value
+
+    def shard_for(self, session_id):
+        return shard_for(session_id, len(self.addresses))
+
+    def start_new_game(self, username, map_size):
+        """
+        Starts a game on the shard its new session id maps to. Returns the session id or None.
+        """
+        session_id = game_manager.new_session_id()
+        return self._call(self.shard_for(session_id), "start", username, map_size, session_id)
+
+    def get_current_state(self, session_id):
+        return self._call(self.shard_for(session_id), "state", session_id)
+
+    def wait_for_state(self, session_id, since, timeout):
+        # Blocks only this thread's connection; the shard serves it from a thread of its own
+        return self._call(self.shard_for(session_id), "wait", session_id, since, timeout)
+
+    def get_changes(self, session_id, since, timeout=0):
+        return self._call(self.shard_for(session_id), "changes", session_id, since, timeout)
+
+    def process_move(self, session_id, direction):
+        return self._call(self.shard_for(session_id), "move", session_id, direction)
+
+    def end_session(self, session_id):
+        return self._call(self.shard_for(session_id), "end", session_id)
+
+    def get_scheduler_stats(self):
+        """
+        Scheduler counters summed over all shards (worst cases are the maximum, averages the mean).
+        """
+        shards = [self._call(shard, "stats") for shard in range(len(self.addresses))]
+        total = {key: sum(stats[key] for stats in shards) for key in shards[0]}
+        for key in total:
+            if key.startswith("max_"):
+                total[key] = max(stats[key] for stats in shards)
+            elif key.startswith("avg_"):
+                total[key] = round(total[key] / len(shards), 3)
+        total["shards"] = len(shards)
+        return total
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router(n_shards=None):
+    """
+    Router to the shard pool of this process, spawning the pool on first use.
+    Args:
+        n_shards (int): number of worker processes, one per CPU core when None.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            pool = ShardPool(n_shards).start()
+            atexit.register(pool.stop)
+            _router = pool.router()
+        return _router
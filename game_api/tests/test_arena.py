@@ -0,0 +1,182 @@
+import random
+
+import pytest
+from game_api.engine import Arena, Game
+
+
+# single snake tests:
+def test_single_snake_arena_matches_game():
+    """
+    Check if an arena with one snake plays exactly like a Game with the same seed.
+    """
+    bot = random.Random(2)
+    game = Game(board_size=(8, 8), seed=5)
+    arena = Arena(board_size=(8, 8), seed=5)
+    arena.add_snake((4, 4))
+    for _ in range(500):
+        direction = bot.choice(["up", "down", "left", "right"])
+        game.change_direction(direction)
+        arena.change_direction(0, direction)
+        game.update()
+        arena.update()
+        assert arena.snake(0) == list(game.snake)
+        assert arena.food == ([game.food] if game.food else [])
+        assert arena.snakes[0].score == game.score
+        assert arena.game_over == game.game_over
+        if game.game_over:
+            break
+
+def test_arena_wall_kills():
+    """
+    Check if a snake leaving the board dies and leaves the others alone.
+    """
+    arena = Arena(board_size=(5, 5), food_count=0)
+    arena.add_snake((4, 2), "right")
+    arena.add_snake((0, 0), "up")
+    assert arena.update() == [0]
+    assert not arena.snakes[0].alive
+    assert arena.snakes[1].alive
+    assert not arena.game_over
+
+
+# collision tests:
+def test_arena_head_to_head_equal_length():
+    """
+    Check if two heads meeting on one cell both die when the snakes are equally long.
+    """
+    arena = Arena(board_size=(5, 5), food_count=0)
+    arena.add_snake((1, 2), "right")
+    arena.add_snake((3, 2), "left")
+    assert sorted(arena.update()) == [0, 1]
+    assert arena.game_over
+
+def test_arena_head_to_head_longer_wins():
+    """
+    Check if the longer snake survives a head-on meeting and keeps its cell.
+    """
+    arena = Arena(board_size=(7, 7), food_count=0)
+    arena.add_snake((1, 3), "right")
+    arena.add_snake((5, 3), "left")
+    arena.snakes[0].cells.append(3 * 7 + 0)
+    arena._occupy(3 * 7 + 0)
+    arena.update()
+    assert arena.update() == [1]
+    assert arena.snake(0) == [(3, 3), (2, 3)]
+
+def test_arena_swapping_heads_collide():
+    """
+    Check if two snakes swapping cells meet head to head instead of passing through each other.
+    """
+    arena = Arena(board_size=(5, 1), food_count=0)
+    arena.add_snake((1, 0), "right")
+    arena.add_snake((2, 0), "left")
+    assert sorted(arena.update()) == [0, 1]
+    assert arena.game_over and not any(arena._occupied)
+
+    # The longer snake survives a swap; its head takes the loser's old head
+    arena = Arena(board_size=(7, 1), food_count=0)
+    arena.add_snake((2, 0), "right")
+    arena.add_snake((3, 0), "left")
+    for snake_id, cell in [(0, 1), (0, 0), (1, 4)]:
+        arena.snakes[snake_id].cells.append(cell)
+        arena._occupy(cell)
+    assert arena.update() == [1]
+    assert arena.snake(0) == [(3, 0), (2, 0), (1, 0)]
+    assert arena._free_count == 4
+
+def test_arena_head_into_body():
+    """
+    Check if a head moving onto another snake's body dies, but may take a tail cell left on the same tick.
+    """
+    arena = Arena(board_size=(6, 6), food_count=0)
+    arena.add_snake((2, 2), "up")
+    arena.snakes[0].cells.append(2 * 6 + 3)
+    arena._occupy(2 * 6 + 3)
+    # Snake 1 heads for (3, 2): the tail of snake 0, vacated this tick
+    arena.add_snake((4, 2), "left")
+    assert arena.update() == []
+    assert arena.snake(1) == [(3, 2)]
+    # Snake 2 heads for (2, 3), which snake 0 moves out of and keeps as its neck
+    arena.add_snake((1, 3), "right")
+    assert arena.update() == [2]
+    assert arena.snake(0) == [(2, 4), (2, 3)]
+    assert arena.snake(1) == [(2, 2)]
+
+def test_arena_free_cells_after_deaths():
+    """
+    Check if dead snakes give their cells back to the board.
+    """
+    arena = Arena(board_size=(5, 5), food_count=0)
+    arena.add_snake((1, 2), "right")
+    arena.add_snake((3, 2), "left")
+    arena.update()
+    assert arena._free_count == 25
+    assert not any(arena._occupied)
+
+
+# shared food tests:
+def test_arena_keeps_food_count():
+    """
+    Check if the arena always holds food_count food items on free cells.
+    """
+    arena = Arena(board_size=(20, 20), food_count=5, seed=1)
+    for _ in range(30):
+        arena.add_snake()
+    assert len(arena.food) == 5
+    for _ in range(50):
+        for snake in arena.snakes:
+            arena.change_direction(snake.id, random.choice(["up", "down", "left", "right"]))
+        arena.update()
+        food = arena.food
+        assert len(set(food)) == 5
+        for x, y in food:
+            assert not arena._occupied[y * 20 + x]
+
+def test_arena_dying_snakes_leave_the_food():
+    """
+    Check if snakes that die on the food they reach do not eat it.
+    """
+    arena = Arena(board_size=(5, 5), food_count=0)
+    arena.add_snake((1, 2), "right")
+    arena.add_snake((3, 2), "left")
+    arena._food[2 * 5 + 2] = None
+    assert sorted(arena.update()) == [0, 1]
+    assert arena.food == [(2, 2)]
+    assert [snake.score for snake in arena.snakes] == [0, 0]
+
+def test_arena_add_snake_rejects_taken_cell():
+    """
+    Check if a snake cannot start outside of the board or on a taken cell.
+    """
+    arena = Arena(board_size=(5, 5))
+    arena.add_snake((2, 2))
+    with pytest.raises(ValueError):
+        arena.add_snake((2, 2))
+    with pytest.raises(ValueError):
+        arena.add_snake((5, 0))
+    with pytest.raises(ValueError):
+        arena.add_snake(arena.food[0])
+
+
+# arena load tests:
+def test_arena_many_snakes_stay_consistent():
+    """
+    Check if hundreds of random snakes keep the shared grid in step with their bodies.
+    """
+    rng = random.Random(3)
+    arena = Arena(board_size=(60, 60), food_count=40, seed=3)
+    for _ in range(300):
+        arena.add_snake()
+    for _ in range(100):
+        for snake in arena.snakes:
+            if snake.alive and rng.random() < 0.3:
+                arena.change_direction(snake.id, rng.choice(["up", "down", "left", "right"]))
+        arena.update()
+    counts = bytearray(60 * 60)
+    for snake in arena.snakes:
+        if snake.alive:
+            for cell in snake.cells:
+                counts[cell] += 1
+    assert counts == arena._occupied
+    assert max(counts) <= 1
+    assert arena._free_count == counts.count(0)
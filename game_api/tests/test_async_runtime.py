@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import pytest
+from game_api import async_runtime, game_manager
+from game_api.async_runtime import AsyncGameRuntime
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """
+    Async runtime with fast ticks and the database calls replaced.
+    """
+    saved = []
+    monkeypatch.setattr(game_manager, "register_player", lambda username, map_size: True)
+    monkeypatch.setattr(game_manager, "save_result", saved.append)
+    monkeypatch.setattr(async_runtime, "tick_interval", lambda game: 0.01)
+    runtime = AsyncGameRuntime()
+    runtime.saved = saved
+    return runtime
+
+
+def run(runtime, coroutine):
+    """
+    Runs a test coroutine, then stops the runtime on the same loop.
+    """
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await runtime.stop()
+    return asyncio.run(main())
+
+
+# async runtime tests:
+def test_async_sessions_tick(runtime):
+    """
+    Check if started sessions advance on their own from the event loop.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 25)
+        await asyncio.sleep(0.1)
+        return runtime.sessions.get(session_id).game.tick
+    assert run(runtime, scenario()) >= 5
+
+def test_async_move_and_state(runtime):
+    """
+    Check if moves and state work per session, and unknown sessions give None.
+    """
+    async def scenario():
+        first = await runtime.start_game("alice", 25)
+        second = await runtime.start_game("bob", 25)
+        state = runtime.move(first, "up")
+        assert state["board_size"] == [25, 25]
+        assert runtime.sessions.get(first).game.direction == "up"
+        assert runtime.sessions.get(second).game.direction == "right"
+        assert runtime.get_state("missing") is None
+        assert runtime.move("missing", "up") is None
+    run(runtime, scenario())
+
+def test_async_game_over_saves_once(runtime):
+    """
+    Check if a finished game stops ticking and its result is saved once.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 5)
+        session = runtime.sessions.get(session_id)
+        session.game.food = None
+        await asyncio.sleep(0.2)
+        return session
+    session = run(runtime, scenario())
+    assert session.game.game_over
+    assert runtime.saved == [session]
+    assert runtime.stats()["tasks"] == 0
+
+def test_async_many_sessions_one_task(runtime):
+    """
+    Check if hundreds of sessions are driven by a single task, all on schedule.
+    """
+    async def scenario():
+        ids = await asyncio.gather(*(runtime.start_game(f"player{i}", 100) for i in range(500)))
+        tasks = len(asyncio.all_tasks())
+        await asyncio.sleep(0.1)
+        return ids, tasks
+    ids, tasks = run(runtime, scenario())
+    assert tasks <= 2
+    assert all(runtime.sessions.get(i).game.tick >= 5 for i in ids)
+
+def test_async_late_ticks_are_counted(runtime):
+    """
+    Check if ticks held up by a blocked event loop are reported as late.
+    """
+    async def scenario():
+        await runtime.start_game("alice", 25)
+        await asyncio.sleep(0.02)
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+    run(runtime, scenario())
+    stats = runtime.stats()
+    assert stats["late_ticks"] >= 1
+    assert stats["max_lateness_ms"] >= 20
+
+def test_async_ended_session_stops(runtime):
+    """
+    Check if an ended session is dropped and no longer ticks.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 25)
+        session = runtime.sessions.get(session_id)
+        await asyncio.sleep(0.03)
+        assert runtime.end_session(session_id)
+        tick = session.game.tick
+        await asyncio.sleep(0.05)
+        return session.game.tick - tick
+    assert run(runtime, scenario()) <= 1
+
+def test_async_evicted_session_saves_and_wakes(runtime):
+    """
+    Check if a running session evicted to make room has its result saved, and its
+    waiters get None instead of waiting for a tick that never comes.
+    """
+    async def scenario():
+        runtime.sessions.max_sessions = 1
+        session_id = await runtime.start_game("alice", 25)
+        session = runtime.sessions.get(session_id)
+        waiting = asyncio.ensure_future(runtime.next_state(session_id, 10 ** 6))
+        await asyncio.sleep(0)
+        await runtime.start_game("bob", 25)
+        assert await asyncio.wait_for(waiting, 1) is None
+        assert runtime.saved == [session]
+    run(runtime, scenario())
+
+def test_async_next_state_waits_for_the_next_tick(runtime):
+    """
+    Check if waiting for a newer state returns at the next tick, times out with the
+    unchanged state, and returns None once the session is ended.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 25)
+        assert (await runtime.next_state(session_id, -1))["tick"] == 0
+        first, second = await asyncio.gather(runtime.next_state(session_id, 0), runtime.next_state(session_id, 0))
+        assert first["tick"] == second["tick"] == 1
+        assert (await runtime.next_state(session_id, 10 ** 6, timeout=0.02))["tick"] < 10 ** 6
+        waiting = asyncio.ensure_future(runtime.next_state(session_id, 10 ** 6))
+        await asyncio.sleep(0)
+        runtime.end_session(session_id)
+        assert await waiting is None
+    run(runtime, scenario())
+
+def test_async_changes_since_a_tick(runtime):
+    """
+    Check if the changes since a tick hold just the ticks after it, after a full state to start with.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 100)
+        assert "snake" in await runtime.changes(session_id, 0)
+        changes = await runtime.changes(session_id, 0, timeout=1.0)
+        assert changes["since"] == 0 and changes["tick"] >= 1
+        assert len(changes["head"]) == changes["tick"]
+        assert await runtime.changes("missing", 0) is None
+    run(runtime, scenario())
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+from game_api import apps, game_manager
+from game_api.checkpoint import CheckpointStore, Checkpointer
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    A checkpoint store in a temporary file, closed after the test.
+    """
+    store = CheckpointStore(str(tmp_path / "sessions.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """
+    An empty session registry standing in for the game manager's, in lazy ticking mode.
+    """
+    registry = game_manager.SessionRegistry()
+    monkeypatch.setattr(game_manager, "sessions", registry)
+    monkeypatch.setattr(game_manager, "lazy_ticking", True)
+    return registry
+
+
+# checkpoint store tests:
+def test_store_replaces_and_deletes_rows(store):
+    """
+    Check if saving a session again replaces its row, and removed sessions are deleted.
+    """
+    store.save([("a", "alice", 10, 1.0, b"one"), ("b", "bob", 10, 2.0, b"two")])
+    store.save([("a", "alice", 10, 1.0, b"three")], removed=["b"])
+    assert store.load() == [("a", "alice", 10, 1.0, b"three")]
+
+
+# checkpointer tests:
+def test_checkpoints_are_incremental(store, registry):
+    """
+    Check if only sessions that changed since the last checkpoint are written,
+    and ended or finished sessions leave the store.
+    """
+    sessions = [registry.create(f"player{i}", 10) for i in range(3)]
+    checkpointer = Checkpointer(store, registry)
+    assert checkpointer.checkpoint() == 3
+    assert checkpointer.checkpoint() == 0
+
+    sessions[0].game.update()
+    sessions[1].game.change_direction("up")
+    assert checkpointer.checkpoint() == 2
+
+    registry.remove(sessions[1].session_id)
+    sessions[2].game.game_over = True
+    registry.finish(sessions[2])
+    assert checkpointer.checkpoint() == 0
+    assert [row[0] for row in store.load()] == [sessions[0].session_id]
+    assert checkpointer.stats()["checkpoint_writes"] == 5
+
+
+# restore tests:
+def test_restored_sessions_go_on_like_the_originals(store, registry, monkeypatch):
+    """
+    Check if restored sessions keep their ids, players and games, and play on exactly like before.
+    """
+    originals = [registry.create(f"player{i}", 12) for i in range(5)]
+    for session in originals:
+        for _ in range(3):
+            session.game.update()
+    Checkpointer(store, registry).checkpoint()
+
+    restored = game_manager.SessionRegistry()
+    monkeypatch.setattr(game_manager, "sessions", restored)
+    assert game_manager.restore_sessions(store) == 5
+    for original in originals:
+        session = restored.get(original.session_id)
+        assert (session.player_name, session.map_size, session.start_time) == \
+            (original.player_name, original.map_size, original.start_time)
+        assert session.state == game_manager.GameState.of(original.game)
+        for _ in range(5):
+            original.game.update()
+            session.game.update()
+        assert list(session.game.snake) == list(original.game.snake)
+        assert session.game.food == original.game.food
+    assert game_manager.restore_sessions(store) == 0
+
+def test_recorded_sessions_are_checkpointed_as_replays(store, registry, monkeypatch):
+    """
+    Check if games that record their inputs are checkpointed as their small replay,
+    and restore to the exact game, direction changes since the last tick included.
+    """
+    registry.record_inputs = True
+    originals = [registry.create(f"player{i}", 25) for i in range(3)]
+    for i, session in enumerate(originals):
+        for tick in range(6):
+            if tick == 2 + i:
+                session.game.change_direction("up")
+            session.game.update()
+    originals[0].game.change_direction("left")
+    Checkpointer(store, registry).checkpoint()
+    assert all(len(row[4]) < 100 for row in store.load())
+
+    restored = game_manager.SessionRegistry()
+    monkeypatch.setattr(game_manager, "sessions", restored)
+    assert game_manager.restore_sessions(store) == 3
+    for original in originals:
+        game = restored.get(original.session_id).game
+        assert game.snapshot() == original.game.snapshot()
+        assert game.recorder.to_bytes() == original.game.recorder.to_bytes()
+
+
+# startup tests:
+def test_checkpoints_need_the_threaded_runtime(monkeypatch, capsys):
+    """
+    Check if a checkpoint path starts checkpoints under the threaded runtime only,
+    and is reported as ignored under the async and sharded ones.
+    """
+    started = []
+    monkeypatch.setattr(game_manager, "start_checkpoints", lambda *args: started.append(args))
+    for runtime in ("async", "sharded", "threads"):
+        monkeypatch.setattr(apps, "settings", SimpleNamespace(
+            SNAKE_CHECKPOINT_PATH="sessions.sqlite3", SNAKE_CHECKPOINT_INTERVAL=5.0, SNAKE_RUNTIME=runtime))
+        apps.start_checkpoints()
+    assert started == [("sessions.sqlite3", 5.0)]
+    assert capsys.readouterr().out.count("SNAKE_CHECKPOINT_PATH is ignored") == 2
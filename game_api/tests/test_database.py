@@ -11,6 +11,8 @@ import pytest
 from unittest import mock
 import mongomock
 import datetime
+import pymongo
+from bson.objectid import ObjectId
 
 @pytest.fixture(scope="session", autouse=True)
 def patch_mongo_client():
@@ -424,4 +426,89 @@ class TestGameResultsCRUD:
 
         # Confirm sorted by date (newest first)
         if len(results) >= 2:
-            assert results[0].date >= results[1].date
\ No newline at end of file
+            assert results[0].date >= results[1].date
+
+class TestBatchedGameResults:
+    """
+    Test adding game results in batches.
+    """
+
+    def test_add_game_results_batch(self, mock_db):
+        """
+        Test a batch adds every result, one player record per name and map size with the best score.
+        """
+        mock_db.add_player("BatchPlayer", 10, 120)
+        existing_id = mock_db.players.find_one({"name": "BatchPlayer"})["_id"]
+        ids = mock_db.add_game_results([
+            {"player_name": "BatchPlayer", "map_size": 10, "score": 100, "duration": 60.0},
+            {"player_name": "BatchPlayer", "map_size": 10, "score": 150, "duration": 70.0},
+            {"player_name": "NewPlayer", "map_size": 15, "score": 200, "duration": 80.0},
+        ])
+
+        assert len(ids) == 3 and all(ids)
+        assert mock_db.game_results.count_documents({}) == 3
+        assert mock_db.players.count_documents({}) == 2
+        assert mock_db.players.find_one({"name": "BatchPlayer"})["score"] == 150
+        assert mock_db.players.find_one({"name": "NewPlayer"})["score"] == 200
+        result = mock_db.game_results.find_one({"_id": ids[0]})
+        assert result["score"] == 100
+        assert result["player_id"] == existing_id
+
+    def test_add_game_results_reports_failed_items(self, mock_db):
+        """
+        Test that results whose insert fails come back as None, in input order.
+        """
+        def insert_many(documents, ordered):
+            for index, document in enumerate(documents):
+                document["_id"] = f"id{index}"
+            raise pymongo.errors.BulkWriteError({"writeErrors": [{"index": 1}]})
+
+        with mock.patch.object(mock_db.game_results, "insert_many", side_effect=insert_many):
+            ids = mock_db.add_game_results([
+                {"player_name": "BatchPlayer", "map_size": 10, "score": score, "duration": 60.0}
+                for score in (10, 20, 30)
+            ])
+        assert ids == ["id0", None, "id2"]
+
+    def test_add_game_results_keeps_given_ids(self, mock_db):
+        """
+        Test that a result given an _id is inserted with it.
+        """
+        result_id = ObjectId()
+        ids = mock_db.add_game_results([
+            {"_id": result_id, "player_name": "BatchPlayer", "map_size": 10, "score": 10, "duration": 60.0}
+        ])
+        assert ids == [result_id]
+        assert mock_db.game_results.find_one({"_id": result_id})["score"] == 10
+
+    def test_add_game_results_retry_is_not_duplicated(self, mock_db):
+        """
+        Test that retrying results already written counts them as added without inserting them
+        twice, and that after an ambiguous error only the results that did not land come back as None.
+        """
+        results = [
+            {"_id": ObjectId(), "player_name": "BatchPlayer", "map_size": 10, "score": score, "duration": 60.0}
+            for score in (10, 20, 30)
+        ]
+        mock_db.add_game_results(results[:1])
+        assert mock_db.add_game_results(results[:2]) == [results[0]["_id"], results[1]["_id"]]
+        assert mock_db.game_results.count_documents({}) == 2
+
+        insert_many = mock_db.game_results.insert_many
+
+        def time_out(documents, ordered):
+            insert_many(documents[:1], ordered=ordered)
+            raise pymongo.errors.NetworkTimeout("timed out")
+
+        mock_db.game_results.delete_many({})
+        with mock.patch.object(mock_db.game_results, "insert_many", side_effect=time_out):
+            ids = mock_db.add_game_results(results)
+        assert ids == [results[0]["_id"], None, None]
+        assert mock_db.add_game_results(results[1:]) == [results[1]["_id"], results[2]["_id"]]
+        assert mock_db.game_results.count_documents({}) == 3
+
+    def test_add_game_results_empty(self, mock_db):
+        """
+        Test an empty batch writes nothing.
+        """
+        assert mock_db.add_game_results([]) == []
@@ -0,0 +1,120 @@
+import json
+
+from game_api.encoding import (BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, EncodedStates, decode_state_binary,
+                               encode_changes, encode_changes_binary, encode_state, encode_state_binary,
+                               preferred_content_type)
+from game_api.engine import Game
+from game_api.game_manager import GameState
+
+
+def drf_json(state):
+    """
+    The state as GameStateSerializer renders it: lists for the cells and a float speed.
+    """
+    return {
+        "snake": [list(cell) for cell in state["snake"]],
+        "food": list(state["food"]) if state["food"] is not None else None,
+        "score": state["score"],
+        "game_over": state["game_over"],
+        "board_size": list(state["board_size"]),
+        "speed": float(state["speed"]),
+        "tick": state["tick"],
+    }
+
+
+# state encoder tests:
+def test_encoded_state_matches_the_serializer():
+    """
+    Check if the fast encoder gives the same JSON as the serializer path, for live and finished games.
+    """
+    game = Game((12, 12))
+    for _ in range(30):
+        state = GameState.of(game).as_dict()
+        assert json.loads(encode_state(state)) == drf_json(state)
+        game.update()
+    assert game.game_over
+    state = dict(GameState.of(game).as_dict(), food=None)
+    assert json.loads(encode_state(state)) == drf_json(state)
+
+def test_encoder_takes_cells_of_any_shape():
+    """
+    Check if cells given as lists, as after a JSON round trip, encode like tuples.
+    """
+    state = GameState.of(Game((10, 10))).as_dict()
+    assert encode_state(dict(state, snake=[[1, 2], [1, 3]])) == encode_state(dict(state, snake=((1, 2), (1, 3))))
+
+
+# binary state tests:
+def test_binary_state_round_trips():
+    """
+    Check if the binary format decodes to the same state, on small and on huge boards, with and without food.
+    """
+    game = Game((12, 12))
+    for _ in range(5):
+        game.update()
+    state = GameState.of(game).as_dict()
+    assert decode_state_binary(encode_state_binary(state)) == dict(state, snake=tuple(state["snake"]))
+    huge = {"snake": ((999, 998), (999, 999)), "food": None, "score": 70000, "game_over": True,
+            "board_size": [1000, 1000], "speed": 2.5, "tick": 123456}
+    body = encode_state_binary(huge)
+    assert len(body) == 30 + 2 * 4
+    assert decode_state_binary(body) == huge
+
+def test_binary_state_is_smaller():
+    """
+    Check if the binary body takes 2 bytes per cell on a normal board, well under the JSON body.
+    """
+    game = Game((24, 24))
+    state = dict(GameState.of(game).as_dict(), snake=tuple((x, 0) for x in range(20)))
+    assert len(encode_state_binary(state)) == 30 + 2 * 20
+    assert len(encode_state_binary(state)) < len(encode_state(state)) / 2
+
+def test_accept_header_picks_the_format():
+    """
+    Check if only an Accept header preferring octet-stream selects the binary format.
+    """
+    assert preferred_content_type(None) == JSON_CONTENT_TYPE
+    assert preferred_content_type("*/*") == JSON_CONTENT_TYPE
+    assert preferred_content_type("application/octet-stream") == BINARY_CONTENT_TYPE
+    assert preferred_content_type("application/json;q=0.5, application/octet-stream") == BINARY_CONTENT_TYPE
+    assert preferred_content_type("application/octet-stream;q=0.9, application/json") == JSON_CONTENT_TYPE
+    assert preferred_content_type("application/json, application/octet-stream") == JSON_CONTENT_TYPE
+
+
+# changes encoding tests:
+def test_changes_encode_in_both_formats():
+    """
+    Check if changes since a tick encode to the same data in JSON and binary, at a size independent of the snake.
+    """
+    changes = {"since": 40, "tick": 42, "head": [(3, 4), (3, 5)], "removed": 1, "food": (7, 7), "score": 12,
+               "game_over": False, "board_size": [25, 25], "speed": 1.5}
+    assert json.loads(encode_changes(changes)) == json.loads(json.dumps(changes))
+    body = encode_changes_binary(changes)
+    assert len(body) == 30 + 8 + 2 * 2
+    assert decode_state_binary(body) == dict(changes, head=tuple(changes["head"]))
+
+
+# encoded state cache tests:
+def test_readers_of_one_tick_share_one_encoding():
+    """
+    Check if a session's state is encoded once per tick, and the oldest sessions are dropped beyond the limit.
+    """
+    cache = EncodedStates(max_sessions=2)
+    game = Game((10, 10))
+    state = GameState.of(game).as_dict()
+    first = cache.body("a", state)
+    assert all(cache.body("a", state) is first for _ in range(5))
+    game.update()
+    assert cache.body("a", GameState.of(game).as_dict()) != first
+    assert (cache.hits, cache.misses) == (5, 2)
+
+    cache.body("b", state)
+    cache.body("c", state)
+    cache.body("a", state)
+    assert cache.misses == 5
+
+    binary = cache.body("a", state, BINARY_CONTENT_TYPE)
+    assert binary == encode_state_binary(state)
+    assert cache.body("a", state, BINARY_CONTENT_TYPE) is binary
+    assert cache.body("a", state) == encode_state(state)
+    assert cache.misses == 6
@@ -1,5 +1,7 @@
 import pytest
-from game_api.engine import move_snake, check_collision, is_within_bounds, increase_speed, Game
+import random
+import tracemalloc
+from game_api.engine import move_snake, check_collision, is_within_bounds, increase_speed, Game, neighbor_table, TickDelta
 
 # move_snake tests:
 def test_move_snake_up():
@@ -203,6 +205,35 @@ def test_update_eat_food():
     assert g.snake == [(7, 5), (6, 5)] # New head at (7,5), old head at (6,5)
 
 
+def test_update_self_collision():
+    """
+    Check if game_over flag is set when the head moves into the snake's own body.
+    The snake is curled so that turning down hits its fourth segment.
+    """
+    g = Game(board_size=(10, 10))
+    g.snake = [(5, 5), (6, 5), (6, 4), (5, 4), (4, 4)]
+    g.food = (0, 0)
+    g.direction = "down"
+    g.update()
+    assert g.game_over is True
+    assert g.snake == [(5, 5), (6, 5), (6, 4), (5, 4), (4, 4)] # Body is left untouched
+
+def test_update_head_follows_tail():
+    """
+    Check if the head may move into the cell the tail is leaving on the same tick.
+    A 2x2 loop of four segments can circle forever without colliding.
+    """
+    g = Game(board_size=(10, 10))
+    g.snake = [(5, 5), (6, 5), (6, 4), (5, 4)]
+    g.food = (0, 0)
+    g.direction = "down"
+    g.update()
+    assert g.game_over is False
+    assert g.snake == [(5, 4), (5, 5), (6, 5), (6, 4)]
+    assert (6, 4) in g.snake
+    assert len(g.snake) == 4
+
+
 # spawn_food tests:
 def test_spawn_food_not_on_snake():
     """
@@ -217,6 +248,36 @@ def test_spawn_food_not_on_snake():
     assert g.food == (5, 5) # Food must spawn in the only available spot
     assert g.food not in g.snake
 
+def test_spawn_food_free_cells_follow_snake():
+    """
+    Check if the free-cell index stays in step with the snake while it moves and grows.
+    Free cells should always be exactly the board cells not covered by the snake.
+    """
+    g = Game(board_size=(6, 6), initial_position=(0, 0), direction="up")
+    path = ["up"] * 5 + ["right"] * 5 + ["down"] * 5 + ["left"] * 4
+    for i, direction in enumerate(path):
+        g.change_direction(direction)
+        if i % 3 == 0:
+            g.food = move_snake(g.snake[0], g.direction) # Grow every third move
+        g.update()
+        assert g.game_over is False
+        board = {(x, y) for x in range(6) for y in range(6)}
+        assert g.snake.free_count == len(board - set(g.snake))
+        assert g.food not in g.snake
+
+def test_spawn_food_board_full_wins_game():
+    """
+    Check if filling the last free cell ends the game with no food left to spawn.
+    """
+    g = Game(board_size=(5, 5))
+    g.snake = [(x, y) for y in range(5) for x in range(5)]
+    g.snake.remove((0, 0))
+    g.snake.insert(0, (0, 0)) # Snake covers every cell again
+    g.spawn_food()
+    assert g.snake.free_count == 0
+    assert g.food is None
+    assert g.game_over is True
+
 
 # full game scenario tests:
 def test_snake_eat_food_after_few_moves_cartesian():
@@ -238,4 +299,249 @@ def test_snake_eat_food_after_few_moves_cartesian():
     g.update() # Snake head at (6, 7), body at [(6, 7), (6, 6), (6, 5)]
     assert g.snake[0] == (6, 7) # Head is at food location
     assert g.score == 1 # Score increased
-    assert len(g.snake) == 2 # Snake length increased by 1
\ No newline at end of file
+    assert len(g.snake) == 2 # Snake length increased by 1
+
+
+# compact representation tests:
+def test_neighbor_table_matches_move_snake():
+    """
+    Check if the cached neighbor table agrees with move_snake and is_within_bounds.
+    Moves leaving the board should hold the -1 wall sentinel.
+    """
+    width, height = 4, 3
+    table = neighbor_table(width, height)
+    assert neighbor_table(width, height) is table # Built once per board size
+    for y in range(height):
+        for x in range(width):
+            for code, direction in enumerate(["up", "down", "left", "right"]):
+                nx, ny = move_snake((x, y), direction)
+                expected = ny * width + nx if is_within_bounds((nx, ny), (width, height)) else -1
+                assert table[(y * width + x) * 4 + code] == expected
+
+def test_game_memory_is_compact():
+    """
+    Check if a 25x25 game stays within a few kilobytes.
+    The body, occupancy and free-cell index are flat arrays, not tuples in sets and dicts.
+    """
+    Game(board_size=(25, 25)) # Warm up the neighbor table cache
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [Game(board_size=(25, 25)) for _ in range(20)]
+    used = (tracemalloc.get_traced_memory()[0] - before) / len(games)
+    tracemalloc.stop()
+    assert used < 8 * 1024
+
+def test_game_rejects_invalid_direction():
+    """
+    Check if an unknown direction is refused when it is set, not on the next update.
+    """
+    g = Game()
+    with pytest.raises(ValueError):
+        g.change_direction("straight")
+    assert g.direction == "right"
+
+
+# snapshot and clone tests:
+def walk(game, ticks):
+    """
+    Moves the snake towards the food, taking the first safe direction, and
+    returns the (snake, food, score, game_over) state after every tick.
+    """
+    states = []
+    for _ in range(ticks):
+        head = game.snake[0]
+        options = sorted(["up", "down", "left", "right"],
+                         key=lambda d: abs(move_snake(head, d)[0] - game.food[0]) + abs(move_snake(head, d)[1] - game.food[1])
+                         if game.food else 0)
+        for direction in options:
+            target = move_snake(head, direction)
+            if is_within_bounds(target, game.board_size) and target not in game.snake[:-1]:
+                game.change_direction(direction)
+                break
+        game.update()
+        states.append((list(game.snake), game.food, game.score, game.game_over))
+    return states
+
+def test_snapshot_restore_continues_identically():
+    """
+    Check if a game restored from a snapshot plays on exactly like the original.
+    The free-cell order and the RNG state are part of the snapshot, so food spawns match too.
+    """
+    g = Game(board_size=(10, 10), seed=5)
+    walk(g, 60)
+    data = g.snapshot()
+    assert isinstance(data, bytes)
+
+    restored = Game.from_snapshot(data)
+    assert restored.snapshot() == data
+    assert (restored.tick, restored.seed, restored.direction) == (g.tick, g.seed, g.direction)
+    assert walk(restored, 80) == walk(g, 80)
+    assert g.score > 3
+
+def test_restore_in_place():
+    """
+    Check if restore() rewinds an existing game object to an earlier snapshot.
+    """
+    g = Game(board_size=(8, 8), seed=2)
+    walk(g, 10)
+    data = g.snapshot()
+    future = walk(g, 30)
+    g.restore(data)
+    assert walk(g, 30) == future
+
+def test_clone_is_independent_and_deterministic():
+    """
+    Check if clones can be stepped without touching the original,
+    and each clone's future, food included, matches the original's.
+    """
+    g = Game(board_size=(10, 10), seed=9)
+    walk(g, 20)
+    before = g.snapshot()
+    clones = [g.clone() for _ in range(3)]
+
+    clones[0].change_direction("up" if g.direction != "down" else "left")
+    clones[0].update()
+    assert g.snapshot() == before
+
+    expected = walk(g, 50)
+    assert walk(clones[1], 50) == expected
+    assert walk(clones[2], 50) == expected
+
+def test_clone_unaffected_by_parent_rng_use():
+    """
+    Check if drawing from the parent's RNG after cloning doesn't change the clone's food.
+    """
+    g = Game(board_size=(10, 10), seed=4)
+    twin = Game(board_size=(10, 10), seed=4)
+    c = g.clone()
+    g.rng.random()
+    c.spawn_food()
+    twin.spawn_food()
+    assert c.food == twin.food
+
+
+# huge board (sparse) tests:
+def test_sparse_mode_chosen_for_huge_boards():
+    """
+    Check if huge boards use the sparse body and stay small in memory.
+    A 2000x2000 game must not allocate anything sized by the board.
+    """
+    assert Game(board_size=(25, 25)).sparse is False
+    tracemalloc.start()
+    g = Game(board_size=(2000, 2000), seed=1)
+    used = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert g.sparse is True
+    assert used < 64 * 1024
+    assert g.snake == [(1000, 1000)]
+    assert g.food is not None and g.food not in g.snake
+
+def test_sparse_game_moves_like_dense_game():
+    """
+    Check if the sparse body gives the same moves, growth and collisions as the dense one.
+    """
+    for sparse in (False, True):
+        g = Game(board_size=(10, 10), seed=3, sparse=sparse)
+        for x in range(6, 10):
+            g.food = (x, 5)
+            g.update()
+        assert g.snake == [(9, 5), (8, 5), (7, 5), (6, 5), (5, 5)]
+        for direction in ["up", "left", "down"]:
+            g.food = (0, 0)
+            g.change_direction(direction)
+            g.update()
+        assert g.game_over is True # Turned down into its own body
+        assert g.snake == [(8, 6), (9, 6), (9, 5), (8, 5), (7, 5)]
+        assert g.score == 4
+
+def test_sparse_food_nearly_full_board():
+    """
+    Check if food on a nearly full sparse board lands only on free cells (exact fallback),
+    and that a full board ends the game.
+    """
+    g = Game(board_size=(4, 4), seed=8, sparse=True)
+    cells = [(x, y) for y in range(4) for x in range(4)]
+    g.snake = cells[:12]
+    spawned = set()
+    for _ in range(200):
+        g.spawn_food()
+        spawned.add(g.food)
+    assert spawned == set(cells[12:])
+
+    g.snake = cells
+    g.spawn_food()
+    assert g.food is None
+    assert g.game_over is True
+
+def test_sparse_snapshot_restore():
+    """
+    Check if sparse games survive snapshot/restore and clone like dense ones.
+    """
+    g = Game(board_size=(1000, 1000), seed=6)
+    for direction in ["up", "left", "down", "left"] * 3:
+        g.change_direction(direction)
+        g.update()
+    data = g.snapshot()
+    restored = Game.from_snapshot(data)
+    assert restored.sparse is True
+    assert restored.snake == g.snake
+    assert restored.food == g.food
+    assert restored.snapshot() == data
+    assert len(data) < 4096
+    assert g.clone().snake == g.snake
+
+
+# tick delta tests:
+def test_update_returns_delta_on_move():
+    """
+    Check if a plain move reports the new head, the removed tail and the tick.
+    """
+    g = Game(board_size=(10, 10), seed=1)
+    g.snake = [(5, 5), (4, 5)]
+    g.food = (0, 0)
+    delta = g.update()
+    assert delta == TickDelta(1, (6, 5), (4, 5), (0, 0), 0, False)
+    assert g.update().tick == 2
+
+def test_update_returns_delta_on_eat():
+    """
+    Check if eating reports no removed tail, the new food and the new score.
+    """
+    g = Game(board_size=(10, 10), seed=1)
+    g.food = (6, 5)
+    delta = g.update()
+    assert delta.head == (6, 5)
+    assert delta.tail is None
+    assert delta.score == 1
+    assert delta.food == g.food and delta.food != (6, 5)
+
+def test_update_returns_delta_on_game_over():
+    """
+    Check if a deadly move reports game over without moving, and later updates report nothing.
+    """
+    g = Game(board_size=(10, 10), initial_position=(9, 5), seed=1)
+    g.food = (0, 0)
+    delta = g.update()
+    assert delta == TickDelta(1, None, None, (0, 0), 0, True)
+    assert g.update() is None
+    assert g.tick == 1
+
+def test_deltas_rebuild_the_game():
+    """
+    Check if applying the deltas to the initial state gives the same snake as the game.
+    """
+    rng = random.Random(5)
+    g = Game(board_size=(8, 8), seed=12)
+    snake = list(g.snake)
+    for _ in range(300):
+        g.change_direction(rng.choice(["up", "down", "left", "right"]))
+        delta = g.update()
+        if delta is None:
+            break
+        if delta.tail is not None:
+            snake.pop()
+        if delta.head is not None:
+            snake.insert(0, delta.head)
+        assert snake == g.snake
+        assert delta.food == g.food
+        assert delta.tick == g.tick
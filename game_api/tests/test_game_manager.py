@@ -0,0 +1,462 @@
+import random
+import threading
+import time
+import tracemalloc
+from unittest import mock
+
+import mongomock
+import pytest
+from game_api import game_manager
+from game_api.database import db
+from game_api.engine import is_within_bounds, move_snake
+
+
+@pytest.fixture
+def manager():
+    """
+    Game manager backed by mongomock, with every session stopped afterwards.
+    """
+    with mock.patch('game_api.database.MongoClient', mongomock.MongoClient):
+        db.is_connected = False
+        yield game_manager
+        for session in game_manager.sessions:
+            game_manager.end_session(session.session_id)
+        game_manager.result_writer.flush(timeout=5)
+        db.disconnect()
+
+
+# session tests:
+def test_start_returns_session_id(manager):
+    """
+    Check if starting a game issues a session id that leads to its state.
+    """
+    session_id = manager.start_new_game("alice", 10)
+    assert session_id
+    state = manager.get_current_state(session_id)
+    assert state["board_size"] == [10, 10]
+    assert state["game_over"] is False
+
+def test_sessions_are_independent(manager):
+    """
+    Check if starting a second game leaves the first one running and unchanged.
+    """
+    first = manager.start_new_game("alice", 10)
+    second = manager.start_new_game("bob", 15)
+    assert first != second
+    assert manager.get_current_state(first)["board_size"] == [10, 10]
+    assert manager.get_current_state(second)["board_size"] == [15, 15]
+
+    manager.process_move(first, "up")
+    assert manager.sessions.get(first).game.direction == "up"
+    assert manager.sessions.get(second).game.direction == "right"
+
+def test_unknown_session(manager):
+    """
+    Check if state and moves for an unknown session return None.
+    """
+    assert manager.get_current_state("missing") is None
+    assert manager.process_move("missing", "up") is None
+
+def test_end_session(manager):
+    """
+    Check if an ended session is forgotten and its game loop stopped.
+    """
+    session_id = manager.start_new_game("alice", 10)
+    task = manager.sessions.get(session_id).task
+    assert manager.end_session(session_id) is True
+    assert manager.get_current_state(session_id) is None
+    assert task.cancelled
+    assert manager.end_session(session_id) is False
+
+def test_game_over_does_not_wait_for_the_database(manager, monkeypatch):
+    """
+    Check if a finished game's tick only queues the result, which is saved in the background.
+    """
+    session_id = manager.start_new_game("alice", 5)
+    session = manager.sessions.get(session_id)
+    session.task.cancel()
+    add_game_results = db.add_game_results
+    monkeypatch.setattr(db, "add_game_results", lambda results: time.sleep(0.2) or add_game_results(results))
+    session.game.food = None
+    start = time.perf_counter()
+    while manager.update_game_state_wrapper(session) is not None:
+        pass
+    assert time.perf_counter() - start < 0.1
+    assert session.game.game_over and not session.is_result_saved
+    assert isinstance(session.game, manager.GameRecord)
+    assert manager.get_current_state(session_id)["game_over"] is True
+    assert manager.result_writer.flush(timeout=5)
+    assert session.is_result_saved
+    assert manager.get_scheduler_stats()["writes"] >= 1
+
+
+# published state tests:
+def test_published_state_follows_the_game():
+    """
+    Check if states built from tick deltas match the game, through growing and game over.
+    """
+    rng = random.Random(3)
+    opposite = {"up": "down", "down": "up", "left": "right", "right": "left"}
+    session = game_manager.SessionRegistry().create("alice", 8)
+    game = session.game
+    while not game.game_over and game.tick < 500:
+        head, body = game.snake[0], list(game.snake)[:-1]
+        safe = [d for d in opposite if d != opposite[game.direction]
+                and is_within_bounds(move_snake(head, d), game.board_size) and move_snake(head, d) not in body]
+        game.change_direction(rng.choice(safe or list(opposite)))
+        target = move_snake(head, game.direction)
+        if rng.random() < 0.3 and is_within_bounds(target, game.board_size) and target not in game.snake:
+            game.food = target # Grow on this tick
+        session.publish(game.update())
+        assert session.state == game_manager.GameState.of(game)
+    assert len(game.snake) > 5
+
+def test_published_state_is_immutable(manager):
+    """
+    Check if a state handed to a reader stays as it was while the game ticks on.
+    """
+    session_id = manager.start_new_game("alice", 10)
+    session = manager.sessions.get(session_id)
+    session.task.cancel()
+    state = manager.get_current_state(session_id)
+    manager.update_game_state_wrapper(session)
+    manager.update_game_state_wrapper(session)
+    assert state["snake"] == ((5, 5),)
+    assert state["tick"] == 0
+    newer = manager.get_current_state(session_id)
+    assert newer["tick"] == 2
+    assert list(newer["snake"]) == list(session.game.snake)
+
+def test_reads_and_ticks_take_no_shared_lock(manager):
+    """
+    Check if reads skip the session lock, and ticks and moves skip the registry lock.
+    """
+    session_id = manager.start_new_game("alice", 10)
+    session = manager.sessions.get(session_id)
+    session.task.cancel()
+    with session.lock:
+        assert manager.get_current_state(session_id)["tick"] == 0
+    with manager.game_lock:
+        manager.update_game_state_wrapper(session)
+        assert manager.process_move(session_id, "up")["tick"] == 1
+
+
+# long-poll tests:
+def test_wait_for_state_returns_the_next_tick(manager, monkeypatch):
+    """
+    Check if every long-poll waiting on a session wakes with the state of its next tick,
+    and none is left registered afterwards.
+    """
+    monkeypatch.setattr(manager, "tick_interval", lambda game: 0.05)
+    session_id = manager.start_new_game("alice", 25)
+    since = manager.get_current_state(session_id)["tick"]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.wait_for_state(session_id, since, 2.0)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert {state["tick"] for state in results} == {since + 1}
+    assert manager.wait_for_state(session_id, -1, 2.0)["tick"] >= since + 1
+    assert not manager._state_waiters
+
+def test_wait_for_state_times_out_and_sees_ended_sessions(manager):
+    """
+    Check if a long-poll with nothing new returns the unchanged state after its timeout,
+    and one waiting on a session that ends returns None at once.
+    """
+    session_id = manager.start_new_game("alice", 25)
+    since = manager.get_current_state(session_id)["tick"]
+    start = time.monotonic()
+    assert manager.wait_for_state(session_id, since + 100, 0.1)["tick"] <= since + 1
+    assert time.monotonic() - start >= 0.1
+
+    threading.Timer(0.1, manager.end_session, (session_id,)).start()
+    start = time.monotonic()
+    assert manager.wait_for_state(session_id, since + 100, 5.0) is None
+    assert time.monotonic() - start < 2.0
+    assert manager.wait_for_state("missing", 0, 1.0) is None
+
+
+# changes since tick tests:
+def apply_changes(snake, changes):
+    """
+    Applies changes since a tick to a snake like a client does: new heads in front, newest first, then the tail trimmed.
+    """
+    snake = list(reversed(changes["head"])) + list(snake)
+    return snake[:len(snake) - changes["removed"]]
+
+def test_changes_rebuild_every_state():
+    """
+    Check if the changes since any recent tick, applied to the state of that tick, give the current
+    state, through growing and game over, and stay small while the snake grows.
+    """
+    rng = random.Random(5)
+    opposite = {"up": "down", "down": "up", "left": "right", "right": "left"}
+    session = game_manager.SessionRegistry().create("alice", 10)
+    game = session.game
+    assert "snake" in game_manager.session_changes(session, 0) # The first request starts the buffer
+    states = {0: session.state}
+    while not game.game_over:
+        head, body = game.snake[0], list(game.snake)[:-1]
+        safe = [d for d in opposite if d != opposite[game.direction]
+                and is_within_bounds(move_snake(head, d), game.board_size) and move_snake(head, d) not in body]
+        game.change_direction(rng.choice(safe or list(opposite)))
+        target = move_snake(head, game.direction)
+        if rng.random() < 0.4 and is_within_bounds(target, game.board_size) and target not in game.snake:
+            game.food = target
+        session.publish(game.update())
+        states[game.tick] = session.state
+        for since in range(max(game.tick - 5, 0), game.tick + 1):
+            changes = game_manager.session_changes(session, since)
+            assert "snake" not in changes
+            assert len(changes["head"]) <= game.tick - since
+            assert apply_changes(states[since].snake, changes) == list(session.state.snake)
+            assert (changes["tick"], changes["score"], changes["food"], changes["game_over"]) == \
+                (game.tick, game.score, game.food, game.game_over)
+    assert len(game.snake) > 5
+
+def test_changes_resync_with_the_full_state():
+    """
+    Check if a client too far behind, ahead, or behind a rebuilt state gets the full state.
+    """
+    session = game_manager.SessionRegistry().create("alice", 100)
+    game_manager.session_changes(session, 0)
+    for _ in range(game_manager.DELTA_HISTORY + 2):
+        session.publish(session.game.update())
+    tick = session.state.tick
+    assert "snake" in game_manager.session_changes(session, 0)
+    assert "snake" not in game_manager.session_changes(session, tick - game_manager.DELTA_HISTORY)
+    assert "snake" in game_manager.session_changes(session, tick + 1)
+    session.publish()
+    assert "snake" in game_manager.session_changes(session, tick - 1)
+    assert game_manager.session_changes(session, tick)["head"] == []
+
+
+# lazy ticking tests:
+@pytest.fixture
+def lazy(manager, monkeypatch):
+    """
+    Game manager in lazy ticking mode, on a fake clock with one tick per second.
+    Returns the manager and a function moving the clock forward.
+    """
+    now = [100.0]
+    monkeypatch.setattr(manager, "lazy_ticking", True)
+    monkeypatch.setattr(manager, "clock", lambda: now[0])
+    monkeypatch.setattr(manager, "tick_interval", lambda game: 1.0)
+
+    def wait(seconds):
+        now[0] += seconds
+    return manager, wait
+
+def test_lazy_game_runs_no_timer(lazy):
+    """
+    Check if a lazy game has no scheduler task and advances only by the ticks due when read.
+    """
+    manager, wait = lazy
+    session_id = manager.start_new_game("alice", 20)
+    session = manager.sessions.get(session_id)
+    assert session.task is None
+    assert manager.get_current_state(session_id)["tick"] == 0
+    wait(3.5)
+    assert session.game.tick == 0
+    assert manager.get_current_state(session_id)["tick"] == 3
+    wait(0.4)
+    assert manager.get_current_state(session_id)["tick"] == 3
+
+def test_lazy_moves_land_on_their_tick(lazy):
+    """
+    Check if a move applies from the first tick after it, like with the scheduler.
+    """
+    manager, wait = lazy
+    session_id = manager.start_new_game("alice", 20)
+    session = manager.sessions.get(session_id)
+    reference = session.game.clone()
+    wait(2.5)
+    manager.process_move(session_id, "up")
+    wait(2.0)
+    state = manager.get_current_state(session_id)
+
+    for _ in range(2):
+        reference.update()
+    reference.change_direction("up")
+    for _ in range(2):
+        reference.update()
+    assert state["tick"] == 4
+    assert list(state["snake"]) == list(reference.snake)
+
+def test_lazy_abandoned_game_ends_once(lazy, monkeypatch):
+    """
+    Check if a game read long after it was left catches up to its end and saves its result once.
+    """
+    manager, wait = lazy
+    saved = []
+    monkeypatch.setattr(manager, "save_result", saved.append)
+    session_id = manager.start_new_game("alice", 10)
+    wait(3600)
+    assert manager.get_current_state(session_id)["game_over"] is True
+    assert manager.process_move(session_id, "up")["game_over"] is True
+    assert manager.get_current_state(session_id)["tick"] < 20
+    assert saved == [manager.sessions.get(session_id)]
+
+def test_lazy_changes_have_every_tick(lazy):
+    """
+    Check if a lazy game catching up on several ticks keeps the changes of each one.
+    """
+    manager, wait = lazy
+    session_id = manager.start_new_game("alice", 20)
+    assert "snake" in manager.get_changes(session_id, 0)
+    wait(3.5)
+    changes = manager.get_changes(session_id, 0)
+    assert changes["tick"] == 3
+    assert changes["head"] == [(11, 10), (12, 10), (13, 10)] and changes["removed"] == 3
+
+def test_lazy_long_poll_runs_the_next_tick(lazy):
+    """
+    Check if a lazy long-poll returns the tick that came due, and times out while none is.
+    """
+    manager, wait = lazy
+    session_id = manager.start_new_game("alice", 20)
+    assert manager.wait_for_state(session_id, 0, 0.05)["tick"] == 0
+    wait(1.0)
+    assert manager.wait_for_state(session_id, 0, 0.05)["tick"] == 1
+
+
+# session lifecycle tests:
+def fake_clock():
+    """
+    A clock that only moves when told. Returns the clock and a function moving it forward.
+    """
+    now = [0.0]
+
+    def wait(seconds):
+        now[0] += seconds
+    return lambda: now[0], wait
+
+def test_idle_sessions_are_evicted():
+    """
+    Check if a session left alone longer than the idle TTL is evicted, and a used one is kept.
+    """
+    clock, wait = fake_clock()
+    registry = game_manager.SessionRegistry(idle_ttl=10, clock=clock)
+    first = registry.create("alice", 10).session_id
+    second = registry.create("bob", 10).session_id
+    wait(6)
+    assert registry.use(first)
+    wait(6)
+    assert registry.use(first)
+    assert registry.get(second) is None
+    assert registry.stats()["evicted_idle"] == 1
+
+def test_least_recently_used_sessions_make_room():
+    """
+    Check if creating a session beyond the cap evicts the least recently used one.
+    """
+    clock, wait = fake_clock()
+    registry = game_manager.SessionRegistry(max_sessions=2, clock=clock)
+    first = registry.create("alice", 10).session_id
+    second = registry.create("bob", 10).session_id
+    registry.use(first)
+    third = registry.create("carol", 10).session_id
+    assert [session.session_id for session in registry] == [first, third]
+    assert registry.get(second) is None
+    assert registry.stats()["evicted_lru"] == 1
+
+def test_evicted_sessions_are_handed_over_after_the_lock():
+    """
+    Check if evicted sessions go to on_evict once the registry's lock is released, so it
+    may use the registry, and only when something was evicted.
+    """
+    clock, wait = fake_clock()
+    evicted = []
+    registry = None
+
+    def on_evict(session):
+        evicted.append((session.session_id, len(registry), registry.get(session.session_id)))
+    registry = game_manager.SessionRegistry(idle_ttl=10, max_sessions=2, clock=clock, on_evict=on_evict)
+    first = registry.create("alice", 10).session_id
+    second = registry.create("bob", 10).session_id
+    assert evicted == []
+    third = registry.create("carol", 10).session_id
+    assert evicted == [(first, 2, None)]
+    wait(11)
+    assert registry.use(second) is None
+    assert evicted[1:] == [(second, 0, None), (third, 0, None)]
+
+def test_evicted_live_games_save_their_result(monkeypatch):
+    """
+    Check if evicting a game still running saves its result and wakes its long-polls,
+    while a finished game, already saved, is not saved again.
+    """
+    saved = []
+    monkeypatch.setattr(game_manager, "save_result", saved.append)
+    clock, wait = fake_clock()
+    registry = game_manager.SessionRegistry(idle_ttl=10, clock=clock, on_evict=game_manager.session_evicted)
+    monkeypatch.setattr(game_manager, "sessions", registry)
+    running = registry.create("alice", 10)
+    finished = registry.create("bob", 10)
+    finished.game.game_over = True
+    registry.finish(finished)
+
+    waiter = threading.Thread(target=game_manager.wait_for_state, args=(running.session_id, 0, 5))
+    start = time.monotonic()
+    waiter.start()
+    time.sleep(0.05)
+    wait(11)
+    registry.use("missing")
+    waiter.join(5)
+    assert time.monotonic() - start < 2
+    assert saved == [running]
+
+def test_memory_budget_and_finished_records():
+    """
+    Check if sessions over the memory budget are evicted, and finished games shrink to a record.
+    """
+    registry = game_manager.SessionRegistry(memory_budget=int(2.5 * (3 * 1024 + 8 * 20 ** 2)))
+    sessions = [registry.create(f"player{i}", 20) for i in range(3)]
+    assert len(registry) == 2 and registry.get(sessions[0].session_id) is None
+    assert registry.stats()["evicted_memory"] == 1
+
+    footprint = registry.footprint
+    sessions[1].game.game_over = True
+    assert registry.finish(sessions[1])
+    assert not registry.finish(sessions[1])
+    assert isinstance(sessions[1].game, game_manager.GameRecord) and sessions[1].game.game_over
+    assert registry.footprint < footprint - 3 * 1024
+    registry.create("dave", 20)
+    assert len(registry) == 3
+
+def test_sparse_sessions_are_counted_by_their_snake():
+    """
+    Check if sessions on huge sparse boards count only their snake against the memory budget,
+    not the board area, and their estimate grows with the snake.
+    """
+    registry = game_manager.SessionRegistry(memory_budget=10 * (3 * 1024 + 8 * 25 ** 2))
+    sessions = [registry.create(f"player{i}", 1000) for i in range(20)]
+    assert all(session.game.sparse for session in sessions)
+    assert len(registry) == 20 and registry.stats()["evicted_memory"] == 0
+
+    footprint = registry.footprint
+    game = sessions[-1].game
+    for _ in range(10):
+        game.snake.append(game.snake[-1])
+    registry.use(sessions[-1].session_id)
+    assert registry.footprint == footprint + 10 * game_manager.BYTES_PER_SEGMENT
+
+
+# session memory tests:
+def test_session_memory_is_bounded():
+    """
+    Check if thousands of 25x25 sessions fit in a few kilobytes each.
+    """
+    registry = game_manager.SessionRegistry()
+    registry.create("warmup", 25)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(1000):
+        registry.create(f"player{i}", 25)
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / 1000
+    tracemalloc.stop()
+    assert len(registry) == 1001
+    assert per_session < 12 * 1024
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+from game_api.persistence import ResultWriter
+
+
+class FakeDatabase:
+    """
+    Stands in for the database: every batch takes `delay` seconds and the next `failures` results fail.
+    """
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.results = []
+        self.batches = []
+        self.attempts = []
+
+    def add_game_results(self, results):
+        time.sleep(self.delay)
+        self.batches.append(len(results))
+        self.attempts.extend(result["_id"] for result in results)
+        ids = []
+        for result in results:
+            if self.failures:
+                self.failures -= 1
+                ids.append(None)
+                continue
+            self.results.append((result["player_name"], result["map_size"], result["score"]))
+            ids.append(len(self.results))
+        return ids
+
+
+@pytest.fixture
+def stopped():
+    """
+    Collects writers to stop after the test.
+    """
+    writers = []
+    yield writers.append
+    for writer in writers:
+        writer.stop(timeout=5)
+
+
+# result writer tests:
+def test_submit_does_not_wait_for_the_database(stopped):
+    """
+    Check if results are queued right away and written in the background.
+    """
+    database = FakeDatabase(delay=0.05)
+    writer = ResultWriter(database)
+    stopped(writer)
+    saved = []
+    start = time.perf_counter()
+    for i in range(5):
+        assert writer.submit(f"player{i}", 10, i, 1.0, callback=saved.append)
+    assert time.perf_counter() - start < 0.05
+    assert writer.flush(timeout=5)
+    assert database.results == [(f"player{i}", 10, i) for i in range(5)]
+    assert saved == [1, 2, 3, 4, 5]
+    stats = writer.stats()
+    assert stats["writes"] == 5 and stats["write_queue"] == 0
+    assert stats["max_write_ms"] >= 50
+
+def test_results_are_written_in_batches(stopped):
+    """
+    Check if results queued together go out in batches no larger than the batch size,
+    and only the failed results of a batch are retried.
+    """
+    database = FakeDatabase(failures=3)
+    writer = ResultWriter(database, batch_size=20, batch_window=0.05, retry_delay=0.001)
+    stopped(writer)
+    saved = []
+    for i in range(50):
+        writer.submit(f"player{i}", 10, i, 1.0, callback=saved.append)
+    assert writer.flush(timeout=5)
+    assert sorted(score for _, _, score in database.results) == list(range(50))
+    assert all(saved)
+    assert database.batches == [20, 3, 20, 10] # The 3 failed results are retried before the next batch
+    stats = writer.stats()
+    assert stats["writes"] == 50 and stats["write_batches"] == 4 and stats["write_retries"] == 3
+
+def test_failed_writes_are_retried(stopped):
+    """
+    Check if a failed write is retried, and given up on after the last retry.
+    """
+    database = FakeDatabase(failures=2)
+    writer = ResultWriter(database, batch_window=0, retries=2, retry_delay=0.001)
+    stopped(writer)
+    saved = []
+    writer.submit("alice", 10, 3, 1.0, callback=saved.append)
+    writer.flush(timeout=5)
+    assert saved == [1]
+    database.failures = 3
+    writer.submit("bob", 10, 4, 1.0, callback=saved.append)
+    writer.flush(timeout=5)
+    assert saved == [1, None]
+    stats = writer.stats()
+    assert stats["write_retries"] == 4
+    assert stats["write_failures"] == 1
+
+def test_retries_write_the_same_document(stopped):
+    """
+    Check if every attempt at a result carries the same _id, so a write that landed
+    but was reported as failed is not inserted twice by the retry.
+    """
+    database = FakeDatabase(failures=2)
+    writer = ResultWriter(database, batch_window=0, retry_delay=0.001)
+    stopped(writer)
+    writer.submit("alice", 10, 3, 1.0)
+    writer.submit("bob", 10, 4, 1.0)
+    assert writer.flush(timeout=5)
+    assert len(database.attempts) > 2 and len(set(database.attempts)) == 2
+
+def test_full_queue_drops_results(stopped):
+    """
+    Check if results beyond the queue size are dropped instead of blocking.
+    """
+    release = threading.Event()
+    database = FakeDatabase()
+    database.add_game_results = lambda results: [release.wait(5)] * len(results)
+    writer = ResultWriter(database, max_queue=2, batch_size=1)
+    stopped(writer)
+    accepted = [writer.submit(f"player{i}", 10, 0, 1.0) for i in range(5)]
+    release.set()
+    # The writer may already hold the first result, leaving room for one more
+    assert accepted[:2] == [True, True] and accepted[3:] == [False, False]
+    assert writer.stats()["writes_dropped"] == accepted.count(False)
+
+def test_stop_flushes_the_queue():
+    """
+    Check if stopping the writer writes everything still queued first.
+    """
+    database = FakeDatabase(delay=0.01)
+    writer = ResultWriter(database)
+    for i in range(10):
+        writer.submit(f"player{i}", 10, i, 1.0)
+    assert writer.stop(timeout=5)
+    assert len(database.results) == 10
+
+def test_stop_gives_up_after_its_timeout(capsys):
+    """
+    Check if stopping the writer with a hung database returns after the timeout, and reports
+    how many results it gave up on.
+    """
+    release = threading.Event()
+    database = FakeDatabase()
+    database.add_game_results = lambda results: [release.wait(5)] * len(results)
+    writer = ResultWriter(database, batch_size=1)
+    for i in range(3):
+        writer.submit(f"player{i}", 10, i, 1.0)
+    start = time.monotonic()
+    assert not writer.stop(timeout=0.2)
+    assert time.monotonic() - start < 1
+    assert "3 results unwritten" in capsys.readouterr().out
+    release.set()
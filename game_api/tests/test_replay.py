@@ -0,0 +1,109 @@
+import random
+
+import pytest
+from game_api.engine import Game, Replay, ReplayRecorder, ReplayPlayer, move_snake, is_within_bounds
+
+
+def play(game, bot, ticks):
+    """
+    Plays a game with a bot that heads for the food, avoids walls and the body where
+    possible and sometimes turns at random. Returns the state after every tick.
+    """
+    states = []
+    for _ in range(ticks):
+        head = game.snake[0]
+        safe = [d for d in ["up", "down", "left", "right"]
+                if is_within_bounds(move_snake(head, d), game.board_size)
+                and move_snake(head, d) not in game.snake[:-1]]
+        closer = [d for d in safe if game.food and
+                  abs(move_snake(head, d)[0] - game.food[0]) + abs(move_snake(head, d)[1] - game.food[1])
+                  < abs(head[0] - game.food[0]) + abs(head[1] - game.food[1])]
+        if closer and bot.random() < 0.8:
+            game.change_direction(bot.choice(closer))
+        elif safe and (game.direction not in safe or bot.random() < 0.3):
+            game.change_direction(bot.choice(safe))
+        game.update()
+        states.append((list(game.snake), game.food, game.score, game.game_over))
+        if game.game_over:
+            break
+    return states
+
+
+# seeded game tests:
+def test_same_seed_same_game():
+    """
+    Check if two games with the same seed and inputs are identical.
+    """
+    first = play(Game(board_size=(8, 8), seed=42), random.Random(1), 200)
+    second = play(Game(board_size=(8, 8), seed=42), random.Random(1), 200)
+    assert first == second
+
+def test_seed_is_kept_on_game():
+    """
+    Check if a game without an explicit seed still gets one it can be replayed from.
+    """
+    g = Game()
+    assert 0 <= g.seed < 2 ** 64
+    assert Game(seed=g.seed).food == g.food
+
+
+# replay tests:
+def test_replay_roundtrip_bytes():
+    """
+    Check if a replay survives encoding and decoding unchanged.
+    """
+    replay = Replay((25, 20), (3, 4), "up", 2 ** 64 - 1, [(0, "left"), (5, "up"), (300, "right")], 310)
+    decoded = Replay.from_bytes(replay.to_bytes())
+    assert decoded.board_size == (25, 20)
+    assert decoded.initial_position == (3, 4)
+    assert decoded.direction == "up"
+    assert decoded.seed == 2 ** 64 - 1
+    assert decoded.events == [(0, "left"), (5, "up"), (300, "right")]
+    assert decoded.end_tick == 310
+
+def test_replay_reproduces_recorded_game():
+    """
+    Check if playing back a recording ends in exactly the recorded state.
+    """
+    game = Game(board_size=(10, 10), seed=7)
+    recorder = ReplayRecorder(game)
+    states = play(game, random.Random(4), 500)
+    data = recorder.to_bytes()
+
+    replayed = ReplayPlayer(data).run()
+    assert replayed.tick == game.tick
+    assert (list(replayed.snake), replayed.food, replayed.score, replayed.game_over) == states[-1]
+
+def test_replay_fast_forward_to_any_tick():
+    """
+    Check if a replay can stop at any tick and match the game as it was then.
+    """
+    game = Game(board_size=(12, 12), seed=11)
+    recorder = ReplayRecorder(game)
+    states = play(game, random.Random(5), 300)
+    player = ReplayPlayer(recorder.to_bytes())
+    for tick in [1, 2, 10, len(states) // 2, len(states)]:
+        replayed = player.advance_to(tick)
+        assert (list(replayed.snake), replayed.food, replayed.score, replayed.game_over) == states[tick - 1]
+
+def test_replay_is_compact():
+    """
+    Check if recorded inputs cost one or two bytes each on top of a fixed header.
+    """
+    game = Game(board_size=(25, 25), seed=3)
+    recorder = ReplayRecorder(game)
+    play(game, random.Random(9), 1000)
+    data = recorder.to_bytes()
+    assert len(recorder.replay.events) > 10
+    assert len(data) <= 30 + 2 * len(recorder.replay.events)
+
+def test_replay_rejects_bad_input():
+    """
+    Check if recording a game that already started, or decoding garbage, fails clearly.
+    """
+    g = Game()
+    g.update()
+    with pytest.raises(ValueError):
+        ReplayRecorder(g)
+    with pytest.raises(ValueError):
+        Replay.from_bytes(b"NOPE" + bytes(40))
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from game_api.scheduler import TickScheduler
+
+
+@pytest.fixture
+def scheduler():
+    """
+    A tick scheduler stopped after the test.
+    """
+    scheduler = TickScheduler()
+    yield scheduler
+    scheduler.stop()
+
+
+def repeat(times, interval, work=0.0):
+    """
+    Builds a job that runs a number of times, sleeping for work seconds on each run.
+    Returns the job and the list of monotonic times it ran at, plus an event set on the last run.
+    """
+    runs = []
+    done = threading.Event()
+
+    def job():
+        runs.append(time.monotonic())
+        time.sleep(work)
+        if len(runs) == times:
+            done.set()
+            return None
+        return interval
+    return job, runs, done
+
+
+# scheduling tests:
+def test_task_runs_until_it_stops(scheduler):
+    """
+    Check if a task runs again after every delay it returns and stops on None.
+    """
+    job, runs, done = repeat(5, 0.01)
+    task = scheduler.schedule(job, 0.01)
+    assert done.wait(2)
+    time.sleep(0.05)
+    assert len(runs) == 5
+    assert task.ticks == 5
+
+def test_ticks_do_not_drift(scheduler):
+    """
+    Check if deadlines are absolute: time spent in the job does not stretch the loop.
+    """
+    job, runs, done = repeat(21, 0.02, work=0.01)
+    start = time.monotonic()
+    scheduler.schedule(job, 0.02)
+    assert done.wait(5)
+    # 21 runs every 20ms end ~420ms after start; drifting by the 10ms of work would take ~620ms
+    assert runs[-1] - start < 0.52
+
+def test_cancelled_task_stops(scheduler):
+    """
+    Check if a cancelled task does not run again.
+    """
+    job, runs, _ = repeat(1000, 0.01)
+    task = scheduler.schedule(job, 0.01)
+    time.sleep(0.05)
+    task.cancel()
+    count = len(runs)
+    time.sleep(0.05)
+    assert len(runs) <= count + 1
+    assert scheduler.stats()["tasks"] == 0
+
+def test_late_ticks_are_counted(scheduler):
+    """
+    Check if a job slower than its interval makes the following ticks late, and they are reported.
+    """
+    job, _, done = repeat(5, 0.01, work=0.03)
+    task = scheduler.schedule(job, 0.01)
+    assert done.wait(2)
+    assert task.late_ticks >= 3
+    stats = scheduler.stats()
+    assert stats["late_ticks"] == task.late_ticks
+    assert stats["max_lateness_ms"] >= 15
+
+def test_many_tasks_one_thread(scheduler):
+    """
+    Check if hundreds of tasks are driven by a single thread.
+    """
+    threads_before = threading.active_count()
+    events = []
+    for _ in range(300):
+        job, _, done = repeat(3, 0.01)
+        events.append(done)
+        scheduler.schedule(job, 0.01)
+    assert threading.active_count() == threads_before + 1
+    assert all(done.wait(2) for done in events)
+    assert scheduler.stats()["ticks"] == 900
+
+def test_earlier_deadline_wakes_scheduler(scheduler):
+    """
+    Check if a task due sooner than the one the thread sleeps for still runs on time.
+    """
+    scheduler.schedule(lambda: None, 10)
+    job, runs, done = repeat(1, 0)
+    start = time.monotonic()
+    scheduler.schedule(job, 0.01)
+    assert done.wait(1)
+    assert runs[0] - start < 0.2
@@ -0,0 +1,83 @@
+from unittest import mock
+
+import mongomock
+import pytest
+from game_api.sharding import ShardPool, shard_for
+
+
+def use_mongomock():
+    """
+    Worker initializer: keep the shard's database in memory.
+    """
+    mock.patch('game_api.database.MongoClient', mongomock.MongoClient).start()
+
+
+@pytest.fixture(scope="module")
+def router():
+    """
+    Router to two shard processes, stopped after the module.
+    """
+    with ShardPool(2, initializer=use_mongomock) as pool:
+        yield pool.router()
+
+
+# routing tests:
+def test_shard_for_is_stable():
+    """
+    Check if a session id always maps to the same shard, and ids spread over all shards.
+    """
+    assert shard_for("abc", 4) == shard_for("abc", 4)
+    assert {shard_for(f"session{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+# sharded runtime tests:
+def test_sharded_start_state_move(router):
+    """
+    Check if a game started through the router is reachable for state and moves.
+    """
+    session_id = router.start_new_game("alice", 10)
+    state = router.get_current_state(session_id)
+    assert state["board_size"] == [10, 10]
+    assert list(state["snake"]) == [(5, 5)]
+    router.process_move(session_id, "up")
+    assert router.end_session(session_id) is True
+    assert router.get_current_state(session_id) is None
+
+def test_sharded_sessions_spread_over_shards(router):
+    """
+    Check if sessions land on every shard and the stats add up over the shards.
+    """
+    ids = [router.start_new_game(f"player{i}", 10) for i in range(20)]
+    assert {router.shard_for(session_id) for session_id in ids} == {0, 1}
+    stats = router.get_scheduler_stats()
+    assert stats["shards"] == 2
+    assert stats["sessions"] >= 20
+    for session_id in ids:
+        router.end_session(session_id)
+
+def test_sharded_unknown_session(router):
+    """
+    Check if unknown sessions give None like the in-process game manager.
+    """
+    assert router.get_current_state("missing") is None
+    assert router.process_move("missing", "up") is None
+
+def test_sharded_long_poll(router):
+    """
+    Check if a long-poll through the router waits on the shard for the next tick.
+    """
+    session_id = router.start_new_game("alice", 25)
+    since = router.get_current_state(session_id)["tick"]
+    assert router.wait_for_state(session_id, since, 5.0)["tick"] == since + 1
+    assert router.wait_for_state("missing", 0, 1.0) is None
+    router.end_session(session_id)
+
+def test_sharded_changes(router):
+    """
+    Check if changes since a tick come back through the router once the shard keeps them.
+    """
+    session_id = router.start_new_game("alice", 25)
+    assert "snake" in router.get_changes(session_id, 0)
+    changes = router.get_changes(session_id, 0, 5.0)
+    assert changes["since"] == 0 and len(changes["head"]) == changes["tick"]
+    router.end_session(session_id)
@@ -0,0 +1,227 @@
+import asyncio
+import contextlib
+import os
+import threading
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snake_project.settings")
+django.setup()
+
+import pytest  # noqa: E402
+from django.test import AsyncRequestFactory, Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from game_api import game_manager, views  # noqa: E402
+from game_api.async_runtime import AsyncGameRuntime  # noqa: E402
+from game_api.encoding import BINARY_CONTENT_TYPE, decode_state_binary  # noqa: E402
+
+with contextlib.suppress(RuntimeError):
+    setup_test_environment()
+
+STATE_URL = "/api/game/state"
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """
+    A session in an empty registry of the threaded game manager, served by the sync views.
+    It has no game loop: the test runs its ticks with tick().
+    """
+    registry = game_manager.SessionRegistry()
+    monkeypatch.setattr(game_manager, "sessions", registry)
+    monkeypatch.setattr(game_manager, "lazy_ticking", False)
+    with override_settings(SNAKE_RUNTIME="threads"):
+        yield registry.create("alice", 25)
+
+
+@pytest.fixture
+def async_session(monkeypatch):
+    """
+    A session of a fresh async runtime, served by the async views; no tick loop either.
+    """
+    runtime = AsyncGameRuntime()
+    monkeypatch.setattr(views, "runtime", runtime)
+    return runtime.sessions.create("alice", 25)
+
+
+def tick(session):
+    """
+    Runs one tick of a session's game and publishes it, like its game loop would.
+    """
+    with session.lock:
+        session.publish(session.game.update())
+
+
+def get_async(view, headers=None, **params):
+    """
+    Sends a GET with the given query parameters and headers to an async view.
+    """
+    request = AsyncRequestFactory().get(STATE_URL, params, headers=headers)
+    return asyncio.run(view.as_view()(request))
+
+
+# state view tests:
+def test_state_etag_and_not_modified(session):
+    """
+    Check if the state carries its tick as ETag, and If-None-Match with it (also as * or W/)
+    gets an empty 304 until the next tick.
+    """
+    client = Client()
+    response = client.get(STATE_URL, {"session_id": session.session_id})
+    assert response.status_code == 200
+    assert response["ETag"] == '"0"' and response["Cache-Control"] == "no-cache"
+    assert response.json()["tick"] == 0
+
+    for if_none_match in ('"0"', '*', 'W/"0"', '"7", "0"'):
+        response = client.get(STATE_URL, {"session_id": session.session_id}, HTTP_IF_NONE_MATCH=if_none_match)
+        assert response.status_code == 304 and response.content == b""
+        assert response["ETag"] == '"0"'
+
+    tick(session)
+    response = client.get(STATE_URL, {"session_id": session.session_id}, HTTP_IF_NONE_MATCH='"0"')
+    assert response.status_code == 200 and response["ETag"] == '"1"'
+    response = client.get(STATE_URL, {"session_id": session.session_id},
+                          HTTP_ACCEPT="application/octet-stream", HTTP_IF_NONE_MATCH='"1"')
+    assert response.status_code == 200 and response["ETag"] == '"1-bin"'
+
+def test_state_rejects_bad_queries(session):
+    """
+    Check if a missing session id or a since/wait that is not an integer gives a 400,
+    and an unknown session a 404.
+    """
+    client = Client()
+    assert client.get(STATE_URL).status_code == 400
+    for params, field in (({"since": "abc"}, "since"), ({"since": "0", "wait": "soon"}, "wait")):
+        response = client.get(STATE_URL, {"session_id": session.session_id, **params})
+        assert response.status_code == 400 and list(response.json()) == [field]
+    assert client.get(STATE_URL, {"session_id": "nope"}).status_code == 404
+    assert client.get(STATE_URL, {"session_id": "nope", "since": "0", "wait": "10"}).status_code == 404
+
+@override_settings(SNAKE_STATE_MAX_WAIT_MS=100)
+def test_long_poll_wait_is_capped(session):
+    """
+    Check if a long-poll waits at most SNAKE_STATE_MAX_WAIT_MS, whatever wait it asks for,
+    and returns as soon as a newer tick is published.
+    """
+    client = Client()
+    start = time.monotonic()
+    response = client.get(STATE_URL, {"session_id": session.session_id, "since": "0", "wait": "60000"})
+    assert response.status_code == 200 and response.json()["tick"] == 0
+    assert 0.05 < time.monotonic() - start < 2
+
+    with override_settings(SNAKE_STATE_MAX_WAIT_MS=5000):
+        threading.Timer(0.05, tick, [session]).start()
+        start = time.monotonic()
+        response = client.get(STATE_URL, {"session_id": session.session_id, "since": "0", "wait": "5000"})
+        assert response.json()["tick"] == 1
+        assert time.monotonic() - start < 2
+
+
+def get_state(client, session, binary=False, **params):
+    """
+    Polls the state view and returns the response with its decoded body, cells as tuples.
+    """
+    headers = {"HTTP_ACCEPT": BINARY_CONTENT_TYPE} if binary else {}
+    response = client.get(STATE_URL, {"session_id": session.session_id, **params}, **headers)
+    assert response.status_code == 200
+    body = decode_state_binary(response.content) if binary else response.json()
+    for key in ("snake", "head"):
+        if key in body:
+            body[key] = [tuple(cell) for cell in body[key]]
+    return response, body
+
+
+# state changes view tests:
+@pytest.mark.parametrize("binary", [False, True])
+def test_changes_fall_back_to_full_state(session, binary):
+    """
+    Check if the first since= poll, a negative since and a since past the current tick
+    each get the full state instead of changes.
+    """
+    client = Client()
+    _, body = get_state(client, session, binary, since="0")
+    assert "snake" in body and "since" not in body
+    tick(session)
+    for since in ("-1", "5"):
+        _, body = get_state(client, session, binary, since=since)
+        assert "snake" in body and "since" not in body and body["tick"] == 1
+    _, body = get_state(client, session, binary, since="0")
+    assert body["since"] == 0 and len(body["head"]) == 1
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_changes_rebuild_the_snake(session, binary):
+    """
+    Check if putting the new heads in front of the snake and dropping `removed` cells
+    from its end gives the snake of the full state.
+    """
+    client = Client()
+    _, state = get_state(client, session, binary, since="0")
+    snake = state["snake"]
+    for _ in range(3):
+        since = state["tick"]
+        tick(session)
+        tick(session)
+        _, state = get_state(client, session, binary, since=str(since))
+        assert state["since"] == since and state["tick"] == since + 2
+        snake = state["head"][::-1] + snake
+        snake = snake[:len(snake) - state["removed"]]
+        _, full = get_state(client, session, binary)
+        assert snake == full["snake"]
+
+def test_changes_etag_holds_since(session):
+    """
+    Check if changes since different ticks get different ETags, so a 304 is only
+    given for changes since the same tick.
+    """
+    client = Client()
+    get_state(client, session, since="0")
+    tick(session)
+    tick(session)
+    response, _ = get_state(client, session, since="0")
+    assert response["ETag"] == '"0-2-delta"'
+    response, _ = get_state(client, session, since="1")
+    assert response["ETag"] == '"1-2-delta"'
+    response, _ = get_state(client, session, binary=True, since="1")
+    assert response["ETag"] == '"1-2-delta-bin"'
+    response = client.get(STATE_URL, {"session_id": session.session_id, "since": "0"}, HTTP_IF_NONE_MATCH='"1-2-delta"')
+    assert response.status_code == 200 and response.json()["since"] == 0
+    response = client.get(STATE_URL, {"session_id": session.session_id, "since": "1"}, HTTP_IF_NONE_MATCH='"1-2-delta"')
+    assert response.status_code == 304
+
+
+# async state view tests:
+def test_async_state_etag_and_not_modified(async_session):
+    """
+    Check if the async state view answers with the same ETags and 304s as the sync one.
+    """
+    view = views.AsyncGameStateView
+    response = get_async(view, session_id=async_session.session_id)
+    assert response.status_code == 200 and response["ETag"] == '"0"'
+    for if_none_match in ('"0"', '*', 'W/"0"'):
+        response = get_async(view, {"If-None-Match": if_none_match}, session_id=async_session.session_id)
+        assert response.status_code == 304 and response.content == b""
+    tick(async_session)
+    response = get_async(view, {"If-None-Match": '"0"'}, session_id=async_session.session_id)
+    assert response.status_code == 200 and response["ETag"] == '"1"'
+
+def test_async_state_rejects_bad_queries(async_session):
+    """
+    Check if the async state view gives the same 400s and 404s as the sync one.
+    """
+    view = views.AsyncGameStateView
+    assert get_async(view).status_code == 400
+    assert get_async(view, session_id=async_session.session_id, since="abc").status_code == 400
+    assert get_async(view, session_id=async_session.session_id, since="0", wait="soon").status_code == 400
+    assert get_async(view, session_id="nope").status_code == 404
+    assert get_async(view, session_id="nope", since="0", wait="10").status_code == 404
+
+@override_settings(SNAKE_STATE_MAX_WAIT_MS=100)
+def test_async_long_poll_wait_is_capped(async_session):
+    """
+    Check if an async long-poll also waits at most SNAKE_STATE_MAX_WAIT_MS.
+    """
+    start = time.monotonic()
+    response = get_async(views.AsyncGameStateView, session_id=async_session.session_id, since="0", wait="60000")
+    assert response.status_code == 200
+    assert 0.05 < time.monotonic() - start < 2
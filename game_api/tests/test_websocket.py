@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snake_project.settings")
+django.setup()
+
+import pytest  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from game_api import async_runtime, game_manager, websocket  # noqa: E402
+from game_api.async_runtime import AsyncGameRuntime  # noqa: E402
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """
+    Async runtime behind the game socket, with fast ticks and the database calls replaced.
+    """
+    monkeypatch.setattr(game_manager, "register_player", lambda username, map_size: True)
+    monkeypatch.setattr(game_manager, "save_result", lambda session: None)
+    monkeypatch.setattr(async_runtime, "tick_interval", lambda game: 0.01)
+    runtime = AsyncGameRuntime()
+    monkeypatch.setattr(websocket, "runtime", runtime)
+    with override_settings(SNAKE_RUNTIME="async"):
+        yield runtime
+
+
+class FakeClient:
+    """
+    Drives the socket like an ASGI server: messages put on `incoming` are received by the app,
+    and everything the app sends is collected in `sent`.
+    """
+
+    def __init__(self, session_id, path=websocket.WEBSOCKET_PATH):
+        self.scope = {"type": "websocket", "path": path, "query_string": f"session_id={session_id}".encode()}
+        self.incoming = asyncio.Queue()
+        self.incoming.put_nowait({"type": "websocket.connect"})
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+        if message["type"] == "websocket.close":
+            self.incoming.put_nowait({"type": "websocket.disconnect", "code": message.get("code", 1000)})
+
+    def connect(self):
+        return asyncio.ensure_future(websocket.game_socket(self.scope, self.receive, self.send))
+
+    def move(self, direction):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps({"direction": direction})})
+
+    def states(self):
+        return [json.loads(message["text"]) for message in self.sent if message["type"] == "websocket.send"]
+
+
+def run(runtime, coroutine):
+    """
+    Runs a test coroutine, then stops the runtime on the same loop.
+    """
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await runtime.stop()
+    return asyncio.run(main())
+
+
+# game socket tests:
+def test_socket_pushes_every_tick_and_takes_moves(runtime):
+    """
+    Check if the socket pushes each new tick once, applies moves sent on it,
+    and a disconnect leaves the session playing.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 100)
+        client = FakeClient(session_id)
+        socket = client.connect()
+        await asyncio.sleep(0.05)
+        client.move("up")
+        await asyncio.sleep(0.05)
+        client.incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+        await asyncio.wait_for(socket, 1)
+        session = runtime.sessions.get(session_id)
+        tick = session.game.tick
+        await asyncio.sleep(0.03)
+        return client, session, tick
+
+    client, session, tick = run(runtime, scenario())
+    assert client.sent[0] == {"type": "websocket.accept"}
+    ticks = [state["tick"] for state in client.states()]
+    assert ticks[0] == 0 and len(ticks) >= 5
+    assert ticks == sorted(set(ticks))
+    assert session.game.direction == "up"
+    assert not session.game.game_over and session.game.tick > tick
+
+def test_socket_closes_after_the_final_state(runtime):
+    """
+    Check if the socket sends the game over state, then closes normally.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 5)
+        runtime.sessions.get(session_id).game.food = None
+        client = FakeClient(session_id)
+        await asyncio.wait_for(client.connect(), 1)
+        return client
+
+    client = run(runtime, scenario())
+    assert client.states()[-1]["game_over"]
+    assert client.sent[-1] == {"type": "websocket.close", "code": websocket.CLOSE_GAME_OVER}
+
+def test_socket_refuses_unknown_sessions_and_bad_moves(runtime):
+    """
+    Check if unknown sessions and other paths are refused, and an invalid move gets an error message.
+    """
+    async def scenario():
+        unknown = FakeClient("missing")
+        await asyncio.wait_for(unknown.connect(), 1)
+        session_id = await runtime.start_game("alice", 25)
+        elsewhere = FakeClient(session_id, path="/api/game/other")
+        await asyncio.wait_for(elsewhere.connect(), 1)
+
+        client = FakeClient(session_id)
+        socket = client.connect()
+        client.move("sideways")
+        await asyncio.sleep(0.02)
+        runtime.end_session(session_id)
+        await asyncio.wait_for(socket, 1)
+        return unknown, elsewhere, client
+
+    unknown, elsewhere, client = run(runtime, scenario())
+    assert unknown.sent == [{"type": "websocket.close", "code": websocket.CLOSE_UNKNOWN_SESSION}]
+    assert elsewhere.sent == [{"type": "websocket.close"}]
+    assert any(state.get("error") == "Invalid move." for state in client.states())
+    assert client.sent[-1] == {"type": "websocket.close", "code": websocket.CLOSE_UNKNOWN_SESSION}
+
+@pytest.mark.parametrize("snake_runtime", ["threads", "sharded"])
+def test_socket_needs_the_async_runtime(runtime, snake_runtime):
+    """
+    Check if the socket is closed with CLOSE_RUNTIME_UNSUPPORTED and a reason naming the runtime
+    when the games run elsewhere, even for a session the async runtime happens to know.
+    """
+    async def scenario():
+        session_id = await runtime.start_game("alice", 25)
+        client = FakeClient(session_id)
+        with override_settings(SNAKE_RUNTIME=snake_runtime):
+            await asyncio.wait_for(client.connect(), 1)
+        return client
+
+    client = run(runtime, scenario())
+    assert client.sent[0] == {"type": "websocket.accept"}
+    close = client.sent[1]
+    assert close["type"] == "websocket.close" and close["code"] == websocket.CLOSE_RUNTIME_UNSUPPORTED
+    assert snake_runtime in close["reason"]
+    assert len(client.sent) == 2
@@ -1,8 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from .views import GameStateView, MoveView, StartGameView
+from .views import GameStateView, MoveView, StartGameView, GameLimitsView, SchedulerStatsView
+from .views import AsyncGameStateView, AsyncMoveView, AsyncStartGameView, AsyncSchedulerStatsView
+
+# The async views share the paths, so clients work the same under either runtime
+if settings.SNAKE_RUNTIME == 'async':
+    start_view, state_view, move_view, stats_view = (
+        AsyncStartGameView, AsyncGameStateView, AsyncMoveView, AsyncSchedulerStatsView)
+else:
+    start_view, state_view, move_view, stats_view = StartGameView, GameStateView, MoveView, SchedulerStatsView
 
 urlpatterns = [
-    path('game/start', StartGameView.as_view(), name='start_game'),
-    path('game/state', GameStateView.as_view(), name='game_state'),
-    path('game/move', MoveView.as_view(), name='game_move'),
+    path('game/start', start_view.as_view(), name='start_game'),
+    path('game/state', state_view.as_view(), name='game_state'),
+    path('game/move', move_view.as_view(), name='game_move'),
+    path('game/limits', GameLimitsView.as_view(), name='game_limits'),
+    path('game/stats', stats_view.as_view(), name='scheduler_stats'),
 ]
\ No newline at end of file
@@ -1,10 +1,108 @@
-from django.http import JsonResponse
+import json
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework import status
 from .serializers import GameStateSerializer, MoveSerializer, StartGameSerializer
-from . import game_manager
+from . import game_manager, sharding
+from .encoding import BINARY_CONTENT_TYPE, encode_changes_as, encoded_states, preferred_content_type
+from .async_runtime import runtime
 import traceback
 
+
+def game_backend():
+    """
+    The runtime behind the sync views: the in-process game manager,
+    or the router to the shard processes when SNAKE_RUNTIME is "sharded".
+    """
+    if settings.SNAKE_RUNTIME == 'sharded':
+        return sharding.get_router(settings.SNAKE_SHARDS)
+    return game_manager
+
+class BinaryStateRenderer(BaseRenderer):
+    """
+    Lets DRF's content negotiation accept the binary state format instead of answering 406;
+    the state views encode their bodies themselves (see _state_body).
+    """
+    media_type = BINARY_CONTENT_TYPE
+    format = 'bin'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+STATE_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, BinaryStateRenderer]
+
+
+def _state_query(params):
+    """
+    Reads the parameters of a state request: ?since=<tick> asks for the changes since that
+    tick, and &wait=<ms> makes it a long-poll waiting for the next tick.
+    Returns (since, wait in seconds, errors); wait is 0 unless both are given, and capped.
+    """
+    errors = {}
+    values = {}
+    for name in ("since", "wait"):
+        try:
+            values[name] = int(params[name]) if params.get(name) else None
+        except ValueError:
+            errors[name] = ["A valid integer is required."]
+    if errors:
+        return None, 0, errors
+    since, wait = values["since"], values["wait"]
+    if since is None or not wait or wait < 0:
+        return since, 0, errors
+    return since, min(wait, settings.SNAKE_STATE_MAX_WAIT_MS) / 1000, errors
+
+
+def _state_body(request, session_id, state):
+    """
+    A session's state (or changes since a tick) as a response, in JSON or, if the Accept
+    header asks for application/octet-stream, in the compact binary format (see
+    game_api.encoding). A full state comes from encoded_states: encoded once per tick and
+    format, straight from the state, instead of through GameStateSerializer.
+    """
+    content_type = preferred_content_type(request.headers.get('Accept'))
+    if 'since' in state:
+        body = encode_changes_as(state, content_type)
+    else:
+        body = encoded_states.body(session_id, state, content_type)
+    response = HttpResponse(body, content_type=content_type)
+    response['Vary'] = 'Accept'
+    return response
+
+
+def _state_response(request, session_id, state):
+    """
+    The response to a state request. The ETag is the state's tick, so a client sending it
+    back in If-None-Match gets an empty 304 until the next tick, without encoding anything.
+    Changes carry their since tick in it too, as their body depends on it.
+    """
+    binary = preferred_content_type(request.headers.get('Accept')) == BINARY_CONTENT_TYPE
+    since = f'{state["since"]}-' if 'since' in state else ''
+    etag = (f'"{since}{state["tick"]}{"-over" if state["game_over"] else ""}{"-delta" if since else ""}'
+            f'{"-bin" if binary else ""}"')
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or etag in etags or f'W/{etag}' in etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Vary'] = 'Accept'
+            return response
+    response = _state_body(request, session_id, state)
+    response['ETag'] = etag
+    # Browsers revalidate every poll with If-None-Match instead of reusing a stale state
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 class StartGameView(APIView):
     """
     Starts a new game session.
@@ -18,27 +116,27 @@ class StartGameView(APIView):
             print(f"Received start request: User={username}, Size={map_size}")
 
             print(f"DEBUG: About to call start_new_game for {username}...")
-            success = game_manager.start_new_game(username, map_size)
-            print(f"DEBUG: Returned from start_new_game. Value: {success} (Type: {type(success)})") # <-- ADDED/MODIFIED
+            session_id = game_backend().start_new_game(username, map_size)
+            print(f"DEBUG: Returned from start_new_game. Session: {session_id}")
 
-            if success:
+            if session_id:
                 print("DEBUG: start_new_game reported success. Attempting to get state...")
                 try:
-                    initial_state = game_manager.get_current_state()
+                    initial_state = game_backend().get_current_state(session_id)
                     print(f"DEBUG: Successfully got state: {initial_state}")
 
                     state_serializer = GameStateSerializer(initial_state)
                     print(f"DEBUG: Serialized state: {state_serializer.data}")
                     print("DEBUG: Attempting to return JsonResponse...")
 
-                    return JsonResponse(state_serializer.data, status=status.HTTP_200_OK)
+                    return JsonResponse({"session_id": session_id, **state_serializer.data}, status=status.HTTP_200_OK)
 
                 except Exception as e:
                     print(f"ERROR: Exception occurred after successful start_new_game: {e}")
                     traceback.print_exc()
                     return JsonResponse({"error": f"Internal server error after game start: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             else:
-                 print(f"DEBUG: start_new_game returned False or None ({success}). Skipping state retrieval.")
+                 print("DEBUG: start_new_game returned no session. Skipping state retrieval.")
                  print("Failed to start game (e.g., DB connection issue).")
                  return JsonResponse({"error": "Failed to start game, check server logs."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         else:
@@ -46,37 +144,78 @@ class StartGameView(APIView):
             return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class GameLimitsView(APIView):
+    """
+    Returns the map size limits, so clients can follow the server configuration.
+    Accepts GET requests.
+    """
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            "min_map_size": settings.SNAKE_MIN_MAP_SIZE,
+            "max_map_size": settings.SNAKE_MAX_MAP_SIZE,
+        }, status=status.HTTP_200_OK)
+
+
+class SchedulerStatsView(APIView):
+    """
+    Returns the tick scheduler counters (ticks run, late ticks, worst lateness).
+    Accepts GET requests.
+    """
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(game_backend().get_scheduler_stats(), status=status.HTTP_200_OK)
+
+
 class GameStateView(APIView):
     """
     Returns the current state of the game.
-    Accepts GET requests.
+    Accepts GET requests with the session_id query parameter. With since=<tick> only the
+    changes since that tick are returned (the full state if the client is too far behind),
+    and with wait=<ms> as well the request waits up to wait ms for a newer tick.
+    Answers 304 when If-None-Match holds the ETag of the current state.
+    Accept: application/octet-stream selects the binary format (game_api.encoding).
     """
+    renderer_classes = STATE_RENDERERS
+
     def get(self, request, *args, **kwargs):
-        current_state = game_manager.get_current_state()
-        serializer = GameStateSerializer(current_state)
-        return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return JsonResponse({"session_id": ["This query parameter is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        since, wait, errors = _state_query(request.query_params)
+        if errors:
+            return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+        if since is not None:
+            current_state = game_backend().get_changes(session_id, since, wait)
+        else:
+            current_state = game_backend().get_current_state(session_id)
+        if current_state is None:
+            return JsonResponse({"error": "Unknown session."}, status=status.HTTP_404_NOT_FOUND)
+        return _state_response(request, session_id, current_state)
 
 
 class MoveView(APIView):
     """
     Processes a player's move.
-    Accepts POST requests with the direction.
+    Accepts POST requests with the session_id and the direction.
     Returns the updated game state.
     """
+    renderer_classes = STATE_RENDERERS
+
     def post(self, request, *args, **kwargs):
         serializer = MoveSerializer(data=request.data)
         if serializer.is_valid():
+            session_id = serializer.validated_data['session_id']
             direction = serializer.validated_data['direction']
-            print(f"Received move request: Direction={direction}")
+            print(f"Received move request: Session={session_id}, Direction={direction}")
 
             try:
-                print(f"DEBUG [MoveView]: Calling game_manager.process_move('{direction}')...")
-                new_state = game_manager.process_move(direction)
-                print(f"DEBUG [MoveView]: Returned from game_manager.process_move.")
+                print(f"DEBUG [MoveView]: Calling process_move('{direction}')...")
+                new_state = game_backend().process_move(session_id, direction)
+                print(f"DEBUG [MoveView]: Returned from process_move.")
+                if new_state is None:
+                    return JsonResponse({"error": "Unknown session."}, status=status.HTTP_404_NOT_FOUND)
 
-                state_serializer = GameStateSerializer(new_state)
-                print(f"DEBUG [MoveView]: Returning JsonResponse for move '{direction}'.")
-                return JsonResponse(state_serializer.data, status=status.HTTP_200_OK)
+                print(f"DEBUG [MoveView]: Returning the state for move '{direction}'.")
+                return _state_body(request, session_id, new_state)
 
             except Exception as e:
                  print(f"ERROR [MoveView]: Exception during process_move call or serialization: {e}")
@@ -85,3 +224,76 @@ class MoveView(APIView):
         else:
             print(f"Invalid move request data: {serializer.errors}")
             return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# --- Async views (ASGI) ---
+# Served instead of the views above when SNAKE_RUNTIME is "async" (the default under asgi.py).
+# They run on the server's event loop next to the AsyncGameRuntime tick loop, so an idle
+# or waiting player costs no thread.
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncStartGameView(View):
+    """
+    Async version of StartGameView.
+    """
+    async def post(self, request, *args, **kwargs):
+        serializer = StartGameSerializer(data=_json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        session_id = await runtime.start_game(serializer.validated_data['username'],
+                                              serializer.validated_data['map_size'])
+        if not session_id:
+            return JsonResponse({"error": "Failed to start game, check server logs."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        state = GameStateSerializer(runtime.get_state(session_id)).data
+        return JsonResponse({"session_id": session_id, **state}, status=status.HTTP_200_OK)
+
+
+class AsyncGameStateView(View):
+    """
+    Async version of GameStateView. A long-poll waits on the event loop, holding no thread.
+    """
+    async def get(self, request, *args, **kwargs):
+        session_id = request.GET.get('session_id')
+        if not session_id:
+            return JsonResponse({"session_id": ["This query parameter is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        since, wait, errors = _state_query(request.GET)
+        if errors:
+            return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+        if since is not None:
+            state = await runtime.changes(session_id, since, wait)
+        else:
+            state = runtime.get_state(session_id)
+        if state is None:
+            return JsonResponse({"error": "Unknown session."}, status=status.HTTP_404_NOT_FOUND)
+        return _state_response(request, session_id, state)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncMoveView(View):
+    """
+    Async version of MoveView.
+    """
+    async def post(self, request, *args, **kwargs):
+        serializer = MoveSerializer(data=_json_body(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        session_id = serializer.validated_data['session_id']
+        state = runtime.move(session_id, serializer.validated_data['direction'])
+        if state is None:
+            return JsonResponse({"error": "Unknown session."}, status=status.HTTP_404_NOT_FOUND)
+        return _state_body(request, session_id, state)
+
+
+class AsyncSchedulerStatsView(View):
+    """
+    Async version of SchedulerStatsView.
+    """
+    async def get(self, request, *args, **kwargs):
+        return JsonResponse(runtime.stats(), status=status.HTTP_200_OK)
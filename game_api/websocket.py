@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import json
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+from .async_runtime import runtime
+from .encoding import encoded_states
+from .engine.engine_core import DIRECTIONS
+
+# Path of the game socket on the ASGI app: /api/game/ws?session_id=<id>
+WEBSOCKET_PATH = "/api/game/ws"
+# Close codes: the game ended normally / the session is unknown or was ended /
+# the games do not run on the async runtime, so there is nothing to push from
+CLOSE_GAME_OVER = 1000
+CLOSE_UNKNOWN_SESSION = 4404
+CLOSE_RUNTIME_UNSUPPORTED = 4503
+
+
+async def game_socket(scope, receive, send):
+    """
+    ASGI WebSocket endpoint for one game session. Instead of polling the state and
+    posting every move, the client keeps one connection open: the state is pushed as
+    each tick is published, and {"direction": "up"} messages change the direction.
+    The socket closes with CLOSE_GAME_OVER after the final state, and with
+    CLOSE_UNKNOWN_SESSION if the session is unknown or ends. A client that disconnects
+    only loses the socket; its session plays on and can be read over HTTP again.
+    Only the async runtime serves sockets: under any other SNAKE_RUNTIME the socket is
+    accepted and closed at once with CLOSE_RUNTIME_UNSUPPORTED, and clients poll over HTTP.
+    Args:
+        scope (dict): the ASGI connection scope, with the session_id in the query string.
+        receive (callable): ASGI receive.
+        send (callable): ASGI send.
+    """
+    if scope["path"] != WEBSOCKET_PATH:
+        await _reject(receive, send)
+        return
+    query = parse_qs(scope.get("query_string", b"").decode())
+    session_id = query.get("session_id", [""])[0]
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if settings.SNAKE_RUNTIME != 'async':
+        # Accepted first, so the client sees the code and reason instead of a bare refused handshake
+        await send({"type": "websocket.accept"})
+        await send({"type": "websocket.close", "code": CLOSE_RUNTIME_UNSUPPORTED,
+                    "reason": f"WebSocket needs SNAKE_RUNTIME=async, not {settings.SNAKE_RUNTIME}; poll over HTTP."})
+        return
+    if runtime.get_state(session_id) is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNKNOWN_SESSION})
+        return
+    await send({"type": "websocket.accept"})
+
+    lock = asyncio.Lock()  # the pusher and the move loop both send
+    pusher = asyncio.create_task(_push_states(session_id, send, lock))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] == "websocket.receive":
+                error = _apply_move(session_id, message)
+                if error:
+                    async with lock:
+                        await send({"type": "websocket.send", "text": json.dumps(error)})
+    finally:
+        pusher.cancel()
+        # A push failing because the client went away is expected, not an error
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await pusher
+
+
+async def _push_states(session_id, send, lock):
+    tick = -1
+    while True:
+        state = await runtime.next_state(session_id, tick)
+        async with lock:
+            if state is None:
+                await send({"type": "websocket.close", "code": CLOSE_UNKNOWN_SESSION})
+                return
+            await send({"type": "websocket.send", "text": encoded_states.body(session_id, state).decode()})
+            if state["game_over"]:
+                await send({"type": "websocket.close", "code": CLOSE_GAME_OVER})
+                return
+        tick = state["tick"]
+
+
+def _apply_move(session_id, message):
+    # Returns an error message for the client, or None once the move is applied
+    try:
+        direction = json.loads(message.get("text") or message.get("bytes") or b"{}").get("direction")
+    except (ValueError, AttributeError):
+        direction = None
+    if direction not in DIRECTIONS:
+        return {"error": "Invalid move.", "direction": [f"Expected one of {', '.join(DIRECTIONS)}."]}
+    if runtime.move(session_id, direction) is None:
+        return {"error": "Unknown session."}
+    return None
+
+
+async def _reject(receive, send):
+    # Closing before accepting refuses the handshake (HTTP 403)
+    message = await receive()
+    if message["type"] == "websocket.connect":
+        await send({"type": "websocket.close"})
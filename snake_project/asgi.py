@@ -12,5 +12,24 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'snake_project.settings')
+# Under ASGI the games run on the event loop (game_api.async_runtime)
+os.environ.setdefault('SNAKE_RUNTIME', 'async')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up; the socket shares the async views' runtime
+from game_api.apps import start_checkpoints  # noqa: E402
+from game_api.websocket import game_socket  # noqa: E402
+
+# Only a serving process restores and checkpoints sessions (with SNAKE_RUNTIME=threads)
+start_checkpoints()
+
+
+async def application(scope, receive, send):
+    """
+    HTTP goes to Django, WebSocket connections to the game socket (game_api.websocket).
+    """
+    if scope["type"] == "websocket":
+        await game_socket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -165,3 +165,24 @@ CORS_ALLOWED_ORIGINS = [
 #    "http://localhost:8080",
 #    "http://localhost:3000",
 # ]
+
+# --- Snake game settings ---
+# Map sizes accepted by /api/game/start. Boards above 256x256 run in the engine's
+# sparse mode, so "marathon" maps (e.g. 1000x1000) only cost memory for the snake.
+SNAKE_MIN_MAP_SIZE = 5
+SNAKE_MAX_MAP_SIZE = int(os.environ.get('SNAKE_MAX_MAP_SIZE', 25))
+
+# Game runtime: "threads" (one tick scheduler thread, sync views; WSGI / runserver),
+# "async" (asyncio tick loop and async views on the server's event loop; ASGI)
+# or "sharded" (sessions spread over SNAKE_SHARDS worker processes, sync views route to them).
+# asgi.py switches to "async" unless this is set explicitly.
+SNAKE_RUNTIME = os.environ.get('SNAKE_RUNTIME', 'threads')
+# Worker processes of the sharded runtime; empty means one per CPU core
+SNAKE_SHARDS = int(os.environ.get('SNAKE_SHARDS', 0)) or None
+# SQLite file the threaded runtime checkpoints its live sessions to and restores them from
+# on start, so a restart does not end every game; empty disables checkpointing.
+# Only SNAKE_RUNTIME=threads checkpoints: under "async" (the ASGI default) or "sharded" it is ignored
+SNAKE_CHECKPOINT_PATH = os.environ.get('SNAKE_CHECKPOINT_PATH', '')
+SNAKE_CHECKPOINT_INTERVAL = float(os.environ.get('SNAKE_CHECKPOINT_INTERVAL', 5))
+# Longest a long-poll of /api/game/state (?since=<tick>&wait=<ms>) may wait for the next tick, in ms
+SNAKE_STATE_MAX_WAIT_MS = int(os.environ.get('SNAKE_STATE_MAX_WAIT_MS', 30000))
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'snake_project.settings')
 
 application = get_wsgi_application()
+
+# Only a serving process restores and checkpoints sessions
+from game_api.apps import start_checkpoints  # noqa: E402
+
+start_checkpoints()